@@ -0,0 +1,53 @@
+"""Memory used by a catalog of Product/Customer objects, with and without __slots__.
+
+    python benchmarks/bench_catalog_memory.py [count]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from project import Customer, Product
+
+
+class DictProduct:
+    # Product as it was before __slots__
+    def __init__(self, product_id, name, price, stock):
+        self.product_id = product_id
+        self.name = name
+        self.price = float(price)
+        self.stock = int(stock)
+
+
+class DictCustomer:
+    def __init__(self, customer_id, name, email):
+        self.customer_id = customer_id
+        self.name = name
+        self.email = email
+        self.discount = 0
+
+
+def measure(label, count, build):
+    tracemalloc.start()
+    catalog = build()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(catalog) == count
+    print(f"{label:<22} {used / 2**20:10.1f} MiB {used / count:8.0f} B/object")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    print(f"{count:,} objects")
+    measure('Product (__dict__)', count,
+            lambda: {f'P{i}': DictProduct(f'P{i}', f'Product {i}', i * 0.5, i % 50) for i in range(count)})
+    measure('Product (__slots__)', count,
+            lambda: {f'P{i}': Product(f'P{i}', f'Product {i}', i * 0.5, i % 50) for i in range(count)})
+    measure('Customer (__dict__)', count,
+            lambda: {f'C{i}': DictCustomer(f'C{i}', f'Name {i}', f'c{i}@example.com') for i in range(count)})
+    measure('Customer (__slots__)', count,
+            lambda: {f'C{i}': Customer(f'C{i}', f'Name {i}', f'c{i}@example.com') for i in range(count)})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Catalog search through CatalogIndex versus a linear scan of the products.
+
+    python benchmarks/bench_catalog_search.py [products]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ecommerce.index import CatalogIndex
+from project import Product
+
+WORDS = ['steel', 'cotton', 'wireless', 'mini', 'pro', 'ultra', 'smart', 'classic', 'eco', 'travel',
+         'kettle', 'lamp', 'mouse', 'speaker', 'jacket', 'bottle', 'charger', 'backpack', 'desk', 'watch']
+
+
+def linear_search(products, text=None, min_price=None, max_price=None, in_stock=False, limit=20):
+    matches = [p for p in products
+               if (text is None or text in p.name.lower())
+               and (min_price is None or p.price >= min_price)
+               and (max_price is None or p.price <= max_price)
+               and (not in_stock or p.stock > 0)]
+    return sorted(matches, key=lambda p: p.name.lower())[:limit]
+
+
+def timed(label, queries, search):
+    started = time.perf_counter()
+    for query in queries:
+        search(**query)
+    return (time.perf_counter() - started) / len(queries)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    rng = random.Random(0)
+    products = [Product(f'P{i}', f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                        round(rng.uniform(1, 1000), 2), rng.choice([0, 0, 1, 5, 20]))
+                for i in range(count)]
+
+    started = time.perf_counter()
+    index = CatalogIndex.build(products)
+    print(f"{count:,} products, index built in {time.perf_counter() - started:.2f}s")
+
+    cases = {
+        'name substring': [{'text': f'{i}7'} for i in range(1000, 1050)],
+        'short + price': [{'text': 'st', 'min_price': 10.0, 'max_price': 12.0} for _ in range(20)],
+        'short name': [{'text': 'ro'} for _ in range(5)],
+        'price range': [{'min_price': p, 'max_price': p + 0.5} for p in range(100, 150)],
+        'word + in stock': [{'text': 'wireless lamp', 'in_stock': True, 'max_price': 20.0} for _ in range(20)],
+    }
+    for label, queries in cases.items():
+        for query in queries[:3]:
+            assert [p.product_id for p in index.search(**query)] == \
+                   [p.product_id for p in linear_search(products, **query)], query
+        indexed = timed(label, queries, index.search)
+        scan = timed(label, queries, lambda **q: linear_search(products, **q))
+        print(f"{label:<16} index {indexed * 1000:8.2f} ms  scan {scan * 1000:8.2f} ms  ({scan / indexed:.0f}x)")
+
+    started = time.perf_counter()
+    for product in products[:10000]:
+        product.stock = 0
+        index.update_stock(product)
+        product.price += 1
+        index.update(product)
+    print(f"incremental update {(time.perf_counter() - started) / 10000 * 1e6:.1f} us/product")
+
+
+if __name__ == '__main__':
+    main()
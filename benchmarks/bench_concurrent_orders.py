@@ -0,0 +1,69 @@
+"""Place orders from many threads at once and check that nothing is oversold.
+
+    python benchmarks/bench_concurrent_orders.py [threads] [orders_per_thread]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from project import Customer, ECommerceSystem, OrderError, Product
+
+PRODUCTS = 2000
+CUSTOMERS = 500
+INITIAL_STOCK = 1000
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        system = ECommerceSystem(*(os.path.join(tmp, name) for name in
+                                   ('products.xlsx', 'customers.xlsx', 'orders.xlsx', 'journal')))
+        for i in range(PRODUCTS):
+            system.add_product(Product(f'P{i}', f'Product {i}', 1 + i % 100, INITIAL_STOCK))
+        for i in range(CUSTOMERS):
+            system.add_customer(Customer(f'C{i}', f'Customer {i}', f'c{i}@example.com'))
+
+        rejected = [0] * threads
+
+        def worker(n):
+            rng = random.Random(n)
+            for _ in range(per_thread):
+                # A few hot products so threads really contend
+                lines = [(f'P{rng.randrange(50 if rng.random() < 0.5 else PRODUCTS)}', rng.randint(1, 3))
+                         for _ in range(rng.randint(1, 5))]
+                try:
+                    system.place_order(f'C{rng.randrange(CUSTOMERS)}', lines)
+                except OrderError:
+                    rejected[n] += 1
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        sold = {}
+        for order in system.orders.values():
+            for product, quantity in zip(order.products, order.quantities):
+                sold[product.product_id] = sold.get(product.product_id, 0) + quantity
+        for product in system.products.values():
+            assert product.stock >= 0, product.product_id
+            assert product.stock + sold.get(product.product_id, 0) == INITIAL_STOCK, product.product_id
+        assert len(set(system.orders)) == len(system.orders) == threads * per_thread - sum(rejected)
+
+        attempts = threads * per_thread
+        print(f"{threads} threads, {attempts:,} orders attempted, {len(system.orders):,} placed, "
+              f"{sum(rejected):,} rejected for stock")
+        print(f"{elapsed:.2f}s, {attempts / elapsed:,.0f} orders/s, no overselling")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Time building and paging a teacher gradebook.
+
+    python benchmarks/bench_gradebook.py [students] [quizzes]
+
+Pivots synthetic marks rows (80% of cells attempted) into a Gradebook
+and times the build, one page and the per-quiz summary.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from quiz_ms.gradebook import Gradebook
+
+
+def timed(label, run):
+    started = time.perf_counter()
+    result = run()
+    print(f"{label:<14} {(time.perf_counter() - started) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    n_students = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_quizzes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(1)
+    students = [{'id': 3 * i + 1, 'fullname': f'Student {i}', 'email': f's{i}@example.com'}
+                for i in range(n_students)]
+    quizzes = [{'id': 7 * j + 2, 'title': f'Quiz {j}', 'subject': 'Maths'} for j in range(n_quizzes)]
+    marks = [(student['id'], quiz['id'], rng.randint(0, 20), 20)
+             for student in students for quiz in quizzes if rng.random() < 0.8]
+    print(f"{n_students:,} students x {n_quizzes} quizzes, {len(marks):,} marks rows")
+
+    book = timed('build', lambda: Gradebook(students, quizzes, marks))
+    timed('page of 50', lambda: book.page(book.pages(50) // 2, 50))
+    timed('quiz summary', book.quiz_summary)
+    print(f"grid size      {book.scores.nbytes / 2**20:8.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Parallel ingestion of many supplier workbooks versus a single process.
+
+    python benchmarks/bench_ingest.py [files] [rows_per_file]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import openpyxl
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ecommerce.ingest import ingest
+from project import ECommerceSystem
+
+
+def write_feed(path, start, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['Product ID', 'Name', 'Price', 'Stock'])
+    for i in range(start, start + rows):
+        ws.append([f'P{i:07d}', f'Product {i}', round(1 + (i % 1000) * 0.37, 2), i % 50])
+    wb.save(path)
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for n in range(files):
+            path = os.path.join(tmp, f'feed_{n:03d}.xlsx')
+            # Feeds overlap by 10% so conflict resolution is exercised
+            write_feed(path, n * rows * 9 // 10, rows)
+            paths.append(path)
+
+        cpus = os.cpu_count() or 1
+        baseline = None
+        results = {}
+        for workers in sorted({1, 2, 4, cpus}):
+            system = ECommerceSystem(*(os.path.join(tmp, name) for name in
+                                       ('products.xlsx', 'customers.xlsx', 'orders.xlsx', 'journal')))
+            started = time.perf_counter()
+            summary = ingest(system, paths, workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            results[workers] = {p.product_id: (p.name, p.price, p.stock) for p in system.products.values()}
+            print(f"{workers:>2} workers {elapsed:7.2f}s {summary['rows'] / elapsed:10,.0f} rows/s "
+                  f"speedup {baseline / elapsed:4.1f}x  ({summary['conflicts']} conflicts)")
+        # Same result whatever the worker count
+        assert all(result == results[1] for result in results.values())
+        print(f"{cpus} CPUs available")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Compare ECommerceSystem.load_data with the old full-DOM openpyxl loader.
+
+    python benchmarks/bench_load_data.py [rows]
+
+Writes a synthetic products workbook with `rows` rows to a temp directory
+and reports load time, rows/s and peak Python memory for both loaders.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from project import ECommerceSystem, Product
+
+
+def write_catalog(path, rows):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['Product ID', 'Name', 'Price', 'Stock'])
+    for i in range(rows):
+        ws.append([f'P{i:07d}', f'Product {i}', round(1 + (i % 1000) * 0.37, 2), i % 50])
+    wb.save(path)
+
+
+def legacy_load(path):
+    # The loader as it was before read-only mode
+    products = {}
+    wb = openpyxl.load_workbook(path)
+    ws = wb.active
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        if row[0]:
+            products[row[0]] = Product(row[0], row[1], row[2], row[3])
+    return products
+
+
+def measure(label, rows, load):
+    started = time.perf_counter()
+    products = load()
+    elapsed = time.perf_counter() - started
+    assert len(products) == rows
+    del products
+
+    # Separate run for memory, tracing slows the load down a lot
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:8.2f}s {rows / elapsed:12,.0f} rows/s {peak / 2**20:10.1f} MiB peak")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as tmp:
+        products_file = os.path.join(tmp, 'products.xlsx')
+        write_catalog(products_file, rows)
+        print(f"{rows:,} products")
+        measure('full DOM', rows, lambda: legacy_load(products_file))
+        # Without the snapshot, which would serve the second (memory) run
+        measure('streaming', rows, lambda: ECommerceSystem(products_file, os.path.join(tmp, 'none.xlsx'),
+                                                           journal_file=os.path.join(tmp, 'journal'),
+                                                           snapshot_file=False).products)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Compare pricing carts rule by rule with the compiled PricingEngine table.
+
+    python benchmarks/bench_pricing.py [products] [carts] [rules]
+
+Prices `carts` random carts of 1-5 lines against `rules` per-product
+discount rules: once by checking every rule for every line, once with a
+table lookup per line and once with the vectorized PricingEngine.reprice.
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ecommerce.pricing import PricingEngine, Rule
+from project import Product
+
+
+def rule_by_rule(products, rules, carts, now):
+    totals = []
+    for tier, lines in carts:
+        total = 0.0
+        for product_id, quantity in lines:
+            discount = max((rule.discount for rule in rules if rule.active(now)
+                            and rule.tier in (None, tier) and rule.product_id in (None, product_id)), default=0)
+            total += products[product_id].price * (1 - discount) * quantity
+        totals.append(total)
+    return totals
+
+
+def timed(label, count, run):
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} {elapsed:8.3f}s {count / elapsed:12,.0f} carts/s")
+    return result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:4]] + [100000, 100000, 200][len(sys.argv[1:4]):]
+    n_products, n_carts, n_rules = sizes
+    rng = random.Random(1)
+    products = {f'P{i:07d}': Product(f'P{i:07d}', f'Product {i}', 1 + (i % 1000) * 0.37, 10)
+                for i in range(n_products)}
+    ids = list(products)
+    rules = [Rule(0.1, tier='Premium')] + [Rule(rng.choice([0.05, 0.2, 0.3]), product_id=rng.choice(ids))
+                                           for _ in range(n_rules - 1)]
+    carts = [(rng.choice(['Regular', 'Premium']),
+              [(rng.choice(ids), rng.randint(1, 4)) for _ in range(rng.randint(1, 5))])
+             for _ in range(n_carts)]
+    engine = PricingEngine(products, rules)
+    print(f"{n_products:,} products, {n_carts:,} carts, {n_rules} rules")
+
+    started = time.perf_counter()
+    engine.compile()
+    print(f"compile        {time.perf_counter() - started:8.3f}s")
+
+    expected = timed('rule by rule', n_carts, lambda: rule_by_rule(products, rules, carts, datetime.now()))
+    lookups = timed('table lookup', n_carts, lambda: [
+        sum(price * quantity for price, (_, quantity) in
+            zip(engine.prices(tier, [product_id for product_id, _ in lines]), lines))
+        for tier, lines in carts])
+    vectorized = timed('reprice', n_carts, lambda: engine.reprice(carts))
+    assert all(abs(a - b) < 1e-6 for a, b in zip(expected, lookups))
+    assert all(abs(a - b) < 1e-6 for a, b in zip(expected, vectorized.tolist()))
+
+
+if __name__ == '__main__':
+    main()
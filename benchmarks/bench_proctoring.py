@@ -0,0 +1,54 @@
+"""Time the attempt registry with many concurrent quiz takers.
+
+    python benchmarks/bench_proctoring.py [takers] [quizzes]
+
+Starts one attempt per taker, then times heartbeats, a batched expiry of a
+tenth of the attempts, and the per-quiz snapshot and merge a teacher's
+proctoring view does.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from quiz_ms.proctoring import AttemptRegistry, merge_snapshots
+
+
+def main():
+    n_takers = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_quizzes = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = random.Random(1)
+    registry = AttemptRegistry(timeout=60)
+    now = time.time()
+    takers = [(student_id % n_quizzes, student_id) for student_id in range(n_takers)]
+    print(f"{n_takers:,} takers over {n_quizzes} quizzes")
+
+    started = time.perf_counter()
+    for quiz_id, student_id in takers:
+        registry.start(quiz_id, student_id, f'Student {student_id}', now, now + 1800)
+    print(f"start        {(time.perf_counter() - started) / n_takers * 1e6:8.2f} us/attempt")
+
+    beats = [rng.choice(takers) for _ in range(200000)]
+    started = time.perf_counter()
+    for quiz_id, student_id in beats:
+        registry.heartbeat(quiz_id, student_id, rng.randrange(20))
+    elapsed = time.perf_counter() - started
+    print(f"heartbeat    {elapsed / len(beats) * 1e6:8.2f} us ({len(beats) / elapsed:,.0f}/s on one thread)")
+
+    # A tenth of the takers go quiet, expire them in one sweep
+    for key in list(registry.active)[:n_takers // 10]:
+        registry.active[key].last_seen = now - 120
+    registry.last_sweep = 0
+    started = time.perf_counter()
+    registry.heartbeat(*takers[-1])
+    print(f"expiry sweep {(time.perf_counter() - started) * 1000:8.2f} ms for {n_takers // 10:,} attempts")
+
+    started = time.perf_counter()
+    snapshots = [registry.snapshot(0) for _ in range(4)]  # as if from four workers
+    counts, attempts = merge_snapshots(snapshots, registry.timeout)
+    print(f"report       {(time.perf_counter() - started) * 1000:8.2f} ms for {len(attempts):,} attempts, {counts}")
+
+
+if __name__ == '__main__':
+    main()
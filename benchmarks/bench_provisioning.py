@@ -0,0 +1,70 @@
+"""Time reading and hashing a bulk user file, without a database.
+
+    python benchmarks/bench_provisioning.py [users] [workers]
+
+Writes a CSV of users, then times parsing it into batches, and parsing plus
+hashing the passwords inline and in a process pool the way provision-users
+does, batches submitted ahead of the (here missing) inserts.
+"""
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from quiz_ms.provisioning import hash_batch, read_batches
+
+
+def run(path, executor=None, ahead=0):
+    users = 0
+    batches = read_batches(path)
+    pending = deque()
+
+    def queue_next():
+        item = next(batches, None)
+        if item is not None:
+            passwords = [row[3] for row in item[1]]
+            pending.append(executor.submit(hash_batch, passwords) if executor else passwords)
+
+    for _ in range(ahead + 1):
+        queue_next()
+    while pending:
+        hashing = pending.popleft()
+        users += len(hashing.result() if executor else hash_batch(hashing))
+        queue_next()
+    return users
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'users.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('fullname,email,password,role\n')
+            for i in range(n_users):
+                f.write(f'User {i},user{i}@example.com,password-{i:08d},student\n')
+        print(f"{n_users:,} users, {workers} workers")
+
+        started = time.perf_counter()
+        for _ in read_batches(path):
+            pass
+        elapsed = time.perf_counter() - started
+        print(f"read only      {elapsed:6.2f} s  {n_users / elapsed:10,.0f} users/s")
+
+        started = time.perf_counter()
+        run(path)
+        elapsed = time.perf_counter() - started
+        print(f"hash inline    {elapsed:6.2f} s  {n_users / elapsed:10,.0f} users/s")
+
+        with ProcessPoolExecutor(workers) as executor:
+            started = time.perf_counter()
+            run(path, executor, workers)
+            elapsed = time.perf_counter() - started
+        print(f"hash in pool   {elapsed:6.2f} s  {n_users / elapsed:10,.0f} users/s")
+
+
+if __name__ == '__main__':
+    main()
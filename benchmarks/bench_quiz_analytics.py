@@ -0,0 +1,60 @@
+"""Time the quiz item statistics over many stored attempts.
+
+    python benchmarks/bench_quiz_analytics.py [attempts] [questions]
+
+Builds packed answer rows like submit_quiz stores them and times
+QuizStats, from raw rows to the per-question figures teachers see.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from quiz_ms.analytics import UNANSWERED, QuizStats
+from quiz_ms.quiz_cache import QuizContent
+
+
+def make_content(n_questions):
+    questions = [{'id': q, 'question_text': f'Question {q}', 'marks': 1 + q % 3,
+                  'options': [{'id': q * 4 + i, 'text': f'Option {i}'} for i in range(4)]}
+                 for q in range(n_questions)]
+    answer_key = {q['id']: (q['options'][q['id'] % 4]['id'], q['marks']) for q in questions}
+    return QuizContent({'id': 1}, questions, [''] * n_questions, answer_key)
+
+
+def make_rows(content, attempts):
+    rng = np.random.default_rng(1)
+    n_questions = len(content.questions)
+    key = np.arange(n_questions) % 4
+    marks = np.array([q['marks'] for q in content.questions])
+    # Stronger students pick the right option more often
+    ability = rng.random((attempts, 1))
+    answers = np.where(rng.random((attempts, n_questions)) < 0.3 + 0.6 * ability,
+                       key, rng.integers(0, 4, (attempts, n_questions)))
+    answers[rng.random((attempts, n_questions)) < 0.03] = UNANSWERED
+    answers = answers.astype(np.uint8)
+    scores = ((answers == key) * marks).sum(axis=1)
+    return [(row.tobytes(), int(score)) for row, score in zip(answers, scores)]
+
+
+def main():
+    attempts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_questions = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    content = make_content(n_questions)
+    rows = make_rows(content, attempts)
+    print(f"{attempts:,} attempts x {n_questions} questions "
+          f"({attempts * n_questions / 2**20:.1f} MiB of answers)")
+
+    started = time.perf_counter()
+    stats = QuizStats(content, rows)
+    elapsed = time.perf_counter() - started
+    print(f"QuizStats {elapsed * 1000:8.1f} ms")
+    hardest = min(stats.questions, key=lambda q: q['p_value'])
+    print(f"mean {stats.mean:.2f}, hardest question {hardest['number']} "
+          f"(p={hardest['p_value']:.2f}, r_pb={hardest['discrimination']:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Sales report over a large synthetic order book: NumPy columns vs Python loops,
+and building the columns from Order objects per report vs keeping them current.
+
+    python benchmarks/bench_sales_report.py [order_lines] [orders]
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ecommerce.analytics import OrderBook
+
+
+def python_report(book):
+    # The per-order generator approach, for comparison
+    revenue_by_product = {}
+    revenue_by_customer = {}
+    columns = zip(book.customer_index.tolist(), book.product_index.tolist(), book.quantity.tolist(),
+                  book.unit_price.tolist(), book.discount.tolist())
+    for customer, product, quantity, price, discount in columns:
+        total = price * quantity * (1 - discount)
+        revenue_by_product[product] = revenue_by_product.get(product, 0) + total
+        revenue_by_customer[customer] = revenue_by_customer.get(customer, 0) + total
+    top = sorted(revenue_by_product.items(), key=lambda item: item[1], reverse=True)[:10]
+    return sum(revenue_by_product.values()), top
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000000
+    products, customers = 100000, 200000
+    rng = np.random.default_rng(0)
+    book = OrderBook(order_index=np.arange(lines) // 3,
+                     customer_index=rng.integers(0, customers, lines),
+                     product_index=rng.integers(0, products, lines),
+                     quantity=rng.integers(1, 5, lines),
+                     unit_price=rng.uniform(1, 500, lines).round(2),
+                     discount=rng.choice([0.0, 0.1], lines),
+                     order_ids=[f'O{i}' for i in range((lines + 2) // 3)],
+                     customer_ids=[f'C{i}' for i in range(customers)],
+                     product_ids=[f'P{i}' for i in range(products)])
+    print(f"{lines:,} order lines")
+
+    started = time.perf_counter()
+    report = book.summary()
+    vectorized = time.perf_counter() - started
+    print(f"numpy   {vectorized:8.3f}s")
+
+    started = time.perf_counter()
+    revenue, _ = python_report(book)
+    loop = time.perf_counter() - started
+    print(f"python  {loop:8.3f}s  ({loop / vectorized:.0f}x slower)")
+    assert abs(revenue - report['revenue']) < 1e-6 * revenue
+
+    # What sales_report pays per call: before, the columns were built from
+    # the Order objects every time; now once, then each order is added as
+    # it is placed
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 300000
+    orders = make_orders(count, rng)
+    print(f"\n{count:,} orders")
+    started = time.perf_counter()
+    rebuilt = OrderBook.from_orders(orders).summary()
+    rebuild = time.perf_counter() - started
+    print(f"from_orders + summary  {rebuild:8.3f}s per report")
+
+    book = OrderBook.from_orders(orders[:1])
+    started = time.perf_counter()
+    for order in orders[1:]:
+        book.add(order)
+    adding = time.perf_counter() - started
+    started = time.perf_counter()
+    kept = book.summary()
+    current = time.perf_counter() - started
+    print(f"kept current, summary  {current:8.3f}s per report ({rebuild / current:.0f}x faster), "
+          f"{adding / count * 1e6:.1f}us per order added")
+    assert abs(kept['revenue'] - rebuilt['revenue']) < 1e-6 * rebuilt['revenue']
+
+
+def make_orders(count, rng):
+    # Just the Order attributes OrderBook reads
+    products = [SimpleNamespace(product_id=f'P{i}') for i in range(10000)]
+    customers = [SimpleNamespace(customer_id=f'C{i}') for i in range(20000)]
+    orders = []
+    for i in range(count):
+        lines = int(rng.integers(1, 5))
+        orders.append(SimpleNamespace(
+            order_id=f'O{i}', customer=customers[int(rng.integers(0, len(customers)))],
+            products=[products[int(p)] for p in rng.integers(0, len(products), lines)],
+            quantities=rng.integers(1, 5, lines).tolist(), unit_prices=rng.uniform(1, 500, lines).round(2).tolist(),
+            discount=0.0))
+    return orders
+
+
+if __name__ == '__main__':
+    main()
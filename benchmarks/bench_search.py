@@ -0,0 +1,91 @@
+"""Time the quiz and user search index against a LIKE '%word%' style scan.
+
+    python benchmarks/bench_search.py [users] [quizzes]
+
+Builds synthetic users and quizzes (each with ten questions), then times
+loading the index, ranked first-page queries, incremental updates, and the
+same queries as substring scans over every document.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from quiz_ms.search import SearchIndex
+
+FIRST = ['ana', 'ben', 'chloe', 'david', 'elena', 'farid', 'grace', 'hugo', 'imran', 'julia',
+         'kofi', 'lena', 'mateo', 'nadia', 'oscar', 'priya', 'quinn', 'rosa', 'samir', 'tara']
+LAST = ['ahmed', 'brown', 'chen', 'diaz', 'evans', 'fischer', 'garcia', 'hossain', 'ito', 'jones',
+        'khan', 'lopez', 'martin', 'novak', 'okafor', 'patel', 'rahman', 'silva', 'taylor', 'wang']
+SUBJECTS = ['algebra', 'biology', 'chemistry', 'geography', 'history', 'literature', 'physics', 'statistics']
+WORDS = ['cell', 'energy', 'equation', 'river', 'empire', 'poem', 'force', 'mean', 'atom', 'climate',
+         'fraction', 'gene', 'map', 'novel', 'orbit', 'reaction', 'treaty', 'variance', 'wave', 'volcano']
+
+
+def make_documents(n_users, n_quizzes, rng):
+    documents = []
+    for i in range(n_users):
+        fullname = f'{rng.choice(FIRST).title()} {rng.choice(LAST).title()}'
+        email = f'{fullname.lower().replace(" ", ".")}{i}@school.org'
+        documents.append(('user', i, {'fullname': fullname, 'email': email},
+                          {'kind': 'user', 'id': i, 'fullname': fullname, 'email': email, 'role': 'student'}))
+    for i in range(n_quizzes):
+        subject = rng.choice(SUBJECTS)
+        title = f'{subject.title()} {rng.choice(WORDS)} quiz {i}'
+        questions = ' '.join(f'What is the {rng.choice(WORDS)} of the {rng.choice(WORDS)}?' for _ in range(10))
+        documents.append(('quiz', i, {'title': title, 'subject': subject, 'description': f'Week {i % 12} test',
+                                      'questions': questions},
+                          {'kind': 'quiz', 'id': i, 'title': title, 'subject': subject, 'code': f'Q{i:05d}',
+                           'teacher_id': i % 50, 'teacher_name': 'Teacher'}))
+    return documents
+
+
+def timed(label, queries, run):
+    started = time.perf_counter()
+    for query in queries:
+        run(query)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<26} {elapsed / len(queries) * 1000:8.3f} ms/query")
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    n_quizzes = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    rng = random.Random(1)
+    documents = make_documents(n_users, n_quizzes, rng)
+    print(f"{n_users:,} users, {n_quizzes:,} quizzes")
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.load(documents)
+    print(f"{'load':<26} {(time.perf_counter() - started) * 1000:8.1f} ms ({len(index.terms):,} terms)")
+
+    queries = {
+        'surname': [rng.choice(LAST) for _ in range(200)],
+        'full name': [f'{rng.choice(FIRST)} {rng.choice(LAST)}' for _ in range(200)],
+        'prefix': [rng.choice(FIRST)[:3] for _ in range(200)],
+        'question word': [rng.choice(WORDS) for _ in range(50)],
+    }
+    for label, batch in queries.items():
+        timed(f'index, {label}', batch, lambda query: index.search(query))
+
+    texts = [(key, ' '.join(fields.values()).lower()) for *key, fields, _ in documents]
+
+    def scan(query):
+        words = query.lower().split()
+        return [key for key, text in texts if all(word in text for word in words)]
+
+    for label, batch in queries.items():
+        timed(f'scan, {label}', batch[:20], scan)
+
+    updates = documents[:1000]
+    started = time.perf_counter()
+    for kind, doc_id, fields, info in updates:
+        index.apply(kind, doc_id)
+        index.apply(kind, doc_id, (fields, info))
+    print(f"{'remove + add':<26} {(time.perf_counter() - started) / len(updates) * 1000:8.3f} ms/document")
+
+
+if __name__ == '__main__':
+    main()
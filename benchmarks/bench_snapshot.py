@@ -0,0 +1,67 @@
+"""Compare ECommerceSystem start-up from XLSX with start-up from the snapshot.
+
+    python benchmarks/bench_snapshot.py [products] [customers] [orders]
+
+Writes synthetic workbooks to a temp directory, starts the system once to
+parse them (which also writes the snapshot), then again from the snapshot,
+and checks that both starts load the same data.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from ecommerce.journal import export_workbook
+from project import ECommerceSystem, PremiumCustomer
+
+
+def write_workbooks(tmp, products, customers, orders):
+    export_workbook(os.path.join(tmp, 'products.xlsx'), ['Product ID', 'Name', 'Price', 'Stock'],
+                    ([f'P{i:07d}', f'Product {i}', round(1 + (i % 1000) * 0.37, 2), i % 50]
+                     for i in range(products)))
+    export_workbook(os.path.join(tmp, 'customers.xlsx'), ['Customer ID', 'Name', 'Email', 'Type'],
+                    ([f'C{i:06d}', f'Customer {i}', f'c{i}@example.com', 'Premium' if i % 5 == 0 else 'Regular']
+                     for i in range(customers)))
+    start = datetime(2024, 1, 1)
+    export_workbook(os.path.join(tmp, 'orders.xlsx'),
+                    ['Order ID', 'Customer ID', 'Product ID', 'Quantity', 'Unit Price', 'Total', 'Date'],
+                    ([f'O{i:07d}', f'C{i % customers:06d}', f'P{(i * 7 + j) % products:07d}', 1 + j, 2.5, 10.0,
+                      start + timedelta(minutes=i)]
+                     for i in range(orders) for j in range(2)))
+
+
+def start(tmp):
+    started = time.perf_counter()
+    system = ECommerceSystem(*(os.path.join(tmp, name) for name in
+                               ('products.xlsx', 'customers.xlsx', 'orders.xlsx', 'ecommerce.journal')))
+    return system, time.perf_counter() - started
+
+
+def state(system):
+    return ([(p.product_id, p.name, p.price, p.stock) for p in system.products.values()],
+            [(c.customer_id, c.name, c.email, isinstance(c, PremiumCustomer)) for c in system.customers.values()],
+            [(o.order_id, o.customer.customer_id, [p.product_id for p in o.products], o.quantities,
+              o.unit_prices, o.total_amount, o.date) for o in system.orders.values()])
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:4]] + [200000, 50000, 100000][len(sys.argv[1:4]):]
+    products, customers, orders = sizes
+    with tempfile.TemporaryDirectory() as tmp:
+        write_workbooks(tmp, products, customers, orders)
+        print(f"{products:,} products, {customers:,} customers, {orders:,} orders")
+
+        cold, cold_time = start(tmp)
+        size = os.path.getsize(os.path.join(tmp, 'ecommerce.snapshot'))
+        warm, warm_time = start(tmp)
+        assert state(cold) == state(warm)
+
+        print(f"XLSX start     {cold_time:8.2f}s (includes writing the snapshot)")
+        print(f"snapshot start {warm_time:8.2f}s ({size / 2**20:.1f} MiB snapshot)")
+        print(f"speed-up       {cold_time / warm_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Support modules for the e-commerce CLI in project.py"""
@@ -0,0 +1,147 @@
+import numpy as np
+
+
+class OrderBook:
+    """Order lines laid out as parallel NumPy columns for batch reporting.
+
+    Product and customer ids are replaced by integer codes (indexes into
+    `product_ids` / `customer_ids`) so every aggregate is a single
+    `np.bincount` instead of a Python loop over orders.
+
+    Built once with from_orders, then kept current with add(): the columns
+    have spare capacity (doubled when full), so adding an order writes its
+    lines in place instead of rebuilding anything.
+    """
+
+    COLUMNS = (('order_index', np.int64), ('customer_index', np.int64), ('product_index', np.int64),
+               ('quantity', np.int64), ('unit_price', np.float64), ('discount', np.float64))
+
+    def __init__(self, order_index, customer_index, product_index, quantity, unit_price, discount,
+                 order_ids, customer_ids, product_ids):
+        values = (order_index, customer_index, product_index, quantity, unit_price, discount)
+        self.buffers = {name: np.asarray(column, dtype=dtype)
+                        for (name, dtype), column in zip(self.COLUMNS, values)}
+        self.size = len(self.buffers['quantity'])
+        self.order_ids = list(order_ids)
+        self.customer_ids = list(customer_ids)
+        self.product_ids = list(product_ids)
+        self.customer_codes = {customer_id: n for n, customer_id in enumerate(self.customer_ids)}
+        self.product_codes = {product_id: n for n, product_id in enumerate(self.product_ids)}
+
+    # The filled part of each column
+    order_index = property(lambda self: self.buffers['order_index'][:self.size])
+    customer_index = property(lambda self: self.buffers['customer_index'][:self.size])
+    product_index = property(lambda self: self.buffers['product_index'][:self.size])
+    quantity = property(lambda self: self.buffers['quantity'][:self.size])
+    unit_price = property(lambda self: self.buffers['unit_price'][:self.size])
+    discount = property(lambda self: self.buffers['discount'][:self.size])
+
+    @classmethod
+    def from_orders(cls, orders):
+        """Build the columns from Order objects, one row per order line"""
+        order_ids = []
+        customer_codes = {}
+        product_codes = {}
+        columns = ([], [], [], [], [], [])
+        order_index, customer_index, product_index, quantity, unit_price, discount = columns
+        for n, order in enumerate(orders):
+            order_ids.append(order.order_id)
+            customer = customer_codes.setdefault(order.customer.customer_id, len(customer_codes))
+            for product, q, price in zip(order.products, order.quantities, order.unit_prices):
+                order_index.append(n)
+                customer_index.append(customer)
+                product_index.append(product_codes.setdefault(product.product_id, len(product_codes)))
+                quantity.append(q)
+                unit_price.append(price)
+                discount.append(order.discount)
+        return cls(*columns, order_ids, list(customer_codes), list(product_codes))
+
+    def add(self, order):
+        """Append one Order's lines"""
+        lines = len(order.products)
+        end = self.size + lines
+        if end > len(self.buffers['quantity']):
+            capacity = max(end, 2 * len(self.buffers['quantity']), 1024)
+            for name, column in self.buffers.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.buffers[name] = grown
+
+        customer_id = order.customer.customer_id
+        customer = self.customer_codes.setdefault(customer_id, len(self.customer_codes))
+        if customer == len(self.customer_ids):
+            self.customer_ids.append(customer_id)
+        products = []
+        for product in order.products:
+            code = self.product_codes.setdefault(product.product_id, len(self.product_codes))
+            if code == len(self.product_ids):
+                self.product_ids.append(product.product_id)
+            products.append(code)
+
+        self.buffers['order_index'][self.size:end] = len(self.order_ids)
+        self.buffers['customer_index'][self.size:end] = customer
+        self.buffers['product_index'][self.size:end] = products
+        self.buffers['quantity'][self.size:end] = order.quantities
+        self.buffers['unit_price'][self.size:end] = order.unit_prices
+        self.buffers['discount'][self.size:end] = order.discount
+        self.order_ids.append(order.order_id)
+        self.size = end
+
+    def __len__(self):
+        return self.size
+
+    def line_totals(self):
+        return self.quantity * self.unit_price * (1 - self.discount)
+
+    def order_totals(self):
+        return np.bincount(self.order_index, weights=self.line_totals(), minlength=len(self.order_ids))
+
+    def revenue_by_product(self):
+        return np.bincount(self.product_index, weights=self.line_totals(), minlength=len(self.product_ids))
+
+    def units_by_product(self):
+        return np.bincount(self.product_index, weights=self.quantity, minlength=len(self.product_ids))
+
+    def revenue_by_customer(self):
+        return np.bincount(self.customer_index, weights=self.line_totals(), minlength=len(self.customer_ids))
+
+    def summary(self, top=10):
+        """Every figure in the sales report"""
+        revenue = float(self.line_totals().sum())
+        orders = len(self.order_ids)
+        return {
+            'orders': orders,
+            'lines': len(self),
+            'units': int(self.quantity.sum()),
+            'revenue': revenue,
+            'average_order': revenue / orders if orders else 0.0,
+            'top_products_by_units': top_n(self.product_ids, self.units_by_product(), top),
+            'top_products_by_revenue': top_n(self.product_ids, self.revenue_by_product(), top),
+            'top_customers': top_n(self.customer_ids, self.revenue_by_customer(), top),
+        }
+
+
+def top_n(ids, values, n):
+    """The n largest values as (id, value) pairs, without sorting everything"""
+    if len(values) == 0:
+        return []
+    n = min(n, len(values))
+    candidates = np.argpartition(values, len(values) - n)[-n:]
+    best = candidates[np.argsort(values[candidates])[::-1]]
+    return [(ids[i], float(values[i])) for i in best]
+
+
+def print_report(report):
+    """Print an OrderBook.summary()"""
+    print("\nSales Report")
+    print(f"Orders: {report['orders']}  Lines: {report['lines']}  Units: {report['units']}")
+    print(f"Revenue: ${report['revenue']:.2f}  Average order: ${report['average_order']:.2f}")
+    print("\nTop products by units:")
+    for product_id, units in report['top_products_by_units']:
+        print(f"  {product_id}: {units:.0f}")
+    print("\nTop products by revenue:")
+    for product_id, revenue in report['top_products_by_revenue']:
+        print(f"  {product_id}: ${revenue:.2f}")
+    print("\nTop customers by revenue:")
+    for customer_id, revenue in report['top_customers']:
+        print(f"  {customer_id}: ${revenue:.2f}")
@@ -0,0 +1,127 @@
+import contextlib
+import csv
+import json
+import sys
+import time
+
+
+def read_commands(stream, fmt):
+    """Yield (line_number, command dict) from a JSON-lines or CSV stream.
+
+    JSON lines hold one command each, e.g.
+        {"op": "add_product", "product_id": "P1", "name": "Pen", "price": 2.5, "stock": 10}
+        {"op": "add_customer", "customer_id": "C1", "name": "Ann", "email": "a@x", "premium": true}
+        {"op": "order", "customer_id": "C1", "lines": [["P1", 2]]}
+        {"op": "search", "text": "pen", "max_price": 5}
+        {"op": "quote", "carts": [["C1", [["P1", 2]]], ["C2", [["P1", 1]]]]}
+        {"op": "report"}
+
+    CSV files are orders: customer_id, product_id, quantity and an optional
+    order_ref column. Consecutive rows with the same order_ref form one order;
+    without it every row is its own order.
+    """
+    if fmt == 'jsonl':
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                try:
+                    command = json.loads(line)
+                except ValueError as e:
+                    yield number, {'op': 'invalid', 'error': f'Invalid JSON: {e}'}
+                    continue
+                if not isinstance(command, dict):
+                    command = {'op': 'invalid', 'error': f'Expected a JSON object, got {type(command).__name__}'}
+                yield number, command
+        return
+
+    reader = csv.DictReader(stream)
+    current_ref, current = None, None
+    for number, row in enumerate(reader, start=2):
+        ref = row.get('order_ref') or None
+        if current is not None and (ref is None or ref != current_ref):
+            yield current['line'], current
+            current = None
+        if current is None:
+            current = {'op': 'order', 'line': number, 'customer_id': row['customer_id'], 'lines': []}
+            current_ref = ref
+        current['lines'].append([row['product_id'], row['quantity']])
+    if current is not None:
+        yield current['line'], current
+
+
+def apply_command(system, command):
+    """Apply one command and return a JSON-serialisable result"""
+    # Take the model classes from the module the system came from; when
+    # project.py runs as a script that is __main__, not `project`
+    models = sys.modules[type(system).__module__]
+    Customer, PremiumCustomer, Product = models.Customer, models.PremiumCustomer, models.Product
+    OrderError = models.OrderError
+
+    op = command.get('op')
+    try:
+        if op == 'add_product':
+            system.add_product(Product(command['product_id'], command['name'],
+                                       command['price'], command['stock']))
+            return {'ok': True}
+        if op == 'add_customer':
+            cls = PremiumCustomer if command.get('premium') else Customer
+            system.add_customer(cls(command['customer_id'], command['name'], command['email']))
+            return {'ok': True}
+        if op == 'order':
+            order = system.place_order(command['customer_id'],
+                                       [(product_id, int(quantity)) for product_id, quantity in command['lines']])
+            return {'ok': True, 'order_id': order.order_id, 'total_amount': round(order.total_amount, 2)}
+        if op == 'search':
+            products = system.search_products(command.get('text'), command.get('min_price'),
+                                              command.get('max_price'), command.get('in_stock', False),
+                                              command.get('limit', 20))
+            return {'ok': True, 'products': [p.to_dict() for p in products]}
+        if op == 'quote':
+            totals = system.quote([(customer_id, [(product_id, int(quantity)) for product_id, quantity in lines])
+                                   for customer_id, lines in command['carts']])
+            return {'ok': True, 'totals': [round(total, 2) for total in totals.tolist()]}
+        if op == 'report':
+            return {'ok': True, 'report': system.sales_summary()}
+        if op == 'invalid':
+            return {'ok': False, 'error': command['error']}
+        return {'ok': False, 'error': f'Unknown op: {op}'}
+    except OrderError as e:
+        return {'ok': False, 'error': str(e)}
+    except (KeyError, TypeError, ValueError) as e:
+        return {'ok': False, 'error': f'Bad command: {e!r}'}
+
+
+def run_batch(system, stream, fmt='jsonl', out=sys.stdout, save_every=10000):
+    """Apply every command in `stream`, writing one JSON result line per command.
+
+    Changes are saved every `save_every` commands and once at the end, also
+    when the batch stops early (an error, Ctrl-C), so applied commands are
+    never lost. Progress and throughput go to stderr so `out` stays
+    machine-readable.
+    """
+    started = time.perf_counter()
+    processed = failed = 0
+    try:
+        for number, command in read_commands(stream, fmt):
+            result = apply_command(system, command)
+            result['line'] = number
+            out.write(json.dumps(result, default=str) + '\n')
+            processed += 1
+            failed += not result['ok']
+            if processed % save_every == 0:
+                save(system)
+                elapsed = time.perf_counter() - started
+                print(f"{processed} commands, {processed / elapsed:,.0f}/s", file=sys.stderr)
+    finally:
+        save(system)
+        out.flush()
+
+    elapsed = time.perf_counter() - started
+    print(f"Processed {processed} commands ({failed} failed) in {elapsed:.2f}s "
+          f"({processed / max(elapsed, 1e-9):,.0f} commands/s)", file=sys.stderr)
+    return processed, failed
+
+
+def save(system):
+    with contextlib.redirect_stdout(sys.stderr):
+        system.save_data()
@@ -0,0 +1,152 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CatalogIndex:
+    """Search indexes over the product catalog, updated one product at a time.
+
+    - a trigram index on lower-cased names for substring search (queries
+      under 3 characters scan the names instead)
+    - a sorted name list for listing in name order
+    - a sorted (price, row) list for price ranges
+    - an in-stock bitmap with one bit per product row
+
+    Products are identified internally by a row number assigned when they
+    are first added.
+    """
+
+    def __init__(self):
+        self.rows = {}          # product_id -> row
+        self.products = []      # row -> Product
+        self.names = []         # row -> indexed (lower-cased) name
+        self.prices = []        # row -> indexed price
+        self.by_trigram = {}    # trigram -> set of rows
+        self.sorted_names = []  # sorted (name, row)
+        self.sorted_prices = []  # sorted (price, row)
+        self.in_stock = bytearray()
+
+    @classmethod
+    def build(cls, products):
+        """Index a whole catalog at once, faster than adding products one by one"""
+        index = cls()
+        for product in products:
+            row = len(index.products)
+            name = str(product.name).lower()
+            index.rows[product.product_id] = row
+            index.products.append(product)
+            index.names.append(name)
+            index.prices.append(product.price)
+            for gram in trigrams(name):
+                index.by_trigram.setdefault(gram, set()).add(row)
+        index.sorted_names = sorted((name, row) for row, name in enumerate(index.names))
+        index.sorted_prices = sorted((price, row) for row, price in enumerate(index.prices))
+        index.in_stock = bytearray((len(index.products) + 7) // 8)
+        for row, product in enumerate(index.products):
+            index._set_stock_bit(row, product.stock > 0)
+        return index
+
+    def __len__(self):
+        return len(self.products)
+
+    def update(self, product):
+        """Add a product or re-index one whose name, price or stock changed"""
+        row = self.rows.get(product.product_id)
+        if row is None:
+            row = len(self.products)
+            self.rows[product.product_id] = row
+            self.products.append(product)
+            self.names.append(None)
+            self.prices.append(None)
+            if len(self.in_stock) * 8 <= row:
+                self.in_stock.extend(bytes(max(1, len(self.in_stock))))
+        else:
+            self.products[row] = product
+
+        name = str(product.name).lower()
+        if name != self.names[row]:
+            if self.names[row] is not None:
+                self._remove_sorted(self.sorted_names, (self.names[row], row))
+                for gram in trigrams(self.names[row]):
+                    self.by_trigram[gram].discard(row)
+            self.names[row] = name
+            insort(self.sorted_names, (name, row))
+            for gram in trigrams(name):
+                self.by_trigram.setdefault(gram, set()).add(row)
+
+        if product.price != self.prices[row]:
+            if self.prices[row] is not None:
+                self._remove_sorted(self.sorted_prices, (self.prices[row], row))
+            self.prices[row] = product.price
+            insort(self.sorted_prices, (product.price, row))
+
+        self._set_stock_bit(row, product.stock > 0)
+
+    def update_stock(self, product):
+        """Cheap path for stock-only changes"""
+        self._set_stock_bit(self.rows[product.product_id], product.stock > 0)
+
+    def search(self, text=None, min_price=None, max_price=None, in_stock=False, limit=20):
+        """Products matching every given filter, ordered by name"""
+        candidates = None
+        text = str(text).lower() if text else None
+        if min_price is not None or max_price is not None:
+            candidates = self._price_range(min_price, max_price)
+        if text and len(text) < 3:
+            # Too short for trigrams, scan the names instead: only those in
+            # the price range, or all of them in order until enough match
+            if candidates is None:
+                rows = (row for name, row in self.sorted_names
+                        if text in name and (not in_stock or self._stock_bit(row)))
+                return [self.products[row] for row in islice(rows, limit)]
+            candidates = [row for row in candidates if text in self.names[row]]
+        elif text:
+            matched = self._match_name(text)
+            if candidates is None:
+                candidates = matched
+            else:
+                # Walk the shorter list and probe the longer one
+                shorter, longer = sorted((candidates, matched), key=len)
+                longer = set(longer)
+                candidates = [row for row in shorter if row in longer]
+        if candidates is None:
+            candidates = [row for _, row in self.sorted_names]
+        if in_stock:
+            candidates = [row for row in candidates if self._stock_bit(row)]
+
+        rows = sorted(candidates, key=lambda row: self.names[row])
+        return [self.products[row] for row in rows[:limit]]
+
+    def _match_name(self, text):
+        # Intersect the posting sets, smallest first, then confirm the substring
+        postings = sorted((self.by_trigram.get(gram, set()) for gram in trigrams(text)), key=len)
+        rows = set(postings[0])
+        for posting in postings[1:]:
+            rows &= posting
+            if not rows:
+                break
+        return [row for row in rows if text in self.names[row]]
+
+    def _price_range(self, min_price, max_price):
+        start = 0 if min_price is None else bisect_left(self.sorted_prices, (min_price,))
+        end = len(self.sorted_prices) if max_price is None else \
+            bisect_right(self.sorted_prices, (max_price, float('inf')))
+        return [row for _, row in self.sorted_prices[start:end]]
+
+    def _set_stock_bit(self, row, value):
+        if value:
+            self.in_stock[row >> 3] |= 1 << (row & 7)
+        else:
+            self.in_stock[row >> 3] &= ~(1 << (row & 7)) & 0xFF
+
+    def _stock_bit(self, row):
+        return self.in_stock[row >> 3] >> (row & 7) & 1
+
+    @staticmethod
+    def _remove_sorted(items, item):
+        i = bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
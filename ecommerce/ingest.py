@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import openpyxl
+
+
+def parse_workbook(path):
+    """Parse one supplier workbook into compact row tuples.
+
+    Runs in a worker process. The sheet type is taken from its header:
+    'Product ID' sheets give (id, name, price, stock) rows and 'Customer ID'
+    sheets give (id, name, email, type) rows. Returns (path, kind, rows, error).
+    """
+    try:
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        return path, None, [], str(e)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        first = str(header[0]).strip().lower() if header and header[0] is not None else ''
+        if first == 'product id':
+            kind = 'product'
+        elif first == 'customer id':
+            kind = 'customer'
+        else:
+            return path, None, [], f"Unrecognised header: {header}"
+
+        parsed = []
+        for row in rows:
+            if not row or not row[0]:
+                continue
+            row = tuple(row[:4]) + (None,) * (4 - len(row[:4]))
+            try:
+                if kind == 'product':
+                    parsed.append((row[0], row[1], float(row[2]), int(row[3])))
+                else:
+                    parsed.append((row[0], row[1], row[2], row[3]))
+            except (TypeError, ValueError):
+                # Skip rows with a missing or malformed price / stock
+                continue
+        return path, kind, parsed, None
+    finally:
+        wb.close()
+
+
+def ingest(system, paths, workers=None):
+    """Parse many workbooks in parallel and merge them into `system`.
+
+    Conflicts are resolved deterministically: files are merged in sorted
+    path order, so for an id found in several files the last file wins, and
+    within a file the last row wins. Returns a summary dict.
+    """
+    # See batch.apply_command: project.py may be running as __main__
+    models = sys.modules[type(system).__module__]
+    Customer, PremiumCustomer, Product = models.Customer, models.PremiumCustomer, models.Product
+
+    started = time.perf_counter()
+    paths = sorted(set(os.path.abspath(path) for path in paths))
+    products, customers = {}, {}
+    product_source, customer_source = {}, {}
+    conflicts = rows = 0
+    errors = []
+
+    if workers == 1 or len(paths) <= 1:
+        results = map(parse_workbook, paths)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        # map() yields in input order whatever order the workers finish in
+        results = pool.map(parse_workbook, paths)
+
+    try:
+        for path, kind, parsed, error in results:
+            if error:
+                errors.append((path, error))
+                continue
+            rows += len(parsed)
+            if kind == 'product':
+                target, source = products, product_source
+            else:
+                target, source = customers, customer_source
+            for row in parsed:
+                previous = source.get(row[0])
+                if previous is not None and previous != path:
+                    conflicts += 1
+                source[row[0]] = path
+                target[row[0]] = row
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    system.add_products([Product(*row) for row in products.values()])
+    system.add_customers([(PremiumCustomer if row[3] == 'Premium' else Customer)(row[0], row[1], row[2])
+                          for row in customers.values()])
+
+    elapsed = time.perf_counter() - started
+    return {
+        'files': len(paths),
+        'rows': rows,
+        'products': len(products),
+        'customers': len(customers),
+        'conflicts': conflicts,
+        'errors': errors,
+        'seconds': elapsed,
+    }
@@ -0,0 +1,126 @@
+import contextlib
+import json
+import os
+import stat
+import tempfile
+
+import openpyxl
+
+
+class Journal:
+    """Append-only log of changed records, one JSON object per line.
+
+    Records carry the full state of the object they describe, so replaying
+    the same record twice is harmless. A line cut short by a crash is
+    dropped on replay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = 0
+        self.file = None
+
+    def replay(self):
+        """Yield the records in the journal and trim any torn last line"""
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+                self.entries += 1
+                yield record
+        if good_offset != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def append(self, records):
+        """Write records and make sure they reached the disk before returning.
+
+        If the write fails part way (disk full), the journal is cut back to
+        where it was, so the next append doesn't start after a torn line.
+        """
+        if not records:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        data = ''.join(json.dumps(r, default=str) + '\n' for r in records)
+        offset = os.path.getsize(self.path)
+        try:
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except BaseException:
+            # Closing flushes what is still buffered, so truncate after it
+            file, self.file = self.file, None
+            with contextlib.suppress(OSError):
+                file.close()
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+            raise
+        self.entries += len(records)
+
+    def reset(self):
+        """Start an empty journal, once its contents are safely stored elsewhere"""
+        self.close()
+        atomic_replace(self.path, lambda tmp: open(tmp, 'w').close())
+        self.entries = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def atomic_replace(path, write):
+    """Call write(tmp_path) and then move the temp file over `path`.
+
+    Readers (and a crash at any point) see either the old file or the new
+    one, never a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        with open(tmp, 'rb') as f:
+            os.fsync(f.fileno())
+        # mkstemp makes the file owner-only, keep the permissions the file
+        # had (or would get from open()) instead
+        os.chmod(tmp, file_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def file_mode(path):
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~UMASK
+
+
+# Read once at import: os.umask can only be read by setting it, which would
+# briefly change it for every thread
+UMASK = os.umask(0o022)
+os.umask(UMASK)
+
+
+def export_workbook(path, header, rows):
+    """Write rows to an XLSX file with openpyxl's streaming write-only mode"""
+    def write(tmp):
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(header)
+        for row in rows:
+            ws.append(row)
+        wb.save(tmp)
+    atomic_replace(path, write)
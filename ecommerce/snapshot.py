@@ -0,0 +1,164 @@
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime
+
+from ecommerce.journal import atomic_replace
+
+MAGIC = b'ECSNAP01'
+PREFIX = struct.Struct('<8sQ')  # magic, header length
+
+# Type tags for columns of mixed Python values (ids, names, emails, dates)
+STR, INT, FLOAT, NONE, DATETIME = range(5)
+
+
+def source_key(paths):
+    """What a snapshot of `paths` is valid for: the size and mtime of each file"""
+    key = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            key.append(None)
+        else:
+            key.append([st.st_size, st.st_mtime_ns])
+    return key
+
+
+def encode_values(values):
+    """Pack values into a tag byte per value plus one NUL-separated UTF-8 blob.
+
+    NUL can't appear in XLSX cell text, so it is safe as a separator.
+    """
+    tags = bytearray(len(values))
+    parts = []
+    for i, value in enumerate(values):
+        if isinstance(value, str):
+            parts.append(value)
+            continue
+        if value is None:
+            tags[i] = NONE
+            parts.append('')
+        elif isinstance(value, int):
+            tags[i] = INT
+            parts.append(str(int(value)))
+        elif isinstance(value, float):
+            tags[i] = FLOAT
+            parts.append(repr(value))
+        elif isinstance(value, datetime):
+            tags[i] = DATETIME
+            parts.append(value.isoformat())
+        else:
+            parts.append(str(value))
+    return bytes(tags), '\x00'.join(parts).encode('utf-8')
+
+
+def decode_values(tags, blob, count):
+    if not count:
+        return []
+    parts = blob.decode('utf-8').split('\x00')
+    if tags.count(STR) == count:
+        return parts
+    convert = {STR: str, INT: int, FLOAT: float, NONE: lambda _: None, DATETIME: datetime.fromisoformat}
+    return [convert[tag](part) for tag, part in zip(tags, parts)]
+
+
+def write_snapshot(path, key, products, customers, orders):
+    """Write products, customers and orders as one columnar snapshot file.
+
+    products are (id, name, price, stock), customers (id, name, email, premium)
+    and orders (order_id, customer_id, total_amount, date, lines) with lines
+    as (product_id, quantity, unit_price). Numeric columns are stored as raw
+    8-byte aligned arrays so the file can be read straight out of a mapping.
+    """
+    sections = {}
+
+    def values(name, column):
+        sections[name + '.tags'], sections[name] = encode_values(column)
+
+    values('product_id', [p[0] for p in products])
+    values('product_name', [p[1] for p in products])
+    sections['product_price'] = array.array('d', (p[2] for p in products)).tobytes()
+    sections['product_stock'] = array.array('q', (p[3] for p in products)).tobytes()
+
+    values('customer_id', [c[0] for c in customers])
+    values('customer_name', [c[1] for c in customers])
+    values('customer_email', [c[2] for c in customers])
+    sections['customer_premium'] = bytes(bool(c[3]) for c in customers)
+
+    values('order_id', [o[0] for o in orders])
+    values('order_customer', [o[1] for o in orders])
+    sections['order_total'] = array.array('d', (o[2] for o in orders)).tobytes()
+    values('order_date', [o[3] for o in orders])
+    lines = [(n, line) for n, o in enumerate(orders) for line in o[4]]
+    sections['line_order'] = array.array('q', (n for n, _ in lines)).tobytes()
+    values('line_product', [line[0] for _, line in lines])
+    sections['line_quantity'] = array.array('q', (line[1] for _, line in lines)).tobytes()
+    sections['line_price'] = array.array('d', (line[2] for _, line in lines)).tobytes()
+
+    # Lay the sections out after the header, each on an 8-byte boundary
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        layout[name] = [offset, len(data)]
+        offset += (len(data) + 7) & ~7
+    header = json.dumps({
+        'key': key, 'byteorder': sys.byteorder,
+        'counts': [len(products), len(customers), len(orders), len(lines)],
+        'sections': layout,
+    }).encode('utf-8')
+    data_start = (PREFIX.size + len(header) + 7) & ~7
+
+    def write(tmp):
+        with open(tmp, 'wb') as f:
+            f.write(PREFIX.pack(MAGIC, len(header)))
+            f.write(header)
+            for name, data in sections.items():
+                f.seek(data_start + layout[name][0])
+                f.write(data)
+            f.truncate(data_start + offset)
+    atomic_replace(path, write)
+
+
+def read_snapshot(path, key):
+    """Return (products, customers, orders) from a snapshot made for `key`.
+
+    Returns None when there is no snapshot, it was made from other versions
+    of the source files, or it can't be read.
+    """
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, header_length = PREFIX.unpack_from(mm)
+            if magic != MAGIC:
+                return None
+            header = json.loads(mm[PREFIX.size:PREFIX.size + header_length])
+            if header['key'] != key or header['byteorder'] != sys.byteorder:
+                return None
+            data_start = (PREFIX.size + header_length + 7) & ~7
+            sections = {name: mm[data_start + offset:data_start + offset + length]
+                        for name, (offset, length) in header['sections'].items()}
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+    n_products, n_customers, n_orders, n_lines = header['counts']
+
+    def values(name, count):
+        return decode_values(sections[name + '.tags'], sections[name], count)
+
+    def numbers(name, typecode):
+        return memoryview(sections[name]).cast(typecode).tolist()
+
+    products = list(zip(values('product_id', n_products), values('product_name', n_products),
+                        numbers('product_price', 'd'), numbers('product_stock', 'q')))
+    customers = list(zip(values('customer_id', n_customers), values('customer_name', n_customers),
+                         values('customer_email', n_customers), sections['customer_premium']))
+    lines = [[] for _ in range(n_orders)]
+    for n, product_id, quantity, price in zip(numbers('line_order', 'q'), values('line_product', n_lines),
+                                               numbers('line_quantity', 'q'), numbers('line_price', 'd')):
+        lines[n].append((product_id, quantity, price))
+    orders = list(zip(values('order_id', n_orders), values('order_customer', n_orders),
+                      numbers('order_total', 'd'), values('order_date', n_orders), lines))
+    return products, customers, orders
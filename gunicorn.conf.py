@@ -0,0 +1,37 @@
+# Gunicorn settings for running the quiz app with several worker processes.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Send SIGHUP to the master process for a graceful reload: new workers are
+# started with the new code and old ones finish their in-flight requests.
+import multiprocessing
+import os
+
+bind = os.environ.get('QUIZ_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('QUIZ_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threaded workers: each teacher watching live results holds a thread for
+# up to five minutes. At most QUIZ_LIVE_STREAMS (16) streams per worker are
+# let in, the rest of the threads stay free for other requests.
+worker_class = 'gthread'
+threads = int(os.environ.get('QUIZ_THREADS', 32))
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = True
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so a slow leak can't grow forever
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Each worker opens its own SQLite connection for the shared cache and
+    # starts reading invalidation events from this point on
+    from quiz_ms.caches import shared_cache
+    shared_cache.poll(force=True)
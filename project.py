@@ -1,8 +1,46 @@
 import openpyxl 
+import argparse
+import contextlib
+import sys
 from datetime import datetime
+import itertools
 import os
+import re
+import threading
+import time
+from ecommerce.index import CatalogIndex
+from ecommerce.journal import Journal, export_workbook
+from ecommerce.pricing import PricingEngine, load_rules, save_rules
+from ecommerce.snapshot import read_snapshot, source_key, write_snapshot
+
+def iter_rows(path, width=4):
+    """Stream the data rows of a workbook's first sheet, skipping rows without an id.
+
+    Uses openpyxl's read-only mode, which parses the sheet as it is iterated
+    instead of building every cell object up front, so memory stays flat no
+    matter how large the file is.
+    """
+    if not os.path.exists(path):
+        return
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            if row and row[0]:  # Check if the id exists
+                if len(row) < width:
+                    row = tuple(row) + (None,) * (width - len(row))
+                yield row
+    finally:
+        # Read-only workbooks keep the file open until closed
+        wb.close()
+
+class OrderError(Exception):
+    pass
 
 class Product:
+    # No per-instance __dict__, large catalogs hold millions of these
+    __slots__ = ('product_id', 'name', 'price', 'stock')
+
     def __init__(self, product_id, name, price, stock):
         self.product_id = product_id
         self.name = name
@@ -10,6 +48,8 @@ class Product:
         self.stock = int(stock)
 
     def update_stock(self, quantity):
+        # Not locked, go through ECommerceSystem.update_stock while orders
+        # may be placed from other threads
         if self.stock >= quantity:
             self.stock -= quantity
             return True
@@ -24,11 +64,14 @@ class Product:
         }
 
 class Customer:
+    __slots__ = ('customer_id', 'name', 'email')
+    # Pricing tier, discounts per tier are rules in the pricing engine
+    tier = 'Regular'
+
     def __init__(self, customer_id, name, email):
         self.customer_id = customer_id
         self.name = name
         self.email = email
-        self.discount = 0
 
     def to_dict(self):
         return {
@@ -38,22 +81,26 @@ class Customer:
         }
 
 class PremiumCustomer(Customer):
-    def __init__(self, customer_id, name, email):
-        super().__init__(customer_id, name, email)
-        self.discount = 0.1  # 10% discount
+    __slots__ = ()
+    tier = 'Premium'
 
 class Order:
-    def __init__(self, order_id, customer, products, quantities):
+    def __init__(self, order_id, customer, products, quantities, unit_prices=None):
         self.order_id = order_id
         self.customer = customer
         self.products = products
         self.quantities = quantities
+        # Price paid per unit with discounts applied, from the pricing engine
+        self.unit_prices = [p.price for p in products] if unit_prices is None else unit_prices
+        # Discount on the whole order, only orders from before per-line
+        # prices have one
+        self.discount = 0
         self.total_amount = self.calculate_total()
         self.date = datetime.now()
 
     def calculate_total(self):
-        total = sum(p.price * q for p, q in zip(self.products, self.quantities))
-        return total * (1 - self.customer.discount)
+        total = sum(price * q for price, q in zip(self.unit_prices, self.quantities))
+        return total * (1 - self.discount)
 
     def to_dict(self):
         return {
@@ -65,74 +112,442 @@ class Order:
         }
 
 class ECommerceSystem:
-    def __init__(self):
+    def __init__(self, products_file='products.xlsx', customers_file=None, orders_file=None,
+                 journal_file=None, snapshot_file=None, pricing_file=None):
+        # Files not given live next to the products workbook
+        directory = os.path.dirname(products_file)
+        self.products_file = products_file
+        self.customers_file = customers_file or os.path.join(directory, 'customers.xlsx')
+        self.orders_file = orders_file or os.path.join(directory, 'orders.xlsx')
+        journal_file = journal_file or os.path.join(directory, 'ecommerce.journal')
+        pricing_file = pricing_file or os.path.join(directory, 'pricing.json')
+        # Binary copy of the XLSX contents, so unchanged workbooks aren't
+        # re-parsed. False to always parse them (and not write one)
+        self.snapshot_file = (os.path.join(directory, 'ecommerce.snapshot') if snapshot_file is None
+                              else snapshot_file)
         self.products = {}
         self.customers = {}
         self.orders = {}
+        # Changes since the last save, as (kind, id) pairs
+        self.dirty = set()
+        self.journal = Journal(journal_file)
+        # Stock is guarded by a fixed set of striped locks instead of one
+        # lock per product; `lock` guards orders, dirty and the order counter
+        self.stock_locks = [threading.Lock() for _ in range(64)]
+        self.lock = threading.Lock()
+        # Order lines as NumPy columns for the sales report, built on the
+        # first report and then kept up to date by add_order
+        self.order_book = None
         self.load_data()
+        self.pricing_file = pricing_file
+        self.pricing = PricingEngine(self.products, load_rules(pricing_file))
+        # Search indexes, built on the first search and then kept up to date
+        # by add_product and place_order
+        self.index = None
+        self.index_lock = threading.Lock()
+        self.order_numbers = itertools.count(self.next_order_number())
 
     def load_data(self):
-        if os.path.exists('products.xlsx'):
-            wb = openpyxl.load_workbook('products.xlsx')
-            ws = wb.active
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row[0]:  # Check if product_id exists
-                    self.products[row[0]] = Product(row[0], row[1], row[2], row[3])
-
-        if os.path.exists('customers.xlsx'):
-            wb = openpyxl.load_workbook('customers.xlsx')
-            ws = wb.active
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row[0]:  # Check if customer_id exists
-                    if row[3] == 'Premium':
-                        self.customers[row[0]] = PremiumCustomer(row[0], row[1], row[2])
-                    else:
-                        self.customers[row[0]] = Customer(row[0], row[1], row[2])
-
-    def save_data(self):
+        started = time.perf_counter()
+        key = source_key([self.products_file, self.customers_file, self.orders_file])
+        snapshot = read_snapshot(self.snapshot_file, key) if self.snapshot_file and any(key) else None
+        if snapshot is not None:
+            rows = self.load_snapshot(*snapshot)
+            source = 'snapshot'
+        else:
+            rows = self.load_workbooks()
+            source = 'XLSX'
+            if rows and self.snapshot_file:
+                self.save_snapshot(key)
+
+        # Changes made since the XLSX files were last written
+        for record in self.journal.replay():
+            self.apply_record(record['kind'], record['data'])
+            rows += 1
+
+        elapsed = time.perf_counter() - started
+        if rows:
+            print(f"Loaded {rows} rows from {source} in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    def load_workbooks(self):
+        rows = 0
+        for row in iter_rows(self.products_file):
+            self.products[row[0]] = Product(row[0], row[1], row[2], row[3])
+            rows += 1
+
+        for row in iter_rows(self.customers_file):
+            if row[3] == 'Premium':
+                self.customers[row[0]] = PremiumCustomer(row[0], row[1], row[2])
+            else:
+                self.customers[row[0]] = Customer(row[0], row[1], row[2])
+            rows += 1
+
+        # orders.xlsx holds one row per order line
+        order_rows = {}
+        for row in iter_rows(self.orders_file, width=7):
+            order_id, customer_id, product_id, quantity, unit_price, total_amount, date = row
+            record = order_rows.setdefault(order_id, {
+                'order_id': order_id, 'customer_id': customer_id, 'lines': [],
+                'total_amount': total_amount, 'date': date})
+            record['lines'].append([product_id, quantity, unit_price])
+            rows += 1
+        for record in order_rows.values():
+            self.apply_record('order', record)
+        return rows
+
+    def load_snapshot(self, products, customers, orders):
+        for product_id, name, price, stock in products:
+            self.products[product_id] = Product(product_id, name, price, stock)
+        for customer_id, name, email, premium in customers:
+            cls = PremiumCustomer if premium else Customer
+            self.customers[customer_id] = cls(customer_id, name, email)
+        rows = len(products) + len(customers)
+        for order_id, customer_id, total_amount, date, lines in orders:
+            self.apply_record('order', {'order_id': order_id, 'customer_id': customer_id, 'lines': lines,
+                                        'total_amount': total_amount, 'date': date})
+            rows += len(lines)
+        return rows
+
+    def save_snapshot(self, key):
+        """Write the current data as the snapshot of the XLSX files described by `key`"""
+        try:
+            write_snapshot(
+                self.snapshot_file, key,
+                [(p.product_id, p.name, p.price, p.stock) for p in self.products.values()],
+                [(c.customer_id, c.name, c.email, isinstance(c, PremiumCustomer))
+                 for c in self.customers.values()],
+                [(o.order_id, o.customer.customer_id, o.total_amount, o.date,
+                  list(zip([p.product_id for p in o.products], o.quantities, o.unit_prices)))
+                 for o in self.orders.values()])
+        except OSError as e:
+            # The snapshot only speeds up the next start, carry on without it
+            print(f"Could not write snapshot: {e}")
+
+    def apply_record(self, kind, data):
+        if kind == 'product':
+            self.products[data['product_id']] = Product(data['product_id'], data['name'],
+                                                        data['price'], data['stock'])
+        elif kind == 'customer':
+            cls = PremiumCustomer if data['type'] == 'Premium' else Customer
+            self.customers[data['customer_id']] = cls(data['customer_id'], data['name'], data['email'])
+        elif kind == 'order':
+            customer = self.customers.get(data['customer_id'])
+            products = [self.products.get(line[0]) for line in data['lines']]
+            if customer is None or None in products:
+                print(f"Skipping order {data['order_id']}: unknown customer or product")
+                return
+            # Older records don't have the price paid per line
+            unit_prices = [float(line[2]) if len(line) > 2 and line[2] is not None else product.price
+                           for line, product in zip(data['lines'], products)]
+            order = Order(data['order_id'], customer, products, [int(line[1]) for line in data['lines']],
+                          unit_prices)
+            order.total_amount = float(data['total_amount'])
+            # Older orders were discounted as a whole rather than per line
+            gross = order.calculate_total()
+            order.discount = round(1 - order.total_amount / gross, 6) if gross else 0
+            date = data['date']
+            order.date = datetime.fromisoformat(date) if isinstance(date, str) else date
+            if order.order_id in self.orders:
+                # Its old lines are in the order book, build it again
+                self.order_book = None
+            self.orders[order.order_id] = order
+
+    def next_order_number(self):
+        numbers = [int(m.group(1)) for m in (re.fullmatch(r'O(\d+)', str(order_id))
+                                             for order_id in self.orders) if m]
+        return max(numbers, default=0) + 1
+
+    def place_order(self, customer_id, lines):
+        """Reserve stock for every (product_id, quantity) line and record the order.
+
+        Either all lines are reserved or none are: stock is checked and taken
+        while holding the locks of every product in the order, and anything
+        already taken is put back if something goes wrong, up to recording
+        the order. Raises OrderError. Safe to call from many threads at once.
+        Stock only changes under the stripe locks, here, in return_stock and
+        in update_stock.
+        """
+        customer = self.customers.get(customer_id)
+        if customer is None:
+            raise OrderError("Customer not found!")
+
+        # Merge repeated products so each is reserved once
+        quantities = {}
+        for product_id, quantity in lines:
+            if product_id not in self.products:
+                raise OrderError(f"Product not found: {product_id}")
+            if quantity <= 0:
+                raise OrderError(f"Invalid quantity for {product_id}")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        if not quantities:
+            raise OrderError("Order has no products")
+        products = [self.products[product_id] for product_id in quantities]
+        # Priced before any stock is taken, so a pricing error takes nothing
+        unit_prices = self.pricing.prices(customer.tier, list(quantities))
+
+        stripes = self.stock_stripes(quantities)
+        for stripe in stripes:
+            self.stock_locks[stripe].acquire()
+        reserved = []
+        try:
+            for product in products:
+                if product.stock < quantities[product.product_id]:
+                    raise OrderError(f"Insufficient stock for {product.product_id}!")
+            for product in products:
+                product.stock -= quantities[product.product_id]
+                reserved.append(product)
+        except BaseException:
+            for product in reserved:
+                product.stock += quantities[product.product_id]
+            raise
+        finally:
+            for stripe in stripes:
+                self.stock_locks[stripe].release()
+
+        try:
+            with self.lock:
+                order_id = f"O{next(self.order_numbers):03d}"
+            order = Order(order_id, customer, products, list(quantities.values()), unit_prices)
+            self.add_order(order)
+        except BaseException:
+            self.return_stock(products, quantities)
+            raise
+
+        with self.index_lock:
+            if self.index is not None:
+                for product in products:
+                    self.index.update_stock(product)
+        return order
+
+    def stock_stripes(self, product_ids):
+        # Always lock stripes in index order so two orders can't deadlock
+        return sorted({hash(product_id) % len(self.stock_locks) for product_id in product_ids})
+
+    def update_stock(self, product_id, quantity):
+        """Take quantity (negative to add) from a product's stock under its
+        stripe lock. Returns False, changing nothing, if there isn't enough."""
+        product = self.products[product_id]
+        stripe = self.stock_stripes([product_id])[0]
+        with self.stock_locks[stripe]:
+            if not product.update_stock(quantity):
+                return False
+        with self.index_lock:
+            if self.index is not None:
+                self.index.update_stock(product)
+        self.mark_dirty('product', product_id)
+        return True
+
+    def return_stock(self, products, quantities):
+        """Put back stock taken by an order that couldn't be recorded"""
+        stripes = self.stock_stripes(quantities)
+        for stripe in stripes:
+            self.stock_locks[stripe].acquire()
+        try:
+            for product in products:
+                product.stock += quantities[product.product_id]
+        finally:
+            for stripe in stripes:
+                self.stock_locks[stripe].release()
+
+    def add_product(self, product):
+        self.products[product.product_id] = product
+        self.pricing.product_changed(product)
+        with self.index_lock:
+            if self.index is not None:
+                self.index.update(product)
+        self.mark_dirty('product', product.product_id)
+
+    def add_products(self, products):
+        """Add or replace many products at once"""
+        with self.lock:
+            for product in products:
+                self.products[product.product_id] = product
+                self.dirty.add(('product', product.product_id))
+        self.pricing.invalidate()
+        with self.index_lock:
+            if self.index is not None:
+                if len(products) > len(self.index) // 4:
+                    # Cheaper to rebuild on the next search than to update row by row
+                    self.index = None
+                else:
+                    for product in products:
+                        self.index.update(product)
+
+    def search_products(self, text=None, min_price=None, max_price=None, in_stock=False, limit=20):
+        """Find products by name substring, price range and availability"""
+        with self.index_lock:
+            if self.index is None:
+                self.index = CatalogIndex.build(self.products.values())
+            return self.index.search(text, min_price, max_price, in_stock, limit)
+
+    def set_pricing_rules(self, rules):
+        """Replace the discount rules and save them to the pricing file"""
+        self.pricing.set_rules(rules)
+        save_rules(self.pricing_file, rules)
+
+    def quote(self, carts):
+        """Current totals for many (customer_id, [(product_id, quantity), ...]) carts"""
+        return self.pricing.reprice([(self.customers[customer_id].tier, lines) for customer_id, lines in carts])
+
+    def add_customer(self, customer):
+        self.customers[customer.customer_id] = customer
+        self.mark_dirty('customer', customer.customer_id)
+
+    def add_customers(self, customers):
+        with self.lock:
+            for customer in customers:
+                self.customers[customer.customer_id] = customer
+                self.dirty.add(('customer', customer.customer_id))
+
+    def add_order(self, order):
+        with self.lock:
+            if order.order_id in self.orders:
+                self.order_book = None
+            self.orders[order.order_id] = order
+            if self.order_book is not None:
+                self.order_book.add(order)
+            self.dirty.add(('order', order.order_id))
+            for product in order.products:
+                self.dirty.add(('product', product.product_id))
+
+    def mark_dirty(self, kind, key):
+        with self.lock:
+            self.dirty.add((kind, key))
+
+    def record(self, kind, key):
+        if kind == 'product':
+            data = self.products[key].to_dict()
+        elif kind == 'customer':
+            customer = self.customers[key]
+            data = customer.to_dict()
+            data['type'] = 'Premium' if isinstance(customer, PremiumCustomer) else 'Regular'
+        else:
+            order = self.orders[key]
+            data = {
+                'order_id': order.order_id,
+                'customer_id': order.customer.customer_id,
+                'lines': [[p.product_id, q, price]
+                          for p, q, price in zip(order.products, order.quantities, order.unit_prices)],
+                'total_amount': order.total_amount,
+                'date': order.date.isoformat()
+            }
+        return {'kind': kind, 'data': data}
+
+    def save_data(self, compact_ratio=1.0, min_compact=1000):
+        """Append the changed objects to the journal, O(changes).
+
+        Once the journal grows past `compact_ratio` times the number of live
+        objects (and at least `min_compact` entries), it is folded back into
+        the XLSX files.
+        """
         try:
-            # Save products
-            print("Saving products...")
-            print(f"Current products in memory: {len(self.products)}")
-            print(f"Current working directory: {os.getcwd()}")
-            
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.append(['Product ID', 'Name', 'Price', 'Stock'])
-            for product in self.products.values():
-                print(f"Saving product: {product.product_id}")
-                ws.append([product.product_id, product.name, product.price, product.stock])
-            
-            file_path = os.path.join(os.getcwd(), 'products.xlsx')
-            print(f"Attempting to save to: {file_path}")
-            wb.save(file_path)
-            print("Products saved successfully!")
-
-            # Save customers
-            print("Saving customers...")
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.append(['Customer ID', 'Name', 'Email', 'Type'])
-            for customer in self.customers.values():
-                customer_type = 'Premium' if isinstance(customer, PremiumCustomer) else 'Regular'
-                ws.append([customer.customer_id, customer.name, customer.email, customer_type])
-            wb.save('customers.xlsx')
-            print("Customers saved successfully!")
+            # Customers and products before the orders that refer to them
+            order = {'customer': 0, 'product': 1, 'order': 2}
+            with self.lock:
+                dirty, self.dirty = self.dirty, set()
+            try:
+                records = [self.record(kind, key)
+                           for kind, key in sorted(dirty, key=lambda d: order[d[0]])]
+                self.journal.append(records)
+            except BaseException:
+                # Not saved, keep the changes for the next save
+                with self.lock:
+                    self.dirty |= dirty
+                raise
+            print(f"Saved {len(records)} changes")
+
+            live = len(self.products) + len(self.customers) + len(self.orders)
+            if self.journal.entries > max(min_compact, live * compact_ratio):
+                self.export_data()
         except Exception as e:
             print(f"Error saving data: {str(e)}")
             import traceback
             traceback.print_exc()
 
-def main():
-    system = ECommerceSystem()
-    
+    def sales_summary(self, top=10):
+        """The sales report figures, see OrderBook.summary"""
+        # NumPy is only needed for reporting
+        from ecommerce.analytics import OrderBook
+        with self.lock:
+            if self.order_book is None:
+                self.order_book = OrderBook.from_orders(self.orders.values())
+            return self.order_book.summary(top)
+
+    def sales_report(self, top=10):
+        from ecommerce.analytics import print_report
+        print_report(self.sales_summary(top))
+
+    def export_data(self):
+        """Write full XLSX copies of the data and start a fresh journal"""
+        started = time.perf_counter()
+        export_workbook(self.products_file, ['Product ID', 'Name', 'Price', 'Stock'],
+                        ([p.product_id, p.name, p.price, p.stock] for p in self.products.values()))
+        export_workbook(self.customers_file, ['Customer ID', 'Name', 'Email', 'Type'],
+                        ([c.customer_id, c.name, c.email,
+                          'Premium' if isinstance(c, PremiumCustomer) else 'Regular']
+                         for c in self.customers.values()))
+        export_workbook(self.orders_file,
+                        ['Order ID', 'Customer ID', 'Product ID', 'Quantity', 'Unit Price', 'Total', 'Date'],
+                        ([o.order_id, o.customer.customer_id, p.product_id, q, price, o.total_amount, o.date]
+                         for o in self.orders.values()
+                         for p, q, price in zip(o.products, o.quantities, o.unit_prices)))
+        # Every journaled change is now in the XLSX files
+        self.journal.reset()
+        self.save_snapshot(source_key([self.products_file, self.customers_file, self.orders_file]))
+        print(f"Exported data in {time.perf_counter() - started:.2f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E-Commerce System")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="apply commands from a JSON-lines or CSV orders file ('-' for stdin) "
+                             "instead of showing the menu")
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help="batch file format (default: from the file extension, jsonl for stdin)")
+    parser.add_argument('--save-every', type=int, default=10000, metavar='N',
+                        help="save changes every N batch commands")
+    parser.add_argument('--ingest', nargs='+', metavar='XLSX',
+                        help="merge product/customer workbooks, parsed in parallel")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="worker processes for --ingest (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    if args.ingest:
+        from ecommerce.ingest import ingest
+        system = ECommerceSystem()
+        summary = ingest(system, args.ingest, args.workers)
+        for path, error in summary['errors']:
+            print(f"Skipped {path}: {error}")
+        print(f"Ingested {summary['rows']} rows from {summary['files']} files "
+              f"({summary['products']} products, {summary['customers']} customers, "
+              f"{summary['conflicts']} overridden) in {summary['seconds']:.2f}s")
+        system.save_data()
+        return
+
+    if args.batch:
+        from ecommerce.batch import run_batch
+        fmt = args.format or ('csv' if args.batch.lower().endswith('.csv') else 'jsonl')
+        # Keep stdout for the streamed results
+        with contextlib.redirect_stdout(sys.stderr):
+            system = ECommerceSystem()
+        if args.batch == '-':
+            run_batch(system, sys.stdin, fmt, save_every=args.save_every)
+        else:
+            with open(args.batch, newline='', encoding='utf-8') as stream:
+                run_batch(system, stream, fmt, save_every=args.save_every)
+        return
+
+    interactive(ECommerceSystem())
+
+def interactive(system):
     while True:
         print("\nWelcome to the E-Commerce System!")
         print("1. Add a new product")
         print("2. Register a new customer")
         print("3. Place an order")
         print("4. View order details")
-        print("5. Exit")
+        print("5. Sales report")
+        print("6. Search products")
+        print("7. Exit")
         
         choice = input("Choose an option: ")
 
@@ -141,7 +556,7 @@ def main():
             name = input("Enter Product Name: ")
             price = float(input("Enter Product Price: "))
             stock = int(input("Enter Product Stock: "))
-            system.products[product_id] = Product(product_id, name, price, stock)
+            system.add_product(Product(product_id, name, price, stock))
             print("Product added successfully!")
 
         elif choice == '2':
@@ -150,9 +565,9 @@ def main():
             email = input("Enter Customer Email: ")
             is_premium = input("Is this a premium customer? (y/n): ").lower() == 'y'
             if is_premium:
-                system.customers[customer_id] = PremiumCustomer(customer_id, name, email)
+                system.add_customer(PremiumCustomer(customer_id, name, email))
             else:
-                system.customers[customer_id] = Customer(customer_id, name, email)
+                system.add_customer(Customer(customer_id, name, email))
             print("Customer registered successfully!")
 
         elif choice == '3':
@@ -161,27 +576,27 @@ def main():
                 print("Customer not found!")
                 continue
 
-            products = []
-            quantities = []
+            lines = []
             while True:
                 product_id = input("Enter Product ID (or 'done' to finish): ")
                 if product_id.lower() == 'done':
                     break
                 if product_id not in system.products:
                     print("Product not found!")
+                    matches = system.search_products(product_id, limit=5)
+                    if matches:
+                        print("Did you mean: " + ", ".join(f"{p.product_id} ({p.name})" for p in matches))
                     continue
                 quantity = int(input("Enter Quantity: "))
-                if not system.products[product_id].update_stock(quantity):
-                    print("Insufficient stock!")
-                    continue
-                products.append(system.products[product_id])
-                quantities.append(quantity)
+                lines.append((product_id, quantity))
 
-            if products:
-                order_id = f"O{len(system.orders) + 1:03d}"
-                order = Order(order_id, system.customers[customer_id], products, quantities)
-                system.orders[order_id] = order
-                print("Order placed successfully!")
+            # Stock is only taken once the whole order is confirmed
+            if lines:
+                try:
+                    system.place_order(customer_id, lines)
+                    print("Order placed successfully!")
+                except OrderError as e:
+                    print(e)
 
         elif choice == '4':
             if not system.orders:
@@ -195,6 +610,26 @@ def main():
                 print(f"Total Amount: ${order.total_amount:.2f}")
 
         elif choice == '5':
+            if not system.orders:
+                print("No orders to report!")
+                continue
+            system.sales_report()
+
+        elif choice == '6':
+            text = input("Name contains (blank for any): ").strip()
+            min_price = input("Minimum price (blank for none): ").strip()
+            max_price = input("Maximum price (blank for none): ").strip()
+            in_stock = input("Only in-stock products? (y/n): ").lower() == 'y'
+            matches = system.search_products(text or None,
+                                             float(min_price) if min_price else None,
+                                             float(max_price) if max_price else None,
+                                             in_stock)
+            if not matches:
+                print("No matching products!")
+            for product in matches:
+                print(f"{product.product_id}: {product.name} - ${product.price:.2f} ({product.stock} in stock)")
+
+        elif choice == '7':
             print("Saving data before exit...")
             system.save_data()
             print("Save completed. Exiting... Goodbye!")
@@ -0,0 +1,48 @@
+import time
+
+_import_started = time.perf_counter()
+
+from flask import Flask
+
+import_time = time.perf_counter() - _import_started
+
+def create_app(preload=False):
+    """Build the Flask app.
+
+    Blueprints are imported here rather than at module level, and the DB
+    pool and shared cache open on first use. With `preload=True` (the
+    gunicorn master) templates are compiled up front so forked workers
+    start warm.
+    """
+    started = time.perf_counter()
+    timings = {'import': import_time}
+    
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'your_secret_key'
+    
+    step = time.perf_counter()
+    from . import admin, auth, caches, db, provisioning, question_bank, rollups, roster, student, teacher
+    app.register_blueprint(auth.bp)
+    app.register_blueprint(admin.bp)
+    app.register_blueprint(teacher.bp)
+    app.register_blueprint(student.bp)
+    caches.init_app(app)
+    app.cli.add_command(db.init_db_command)
+    app.cli.add_command(rollups.rebuild_stats_command)
+    app.cli.add_command(question_bank.migrate_question_bank_command)
+    app.cli.add_command(roster.sync_roster_command)
+    app.cli.add_command(provisioning.provision_users_command)
+    timings['blueprints'] = time.perf_counter() - step
+    
+    if preload:
+        step = time.perf_counter()
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
+        timings['templates'] = time.perf_counter() - step
+    
+    timings['create_app'] = time.perf_counter() - started
+    app.config['STARTUP_TIMINGS'] = timings
+    app.logger.info('Startup timings: %s',
+                    ', '.join(f'{name}={seconds * 1000:.1f}ms' for name, seconds in timings.items()))
+    
+    return app
@@ -0,0 +1,458 @@
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, session, jsonify
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from .auth import login_required, role_required
+from .caches import (get_search_index, invalidate_gradebook, invalidate_quiz, invalidate_quiz_stats,
+                     publish_result, update_search, user_document)
+from .db import get_db_connection
+from .provisioning import finish_provisioning, provision_users as run_provisioning
+from .question_bank import fetch_questions
+from .rollups import refresh, summarize
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/admin/dashboard')
+@login_required
+@role_required(['admin'])
+def admin_dashboard():
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    # Fetch users
+    cur.execute("SELECT * FROM users ORDER BY created_at DESC")
+    users = cur.fetchall()
+    
+    # Fetch quizzes with teacher names and their precomputed score stats
+    cur.execute("""
+        SELECT q.*, u.fullname as teacher_name,
+               s.attempts, s.score_sum, s.score_sumsq, s.score_min, s.score_max
+        FROM quizzes q 
+        JOIN users u ON q.teacher_id = u.id 
+        LEFT JOIN quiz_stats s ON s.quiz_id = q.id
+        ORDER BY q.created_at DESC
+    """)
+    quizzes = [summarize(quiz) for quiz in cur.fetchall()]
+    
+    cur.execute("""
+        SELECT s.*, u.fullname as teacher_name
+        FROM teacher_stats s
+        JOIN users u ON s.teacher_id = u.id
+        ORDER BY s.attempts DESC
+    """)
+    teacher_stats = [summarize(row) for row in cur.fetchall()]
+    
+    cur.execute("""
+        SELECT * FROM daily_stats
+        ORDER BY day DESC
+        LIMIT 30
+    """)
+    daily_stats = [summarize(row) for row in cur.fetchall()]
+    
+    cur.close()
+    conn.close()
+    
+    return render_template('admin_dashboard.html', 
+                         users=users, 
+                         quizzes=quizzes, 
+                         teacher_stats=teacher_stats,
+                         daily_stats=daily_stats)
+
+@bp.route('/admin/search')
+@login_required
+@role_required(['admin'])
+def search():
+    """Ranked search over quizzes, their questions and users, as JSON"""
+    per_page = 20
+    page = max(request.args.get('page', 1, type=int), 1)
+    kinds = [kind for kind in request.args.getlist('kind') if kind in ('quiz', 'user')] or None
+    
+    results, total = get_search_index().search(request.args.get('q', ''), kinds=kinds,
+                                               page=page, per_page=per_page)
+    return jsonify({'success': True, 'results': results, 'total': total,
+                    'page': page, 'pages': max(1, -(-total // per_page))})
+
+@bp.route('/admin/provision_users', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def provision_users():
+    """Create the accounts in an uploaded CSV / XLSX of fullname, email,
+    password and role, as JSON. Uploading the same file again after a
+    failure carries on where it stopped."""
+    users = request.files.get('users')
+    if not users or not users.filename:
+        return jsonify({'success': False, 'message': 'Choose a CSV or XLSX file of users'}), 400
+    
+    directory = os.path.join(current_app.instance_path, 'provisioning')
+    os.makedirs(directory, exist_ok=True)
+    suffix = '.xlsx' if users.filename.lower().endswith('.xlsx') else '.csv'
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    report = {}
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            users.save(f)
+        # One thread hashes the next batch while this one waits on the inserts
+        with ThreadPoolExecutor(1) as executor:
+            run_provisioning(path, directory, executor=executor, report=report)
+    except Exception as e:
+        print(e)
+        return jsonify({'success': False, 'message': 'Error creating users, upload the file again to continue',
+                        **report}), 500
+    finally:
+        os.remove(path)
+        # Accounts from batches committed before a failure are real too
+        finish_provisioning(report)
+    
+    return jsonify({'success': True, **report})
+
+@bp.route('/get_quiz_details/<int:quiz_id>')
+@login_required
+@role_required(['admin'])
+def get_quiz_details(quiz_id):
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    # Fetch quiz details
+    cur.execute("""
+        SELECT q.*, u.fullname as teacher_name 
+        FROM quizzes q 
+        JOIN users u ON q.teacher_id = u.id 
+        WHERE q.id = %s
+    """, (quiz_id,))
+    quiz = cur.fetchone()
+    
+    # Fetch questions with their options
+    quiz['questions'] = fetch_questions(cur, quiz_id)
+    
+    cur.close()
+    conn.close()
+    
+    return jsonify(quiz)
+
+@bp.route('/toggle_quiz_status/<int:quiz_id>', methods=['POST'])
+@login_required
+@role_required(['admin'])
+def toggle_quiz_status(quiz_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("SELECT code FROM quizzes WHERE id = %s", (quiz_id,))
+        row = cur.fetchone()
+        
+        # Toggle the is_active status
+        cur.execute("""
+            UPDATE quizzes 
+            SET is_active = NOT is_active 
+            WHERE id = %s
+        """, (quiz_id,))
+        conn.commit()
+        invalidate_quiz(quiz_id, row[0] if row else None)
+        success = True
+    except Exception as e:
+        print(e)
+        conn.rollback()
+        success = False
+    finally:
+        cur.close()
+        conn.close()
+    
+    return jsonify({'success': success})
+
+@bp.route('/delete_quiz/<int:quiz_id>')
+@login_required
+@role_required(['admin'])
+def delete_quiz(quiz_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("SELECT code, teacher_id FROM quizzes WHERE id = %s", (quiz_id,))
+        row = cur.fetchone()
+        
+        # Delete related records first
+        cur.execute("DELETE FROM marks WHERE quiz_id = %s", (quiz_id,))
+        cur.execute("DELETE FROM attempt_answers WHERE quiz_id = %s", (quiz_id,))
+        cur.execute("DELETE FROM options WHERE question_id IN (SELECT id FROM questions WHERE quiz_id = %s)", (quiz_id,))
+        cur.execute("DELETE FROM questions WHERE quiz_id = %s", (quiz_id,))
+        cur.execute("DELETE FROM quiz_questions WHERE quiz_id = %s", (quiz_id,))
+        cur.execute("DELETE FROM quiz_settings WHERE quiz_id = %s", (quiz_id,))
+        cur.execute("DELETE FROM quizzes WHERE id = %s", (quiz_id,))
+        refresh(cur, quiz_ids=[quiz_id], teacher_ids=[row[1]] if row else [])
+        
+        conn.commit()
+        invalidate_quiz(quiz_id, row[0] if row else None)
+        if row:
+            invalidate_gradebook(row[1])
+        update_search('quiz', quiz_id)
+        flash('Quiz deleted successfully', 'success')
+    except Exception as e:
+        print(e)
+        conn.rollback()
+        flash('Error deleting quiz', 'error')
+    finally:
+        cur.close()
+        conn.close()
+    
+    return redirect(url_for('admin.admin_dashboard'))
+
+@bp.route('/promote_to_admin/<int:user_id>', methods=['POST'])
+@login_required
+def promote_to_admin(user_id):
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'})
+    
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor(dictionary=True)  # Use dictionary cursor
+
+        # Check if current user is admin
+        cur.execute("SELECT role FROM users WHERE id = %s", (session['user_id'],))
+        current_user = cur.fetchone()
+        if not current_user or current_user['role'] != 'admin':
+            return jsonify({'success': False, 'message': 'Unauthorized access'})
+
+        # Check if target user exists and is not already an admin
+        cur.execute("SELECT id, fullname, email, role FROM users WHERE id = %s", (user_id,))
+        user = cur.fetchone()
+        
+        if not user:
+            return jsonify({'success': False, 'message': 'User not found'})
+        
+        if user['role'] == 'admin':
+            return jsonify({'success': False, 'message': 'User is already an admin'})
+        
+        # Promote user to admin
+        cur.execute("UPDATE users SET role = 'admin' WHERE id = %s", (user_id,))
+        conn.commit()
+        update_search('user', user_id, user_document(dict(user, role='admin')))
+        
+        return jsonify({'success': True, 'message': 'User successfully promoted to admin'})
+
+    except Exception as e:
+        print(f"Error promoting user to admin: {e}")  # Log the error
+        if conn:
+            conn.rollback()
+        return jsonify({'success': False, 'message': 'Server error occurred'})
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+@bp.route('/remove_user/<int:user_id>', methods=['POST'])
+@login_required
+def remove_user(user_id):
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in'})
+    
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor(dictionary=True)  # Use dictionary cursor
+
+        # Check if current user is admin
+        cur.execute("SELECT role FROM users WHERE id = %s", (session['user_id'],))
+        current_user = cur.fetchone()
+        if not current_user or current_user['role'] != 'admin':
+            return jsonify({'success': False, 'message': 'Unauthorized access'})
+
+        # Don't allow admin to remove themselves
+        if user_id == session['user_id']:
+            return jsonify({'success': False, 'message': 'Cannot remove your own account'})
+
+        # Check if user exists
+        cur.execute("SELECT role FROM users WHERE id = %s", (user_id,))
+        user = cur.fetchone()
+        if not user:
+            return jsonify({'success': False, 'message': 'User not found'})
+
+        # Begin transaction
+        cur.execute("BEGIN")
+        
+        # Quizzes and teachers whose statistics include this user's attempts
+        cur.execute("""
+            SELECT DISTINCT m.quiz_id, q.teacher_id
+            FROM marks m
+            JOIN quizzes q ON m.quiz_id = q.id
+            WHERE m.student_id = %s
+        """, (user_id,))
+        attempted = cur.fetchall()
+        attempted_quizzes = [row['quiz_id'] for row in attempted]
+        affected_teachers = {row['teacher_id'] for row in attempted}
+        
+        # Teachers whose gradebooks list this user
+        cur.execute("SELECT teacher_id FROM enrollments WHERE student_id = %s", (user_id,))
+        enrolled_with = [row['teacher_id'] for row in cur.fetchall()]
+        
+        # First remove marks
+        cur.execute("DELETE FROM marks WHERE student_id = %s", (user_id,))
+        cur.execute("DELETE FROM attempt_answers WHERE student_id = %s", (user_id,))
+        
+        # Remove enrollments
+        cur.execute("DELETE FROM enrollments WHERE student_id = %s", (user_id,))
+        
+        # If user is a teacher, handle their quizzes
+        if user['role'] == 'teacher':
+            # Get all quiz IDs created by this teacher
+            cur.execute("SELECT id, code FROM quizzes WHERE teacher_id = %s", (user_id,))
+            removed_quizzes = cur.fetchall()
+            quiz_ids = [row['id'] for row in removed_quizzes]
+            
+            if quiz_ids:
+                # Remove all options for questions in these quizzes
+                cur.execute("""
+                    DELETE FROM options 
+                    WHERE question_id IN (
+                        SELECT id FROM questions 
+                        WHERE quiz_id IN %s
+                    )
+                """, (tuple(quiz_ids),))
+                
+                # Remove all questions for these quizzes
+                cur.execute("DELETE FROM questions WHERE quiz_id IN %s", (tuple(quiz_ids),))
+                cur.execute("DELETE FROM quiz_questions WHERE quiz_id IN %s", (tuple(quiz_ids),))
+                cur.execute("DELETE FROM quiz_settings WHERE quiz_id IN %s", (tuple(quiz_ids),))
+                
+                # Remove marks for these quizzes
+                cur.execute("DELETE FROM marks WHERE quiz_id IN %s", (tuple(quiz_ids),))
+                cur.execute("DELETE FROM attempt_answers WHERE quiz_id IN %s", (tuple(quiz_ids),))
+                
+                # Finally remove the quizzes
+                cur.execute("DELETE FROM quizzes WHERE id IN %s", (tuple(quiz_ids),))
+
+        # Finally remove the user
+        cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        
+        # Recompute the statistics that included the removed rows
+        if user['role'] == 'teacher':
+            attempted_quizzes += quiz_ids
+            affected_teachers.add(user_id)
+        refresh(cur, quiz_ids=attempted_quizzes, teacher_ids=list(affected_teachers))
+        
+        # Commit transaction
+        conn.commit()
+        
+        if user['role'] == 'teacher':
+            for quiz in removed_quizzes:
+                invalidate_quiz(quiz['id'], quiz['code'])
+                update_search('quiz', quiz['id'])
+        update_search('user', user_id)
+        for quiz_id in attempted_quizzes:
+            invalidate_quiz_stats(quiz_id)
+            publish_result(quiz_id, user_id)
+        for teacher_id in affected_teachers.union(enrolled_with):
+            invalidate_gradebook(teacher_id)
+        
+        return jsonify({'success': True})
+
+    except Exception as e:
+        print(f"Error removing user: {e}")  # Log the error
+        if conn:
+            conn.rollback()  # Rollback on error
+        return jsonify({'success': False, 'message': str(e)})
+
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+@bp.route('/get_user_details/<int:user_id>')
+@login_required
+@role_required(['admin'])
+def get_user_details(user_id):
+    try:
+        print(f"Fetching details for user ID: {user_id}")
+        conn = get_db_connection()
+        cur = conn.cursor(dictionary=True)
+        
+        # Get basic user info - removed subject as it's not in users table
+        cur.execute("""
+            SELECT id, fullname, email, role, created_at, is_active 
+            FROM users 
+            WHERE id = %s
+        """, (user_id,))
+        user = cur.fetchone()
+        
+        if not user:
+            print(f"User not found with ID: {user_id}")
+            return jsonify({'error': 'User not found'})
+            
+        print(f"User data fetched: {user}")
+        user['created_at'] = user['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+        
+        if user['role'] == 'student':
+            # Get enrolled teachers - removed subject
+            cur.execute("""
+                SELECT users.fullname, enrollments.created_at as enrollment_date
+                FROM enrollments 
+                JOIN users ON enrollments.teacher_id = users.id
+                WHERE enrollments.student_id = %s
+                ORDER BY enrollments.created_at DESC
+            """, (user_id,))
+            user['enrolled_teachers'] = cur.fetchall()
+            
+            # Format enrollment dates
+            for teacher in user['enrolled_teachers']:
+                if teacher.get('enrollment_date'):
+                    teacher['enrollment_date'] = teacher['enrollment_date'].strftime('%Y-%m-%d %H:%M:%S')
+            
+            # Get quiz attempts
+            cur.execute("""
+                SELECT quizzes.title as quiz_title, marks.marks_obtained, marks.total_marks, 
+                       marks.attempt_date
+                FROM marks 
+                JOIN quizzes ON marks.quiz_id = quizzes.id
+                WHERE marks.student_id = %s
+                ORDER BY marks.attempt_date DESC
+            """, (user_id,))
+            user['quiz_attempts'] = cur.fetchall()
+            
+            # Format attempt dates
+            for attempt in user['quiz_attempts']:
+                if attempt.get('attempt_date'):
+                    attempt['attempt_date'] = attempt['attempt_date'].strftime('%Y-%m-%d %H:%M:%S')
+            
+        elif user['role'] == 'teacher':
+            # Get created quizzes
+            cur.execute("""
+                SELECT title, subject, created_at, is_active
+                FROM quizzes
+                WHERE teacher_id = %s
+                ORDER BY created_at DESC
+            """, (user_id,))
+            user['created_quizzes'] = cur.fetchall()
+            
+            # Get enrolled students
+            cur.execute("""
+                SELECT users.fullname, users.email, enrollments.created_at as enrollment_date
+                FROM enrollments
+                JOIN users ON enrollments.student_id = users.id
+                WHERE enrollments.teacher_id = %s
+                ORDER BY enrollments.created_at DESC
+            """, (user_id,))
+            user['enrolled_students'] = cur.fetchall()
+            
+            # Format dates
+            for quiz in user['created_quizzes']:
+                if quiz.get('created_at'):
+                    quiz['created_at'] = quiz['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+            
+            for student in user['enrolled_students']:
+                if student.get('enrollment_date'):
+                    student['enrollment_date'] = student['enrollment_date'].strftime('%Y-%m-%d %H:%M:%S')
+        
+        return jsonify(user)
+        
+    except Exception as e:
+        print(f"Error getting user details: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': 'Server error occurred'})
+        
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
@@ -0,0 +1,142 @@
+import numpy as np
+
+# Byte stored for a question the student left blank
+UNANSWERED = 255
+# Byte stored for a question that wasn't in the student's draw from the pool
+NOT_DRAWN = 254
+
+
+def encode_answers(questions, form, drawn=None):
+    """Pack a submission into one byte per question, in quiz question order.
+
+    Each byte is the position of the chosen option within its question,
+    UNANSWERED, or NOT_DRAWN for questions outside `drawn` (the positions
+    the attempt got, None for all). Positions rather than option ids keep
+    every attempt the same small size, a 20 question quiz is 20 bytes.
+    """
+    drawn = None if drawn is None else set(drawn)
+    answers = bytearray()
+    for position, question in enumerate(questions):
+        if drawn is not None and position not in drawn:
+            answers.append(NOT_DRAWN)
+            continue
+        selected = form.get(f"question_{question['id']}")
+        index = next((i for i, option in enumerate(question['options']) if str(option['id']) == selected),
+                     UNANSWERED)
+        answers.append(index)
+    return bytes(answers)
+
+
+def question_stats(answers, scores, key, total_marks, n_options):
+    """Item statistics for a quiz, computed over every attempt at once.
+
+    answers is an (attempts, questions) uint8 array of encode_answers rows,
+    scores the marks each attempt got, key the option position of each
+    question's correct answer and total_marks the most an attempt can score.
+    Each question is measured over the attempts that drew it.
+    Returns a dict of NumPy arrays:
+
+    - drawn: attempts that got each question
+    - p_values: share of those answering each question correctly
+    - discrimination: point-biserial correlation of getting each question
+      right with the attempt's total score
+    - option_counts: (questions, n_options + 1) times each option was
+      chosen, the last column counting blanks
+    - histogram / bin_edges: distribution of scores
+    """
+    attempts, n_questions = answers.shape
+    scores = np.asarray(scores, dtype=np.float64)
+    drawn = answers != NOT_DRAWN
+    correct = answers == np.asarray(key, dtype=np.uint8)[None, :]
+
+    counts = drawn.sum(axis=0)
+    right = correct.sum(axis=0)
+    wrong = counts - right
+
+    # r_pb = (M1 - M0) / s * sqrt(p * q), with M1 / M0 the mean score of the
+    # attempts that got the question right / wrong and s the score std, all
+    # over the attempts that drew the question
+    drawn_sum = scores @ drawn
+    drawn_sumsq = (scores * scores) @ drawn
+    right_sum = scores @ correct
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_values = right / counts
+        std = np.sqrt(np.maximum(drawn_sumsq / counts - (drawn_sum / counts) ** 2, 0))
+        mean_right = right_sum / right
+        mean_wrong = (drawn_sum - right_sum) / wrong
+        discrimination = (mean_right - mean_wrong) / std * np.sqrt(p_values * (1 - p_values))
+    p_values = np.where(counts > 0, p_values, 0.0)
+    discrimination = np.where(np.isfinite(discrimination), discrimination, 0.0)
+
+    # One bincount over all cells, each question gets its own run of slots:
+    # one per option, then blanks, then a slot for "not drawn" that is dropped
+    choices = np.where(drawn, np.minimum(answers, n_options), n_options + 1).astype(np.int64)
+    choices += np.arange(n_questions, dtype=np.int64)[None, :] * (n_options + 2)
+    option_counts = np.bincount(choices.ravel(), minlength=n_questions * (n_options + 2))
+    option_counts = option_counts.reshape(n_questions, n_options + 2)[:, :-1]
+
+    score_sum = scores.sum()
+    total_marks = float(total_marks)
+    bins = int(total_marks) if 0 < total_marks <= 50 and float(total_marks).is_integer() else 20
+    histogram, bin_edges = np.histogram(scores, bins=bins, range=(0, max(total_marks, 1)))
+
+    return {
+        'attempts': attempts,
+        'mean': float(score_sum / attempts) if attempts else 0.0,
+        'std': float(scores.std()) if attempts else 0.0,
+        'drawn': counts,
+        'p_values': p_values,
+        'discrimination': discrimination,
+        'option_counts': option_counts,
+        'histogram': histogram,
+        'bin_edges': bin_edges,
+    }
+
+
+class QuizStats:
+    """question_stats for one quiz, laid out for templates and JSON"""
+
+    def __init__(self, content, rows):
+        questions = content.questions
+        n_options = max((len(question['options']) for question in questions), default=0)
+        # Attempts recorded before the quiz's questions changed can't be lined up
+        rows = [(answers, score) for answers, score in rows if len(answers) == len(questions)]
+        answers = np.frombuffer(b''.join(answers for answers, _ in rows), dtype=np.uint8)
+        answers = answers.reshape(len(rows), len(questions))
+        key = [next((i for i, option in enumerate(question['options'])
+                     if option['id'] == content.answer_key[question['id']][0]), UNANSWERED)
+               for question in questions]
+        # The most an attempt can score: every question, or the best draw
+        marks = sorted((content.answer_key[question['id']][1] for question in questions), reverse=True)
+        total_marks = sum(marks[:content.draw_count or len(marks)])
+        stats = question_stats(answers, [score for _, score in rows], key, total_marks, n_options)
+
+        self.attempts = stats['attempts']
+        self.mean = stats['mean']
+        self.std = stats['std']
+        self.histogram = [{'from': float(low), 'to': float(high), 'count': int(count)}
+                          for low, high, count in zip(stats['bin_edges'], stats['bin_edges'][1:],
+                                                      stats['histogram'])]
+        self.questions = []
+        for n, question in enumerate(questions):
+            counts = stats['option_counts'][n]
+            self.questions.append({
+                'id': question['id'],
+                'number': n + 1,
+                'text': question['question_text'],
+                'drawn': int(stats['drawn'][n]),
+                'p_value': float(stats['p_values'][n]),
+                'discrimination': float(stats['discrimination'][n]),
+                'options': [{'text': option['text'], 'count': int(counts[i]), 'correct': i == key[n]}
+                            for i, option in enumerate(question['options'])],
+                'unanswered': int(counts[-1]),
+            })
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'mean': self.mean,
+            'std': self.std,
+            'histogram': self.histogram,
+            'questions': self.questions,
+        }
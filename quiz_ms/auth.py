@@ -0,0 +1,132 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from functools import wraps
+import hashlib
+from .caches import update_search, user_document
+from .db import get_db_connection
+
+bp = Blueprint('auth', __name__)
+
+@bp.route('/')
+def index():
+    return redirect(url_for('auth.signup'))
+
+# Signup route
+@bp.route('/signup', methods=['GET', 'POST'])
+def signup():
+    if request.method == 'POST':
+        # Get form data
+        fullname = request.form['fullname']
+        email = request.form['email']
+        password = request.form['password']
+        role = request.form['role']
+        
+        # Hash the password
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        
+        # Create connection
+        conn = get_db_connection()
+        # Create cursor with dictionary=True
+        cur = conn.cursor(buffered=True, dictionary=True)
+        
+        try:
+            # Check if email already exists
+            cur.execute("SELECT * FROM users WHERE email = %s", (email,))
+            user = cur.fetchone()
+            
+            if user:
+                flash('Email already exists')
+                return redirect(url_for('auth.signup'))
+            
+            # Insert new user
+            cur.execute("""
+                INSERT INTO users (fullname, email, password, role) 
+                VALUES (%s, %s, %s, %s)
+            """, (fullname, email, hashed_password, role))
+            
+            # Commit to DB
+            conn.commit()
+            update_search('user', cur.lastrowid, user_document(
+                {'id': cur.lastrowid, 'fullname': fullname, 'email': email, 'role': role}))
+            
+            flash('Registration successful! Please login.')
+            return redirect(url_for('auth.login'))
+            
+        except Exception as e:
+            print(e)
+            flash('An error occurred. Please try again.')
+            return redirect(url_for('auth.signup'))
+        
+        finally:
+            # Close cursor and connection
+            cur.close()
+            conn.close()
+    
+    return render_template('signup.html')
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        email = request.form['email']
+        password = request.form['password']
+        hashed_password = hashlib.sha256(password.encode()).hexdigest()
+        
+        conn = get_db_connection()
+        cur = conn.cursor(buffered=True, dictionary=True)
+        
+        try:
+            cur.execute("SELECT * FROM users WHERE email = %s AND password = %s", 
+                       (email, hashed_password))
+            user = cur.fetchone()
+            
+            if user:
+                session['user_id'] = user['id']
+                session['role'] = user['role']
+                session['fullname'] = user['fullname']
+                
+                # Redirect based on role
+                if user['role'] == 'admin':
+                    return redirect(url_for('admin.admin_dashboard'))
+                elif user['role'] == 'teacher':
+                    return redirect(url_for('teacher.teacher_dashboard'))
+                else:
+                    return redirect(url_for('student.student_dashboard'))
+            else:
+                flash('Invalid email or password', 'error')
+                
+        except Exception as e:
+            flash('An error occurred', 'error')
+            print(e)
+            
+        finally:
+            cur.close()
+            conn.close()
+            
+    return render_template('login.html')
+
+# Login required decorator
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Please login first', 'error')
+            return redirect(url_for('auth.login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Role required decorator
+def role_required(allowed_roles):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if 'role' not in session or session['role'] not in allowed_roles:
+                flash('Access denied', 'error')
+                return redirect(url_for('auth.login'))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+@bp.route('/logout')
+def logout():
+    session.clear()
+    flash('You have been logged out', 'success')
+    return redirect(url_for('auth.login'))
@@ -0,0 +1,399 @@
+import logging
+import os
+import threading
+import time
+from flask import render_template
+from .analytics import QuizStats
+from .db import get_db_connection
+from .gradebook import Gradebook
+from .live import LiveResults
+from .proctoring import AttemptRegistry, merge_snapshots
+from .question_bank import fetch_questions
+from .quiz_cache import QuizCodeCache, QuizContent, QuizContentCache
+from .search import SearchIndex
+from .shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+# Quiz code -> quiz id lookups for join_quiz, kept coherent by the routes
+# that create, toggle or delete quizzes
+quiz_codes = QuizCodeCache()
+
+# Second cache level shared by all worker processes on this machine. The
+# in-process caches sit in front of it and are invalidated through its events.
+# Its SQLite file is only opened on first use.
+shared_cache = SharedCache()
+
+def init_app(app):
+    shared_cache.path = os.environ.get('QUIZ_SHARED_CACHE',
+                                       os.path.join(app.instance_path, 'shared_cache.sqlite3'))
+    app.before_request(poll_shared_cache)
+
+def poll_shared_cache():
+    shared_cache.poll()
+
+def resolve_quiz_code(code):
+    """Returns (quiz_id, is_active) for a quiz code, quiz_id is None if unknown"""
+    hit, quiz_id, is_active = quiz_codes.get(code)
+    if hit:
+        return quiz_id, is_active
+    
+    shared = shared_cache.get('code', code)
+    if shared is not None:
+        quiz_id, is_active = shared
+        quiz_codes.put(code, quiz_id, is_active)
+        return quiz_id, is_active
+    
+    version = shared_cache.version('code', code)
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    try:
+        cur.execute("""
+            SELECT q.id, q.is_active FROM quizzes q
+            WHERE q.code = %s
+        """, (code,))
+        quiz = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    
+    if quiz:
+        quiz_id, is_active = quiz['id'], bool(quiz['is_active'])
+    quiz_codes.put(code, quiz_id, is_active)
+    shared_cache.set('code', code, (quiz_id, is_active),
+                     ttl=quiz_codes.ttl if quiz_id is not None else quiz_codes.negative_ttl,
+                     version=version)
+    return quiz_id, is_active
+
+def load_quiz_content(quiz_id):
+    """Load quiz content from the shared cache, or from the database on a miss"""
+    content = shared_cache.get('quiz', quiz_id)
+    if content is None:
+        # Not stored if the quiz is invalidated while it loads
+        version = shared_cache.version('quiz', quiz_id)
+        content = fetch_quiz_content(quiz_id)
+        if content is not None:
+            shared_cache.set('quiz', quiz_id, content, version=version)
+    return content
+
+def fetch_quiz_content(quiz_id):
+    """Load a quiz with its questions and options and pre-render the question cards"""
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    try:
+        cur.execute("SELECT * FROM quizzes WHERE id = %s", (quiz_id,))
+        quiz = cur.fetchone()
+        if not quiz:
+            return None
+        
+        questions = fetch_questions(cur, quiz_id)
+        
+        cur.execute("SELECT draw_count FROM quiz_settings WHERE quiz_id = %s", (quiz_id,))
+        settings = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    
+    answer_key = {}
+    questions_html = []
+    for number, question in enumerate(questions, start=1):
+        options = question['options']
+        correct = next((option['id'] for option in options if option['is_correct']), None)
+        answer_key[question['id']] = (correct, question['marks'])
+        # Never hand the correct answers to the page
+        question['options'] = [{'id': option['id'], 'text': option['text']} for option in options]
+        questions_html.append(render_template('_question_card.html', question=question, number=number))
+    
+    return QuizContent(quiz, questions, questions_html, answer_key,
+                       draw_count=settings['draw_count'] if settings else None)
+
+# Quiz content is identical for every student, so it is loaded and rendered
+# once per quiz and only the per-student bits are computed per request
+quiz_contents = QuizContentCache(load_quiz_content)
+
+def load_quiz_stats(quiz_id):
+    """Compute the item statistics of a quiz from every recorded attempt"""
+    content = quiz_contents.get(quiz_id)
+    if content is None:
+        return None
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+            SELECT answers, marks_obtained FROM attempt_answers 
+            WHERE quiz_id = %s
+        """, (quiz_id,))
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    
+    return QuizStats(content, [(bytes(answers), marks) for answers, marks in rows])
+
+# Statistics only change when someone submits, so they are computed once
+# and kept until the next submission for the quiz
+quiz_stats = QuizContentCache(load_quiz_stats, max_entries=200)
+
+def load_gradebook(teacher_id):
+    """Scores of every student enrolled with a teacher on each of their quizzes"""
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    marks_cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+            SELECT id, title, subject FROM quizzes 
+            WHERE teacher_id = %s 
+            ORDER BY created_at
+        """, (teacher_id,))
+        quizzes = cur.fetchall()
+        
+        cur.execute("""
+            SELECT u.id, u.fullname, u.email
+            FROM users u
+            JOIN enrollments e ON u.id = e.student_id
+            WHERE e.teacher_id = %s
+            ORDER BY u.fullname, u.id
+        """, (teacher_id,))
+        students = cur.fetchall()
+        
+        # The whole grid in one query, pivoted in memory
+        marks_cur.execute("""
+            SELECT m.student_id, m.quiz_id, m.marks_obtained, m.total_marks
+            FROM marks m
+            JOIN quizzes q ON m.quiz_id = q.id
+            JOIN enrollments e ON e.student_id = m.student_id AND e.teacher_id = q.teacher_id
+            WHERE q.teacher_id = %s
+        """, (teacher_id,))
+        marks = marks_cur.fetchall()
+    finally:
+        marks_cur.close()
+        cur.close()
+        conn.close()
+    
+    return Gradebook(students, quizzes, marks)
+
+# One gradebook per teacher, rebuilt after a submission, enrollment change or
+# new quiz. A 2,000 x 200 grid is about 1.6 MB.
+gradebooks = QuizContentCache(load_gradebook, max_entries=64)
+
+def invalidate_gradebook(teacher_id):
+    gradebooks.invalidate(int(teacher_id))
+    shared_cache.publish('gradebook', int(teacher_id))
+
+# Search over quizzes (with their question text) and users. Each worker
+# loads it from the database on the first search, then keeps it current
+# from the routes that create or delete things and from 'search' events.
+search_index = SearchIndex()
+search_load_lock = threading.Lock()
+
+def quiz_document(quiz, question_texts):
+    """A quiz dict with teacher_name as (fields, info) for the search index"""
+    fields = {'title': quiz['title'], 'subject': quiz['subject'],
+              'description': quiz['description'], 'questions': ' '.join(question_texts)}
+    info = {'kind': 'quiz', 'id': quiz['id'], 'title': quiz['title'], 'subject': quiz['subject'],
+            'code': quiz['code'], 'teacher_id': quiz['teacher_id'], 'teacher_name': quiz['teacher_name']}
+    return fields, info
+
+def user_document(user):
+    fields = {'fullname': user['fullname'], 'email': user['email']}
+    info = {'kind': 'user', 'id': user['id'], 'fullname': user['fullname'],
+            'email': user['email'], 'role': user['role']}
+    return fields, info
+
+def fetch_search_documents():
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    try:
+        cur.execute("""
+            SELECT q.id, q.title, q.subject, q.description, q.code, q.teacher_id,
+                   u.fullname as teacher_name
+            FROM quizzes q
+            JOIN users u ON q.teacher_id = u.id
+        """)
+        quizzes = cur.fetchall()
+        
+        # Question text of bank and older quizzes alike
+        texts = {quiz['id']: [] for quiz in quizzes}
+        cur.execute("""
+            SELECT qq.quiz_id, b.question_text
+            FROM quiz_questions qq
+            JOIN bank_questions b ON b.id = qq.question_id
+            UNION ALL
+            SELECT quiz_id, question_text FROM questions
+        """)
+        for row in cur.fetchall():
+            if row['quiz_id'] in texts:
+                texts[row['quiz_id']].append(row['question_text'])
+        
+        cur.execute("SELECT id, fullname, email, role FROM users")
+        users = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    
+    documents = [('quiz', quiz['id']) + quiz_document(quiz, texts[quiz['id']]) for quiz in quizzes]
+    documents += [('user', user['id']) + user_document(user) for user in users]
+    return documents
+
+def get_search_index():
+    if not search_index.loaded:
+        with search_load_lock:
+            if not search_index.loaded:
+                search_index.load(fetch_search_documents())
+    return search_index
+
+def update_search(kind, doc_id, document=None):
+    """Add, replace or (document=None) remove a search document in every worker"""
+    search_index.apply(kind, doc_id, document)
+    shared_cache.publish('search', f'{kind}:{doc_id}', document)
+
+def reload_search():
+    """Reload the whole index in every worker, for changes too big to publish one by one"""
+    search_index.reset()
+    shared_cache.publish('search', 'all', None)
+
+# Date format of the results table
+ATTEMPT_DATE = '%B %d, %Y %I:%M %p'
+
+def load_leaderboard(quiz_id):
+    """Every result of a quiz, for the first teacher to watch it live"""
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    try:
+        cur.execute("""
+            SELECT m.student_id, u.fullname as student_name, m.marks_obtained,
+                   m.total_marks, m.attempt_date
+            FROM marks m
+            JOIN users u ON m.student_id = u.id
+            WHERE m.quiz_id = %s
+        """, (quiz_id,))
+        rows = cur.fetchall()
+    finally:
+        cur.close()
+        conn.close()
+    
+    for row in rows:
+        row['attempt_date'] = row['attempt_date'].strftime(ATTEMPT_DATE)
+    return rows
+
+# Results streamed to teachers watching a quiz, fed by submit_quiz here and
+# by 'live' events from the other workers. Each stream holds a thread, so
+# keep QUIZ_LIVE_STREAMS well below the worker's threads (gunicorn.conf.py).
+live_results = LiveResults(load_leaderboard, max_subscribers=int(os.environ.get('QUIZ_LIVE_STREAMS', 16)))
+
+def publish_result(quiz_id, student_id, row=None):
+    """Send a new result (or, with row=None, a deleted one) to every viewer"""
+    live_results.publish(quiz_id, student_id, row)
+    shared_cache.publish('live', quiz_id, (os.getpid(), student_id, row))
+
+# Attempts being taken right now, in this worker. Every few seconds a
+# background thread in each worker copies its attempts of each quiz into the
+# shared cache, in one transaction and off the request path, and a teacher's
+# view merges the copies of all workers.
+attempts = AttemptRegistry()
+ATTEMPTS_COPY_SECONDS = 5
+attempts_sharer = None  # (pid, thread)
+attempts_sharer_lock = threading.Lock()
+
+def share_attempts():
+    """Make sure this worker's thread copying attempts is running. Cheap,
+    called by the routes that record attempts."""
+    global attempts_sharer
+    # Threads don't survive a fork, start one per process
+    if attempts_sharer is not None and attempts_sharer[0] == os.getpid():
+        return
+    with attempts_sharer_lock:
+        if attempts_sharer is None or attempts_sharer[0] != os.getpid():
+            thread = threading.Thread(target=copy_attempts_forever, name='share-attempts', daemon=True)
+            thread.start()
+            attempts_sharer = (os.getpid(), thread)
+
+def copy_attempts():
+    # A worker that stops copying (or exits) drops out after a few rounds
+    pid = os.getpid()
+    shared_cache.set_many('proctor', [(f'{quiz_id}:{pid}', attempts.snapshot(quiz_id))
+                                      for quiz_id in attempts.quiz_ids()],
+                          ttl=ATTEMPTS_COPY_SECONDS * 3)
+
+def copy_attempts_forever():
+    while True:
+        time.sleep(ATTEMPTS_COPY_SECONDS)
+        try:
+            copy_attempts()
+        except Exception:
+            logger.exception('Error sharing quiz attempts')
+
+def attempt_report(quiz_id):
+    """Counts per status and the attempts of a quiz, across all workers"""
+    own_key = f'{quiz_id}:{os.getpid()}'
+    snapshots = [attempts.snapshot(quiz_id)]
+    snapshots += [snapshot for key, snapshot in shared_cache.items('proctor', f'{quiz_id}:') if key != own_key]
+    return merge_snapshots(snapshots, attempts.timeout)
+
+def invalidate_quiz(quiz_id, code=None):
+    """Drop a quiz from the caches of every worker process"""
+    quiz_codes.invalidate_quiz(quiz_id)
+    quiz_contents.invalidate(quiz_id)
+    quiz_stats.invalidate(quiz_id)
+    shared_cache.publish('quiz', quiz_id)
+    if code:
+        invalidate_quiz_code(code)
+
+def invalidate_quiz_stats(quiz_id):
+    quiz_stats.invalidate(quiz_id)
+    shared_cache.publish('stats', quiz_id)
+
+def invalidate_quiz_code(code):
+    quiz_codes.invalidate_code(code)
+    shared_cache.publish('code', code)
+
+# Invalidations published by other workers
+def on_quiz_changed(key, payload):
+    quiz_codes.invalidate_quiz(int(key))
+    quiz_contents.invalidate(int(key))
+    quiz_stats.invalidate(int(key))
+
+def on_quiz_code_changed(key, payload):
+    quiz_codes.invalidate_code(key)
+
+def on_quiz_stats_changed(key, payload):
+    quiz_stats.invalidate(int(key))
+
+def on_gradebook_changed(key, payload):
+    gradebooks.invalidate(int(key))
+
+def on_live_result(key, payload):
+    pid, student_id, row = payload
+    # This process sent it to its own viewers already
+    if pid != os.getpid():
+        live_results.publish(int(key), student_id, row)
+
+def on_search_changed(key, payload):
+    if key == 'all':
+        search_index.reset()
+        return
+    kind, doc_id = key.split(':')
+    search_index.apply(kind, int(doc_id), payload)
+
+def on_events_missed():
+    # Any of them may be stale, the next requests load them again
+    quiz_codes.clear()
+    quiz_contents.clear()
+    quiz_stats.clear()
+    gradebooks.clear()
+    search_index.reset()
+
+shared_cache.subscribe('quiz', on_quiz_changed)
+shared_cache.subscribe('code', on_quiz_code_changed)
+shared_cache.subscribe('stats', on_quiz_stats_changed)
+shared_cache.subscribe('gradebook', on_gradebook_changed)
+shared_cache.subscribe('search', on_search_changed)
+shared_cache.subscribe('live', on_live_result)
+shared_cache.on_missed(on_events_missed)
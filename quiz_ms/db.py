@@ -0,0 +1,78 @@
+import os
+import threading
+import click
+
+# MySQL configurations
+db_config = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',
+    'database': 'quiz_management'
+}
+
+pool_size = int(os.environ.get('QUIZ_DB_POOL_SIZE', 8))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Create the connection pool on first use, once per process.
+
+    Nothing connects at import time, so the app can be preloaded in the
+    gunicorn master and each forked worker opens its own connections.
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                from mysql.connector import pooling
+                _pool = pooling.MySQLConnectionPool(pool_name=f'quiz_ms_{os.getpid()}',
+                                                    pool_size=pool_size,
+                                                    pool_reset_session=True,
+                                                    **db_config)
+                _pool_pid = os.getpid()
+    return _pool
+
+def get_db_connection():
+    # conn.close() hands pooled connections back to the pool
+    from mysql.connector import errors
+    try:
+        return get_pool().get_connection()
+    except errors.PoolError:
+        # Pool exhausted, fall back to a dedicated connection
+        from mysql import connector
+        return connector.connect(**db_config)
+
+def init_db():
+    """Create the tables in schema.sql that don't exist yet"""
+    with open(os.path.join(os.path.dirname(__file__), 'schema.sql'), encoding='utf-8') as f:
+        lines = [line for line in f if not line.lstrip().startswith('--')]
+    statements = [statement.strip() for statement in ''.join(lines).split(';') if statement.strip()]
+    
+    from mysql.connector import errorcode, errors
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        for statement in statements:
+            try:
+                cur.execute(statement)
+            except errors.DatabaseError as e:
+                if e.errno == errorcode.ER_DUP_ENTRY:
+                    conn.commit()
+                    raise click.ClickException(
+                        'Some students have more than one marks row for a quiz. Remove the duplicate '
+                        'marks for each (student_id, quiz_id) first (see schema.sql), then run init-db again')
+                # ALTER TABLE ... ADD KEY has no IF NOT EXISTS
+                if e.errno != errorcode.ER_DUP_KEYNAME:
+                    raise
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return len(statements)
+
+@click.command('init-db')
+def init_db_command():
+    """Create the tables added on top of the original schema."""
+    click.echo(f'Applied {init_db()} schema statements')
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class Gradebook:
+    """Every enrolled student's score on every quiz of one teacher.
+
+    Scores are held in a dense (students x quizzes) float32 array of
+    percentages, NaN where the student hasn't attempted the quiz, so the
+    row and column averages are single NumPy reductions and a page of the
+    grid is an array slice.
+    """
+
+    def __init__(self, students, quizzes, marks):
+        """students and quizzes are dicts in display order, marks are
+        (student_id, quiz_id, marks_obtained, total_marks) rows."""
+        self.students = students
+        self.quizzes = quizzes
+        student_rows = {student['id']: row for row, student in enumerate(students)}
+        quiz_columns = {quiz['id']: column for column, quiz in enumerate(quizzes)}
+
+        self.scores = np.full((len(students), len(quizzes)), np.nan, dtype=np.float32)
+        rows, columns, percentages = [], [], []
+        for student_id, quiz_id, marks_obtained, total_marks in marks:
+            row = student_rows.get(student_id)
+            column = quiz_columns.get(quiz_id)
+            if row is not None and column is not None:
+                rows.append(row)
+                columns.append(column)
+                percentages.append(marks_obtained / total_marks * 100 if total_marks else 0)
+        self.scores[rows, columns] = percentages
+
+        attempted = ~np.isnan(self.scores)
+        self.attempts_per_student = attempted.sum(axis=1)
+        self.attempts_per_quiz = attempted.sum(axis=0)
+        totals = np.where(attempted, self.scores, 0)
+        with np.errstate(invalid='ignore'):
+            self.student_averages = totals.sum(axis=1) / self.attempts_per_student
+            self.quiz_averages = totals.sum(axis=0) / self.attempts_per_quiz
+
+    def __len__(self):
+        return len(self.students)
+
+    def pages(self, per_page):
+        return max(1, -(-len(self.students) // per_page))
+
+    def page(self, number, per_page):
+        """Rows of one page as dicts with the student, their scores and average"""
+        start = (number - 1) * per_page
+        block = self.scores[start:start + per_page]
+        rows = []
+        for offset, scores in enumerate(block.tolist()):
+            row = start + offset
+            rows.append({
+                'student': self.students[row],
+                'scores': [None if score != score else score for score in scores],  # NaN -> None
+                'average': None if self.attempts_per_student[row] == 0 else float(self.student_averages[row]),
+                'attempts': int(self.attempts_per_student[row]),
+            })
+        return rows
+
+    def quiz_summary(self):
+        return [{'quiz': quiz,
+                 'average': None if self.attempts_per_quiz[column] == 0 else float(self.quiz_averages[column]),
+                 'attempts': int(self.attempts_per_quiz[column])}
+                for column, quiz in enumerate(self.quizzes)]
@@ -0,0 +1,165 @@
+import json
+import queue
+import threading
+from bisect import bisect_left, insort
+
+def percentage(row):
+    return row['marks_obtained'] / row['total_marks'] * 100 if row['total_marks'] else 0
+
+def sse(event, data):
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class Leaderboard:
+    """One quiz's results, ranked like RANK() OVER (ORDER BY marks_obtained DESC).
+
+    Rows are dicts with student_id, student_name, marks_obtained,
+    total_marks and attempt_date (already formatted for display).
+    """
+
+    def __init__(self, rows):
+        self.entries = {row['student_id']: row for row in rows}
+        self.order = sorted((-row['marks_obtained'], row['student_id']) for row in rows)
+        self.percentage_sum = sum(percentage(row) for row in rows)
+
+    def rank(self, marks_obtained):
+        # 1 + the number of attempts with more marks
+        return bisect_left(self.order, (-marks_obtained,)) + 1
+
+    def update(self, student_id, row=None):
+        """Add or replace a student's row, or remove it when row is None"""
+        old = self.entries.pop(student_id, None)
+        if old is not None:
+            del self.order[bisect_left(self.order, (-old['marks_obtained'], student_id))]
+            self.percentage_sum -= percentage(old)
+        if row is not None:
+            self.entries[student_id] = row
+            insort(self.order, (-row['marks_obtained'], student_id))
+            self.percentage_sum += percentage(row)
+
+    def summary(self):
+        attempts = len(self.entries)
+        highest = percentage(self.entries[self.order[0][1]]) if attempts else 0
+        return {'attempts': attempts,
+                'average': round(self.percentage_sum / attempts, 1) if attempts else 0,
+                'highest': round(highest, 1)}
+
+    def rows(self):
+        return [dict(self.entries[student_id], rank=self.rank(-marks)) for marks, student_id in self.order]
+
+class TooManySubscribers(Exception):
+    pass
+
+class Subscriber:
+    """One open stream. If it falls queue_size events behind it is dropped
+    and the browser reconnects, rather than the queue growing without bound."""
+
+    def __init__(self, queue_size):
+        self.events = queue.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def get(self, timeout):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class LiveResults:
+    """Fans score events out to the teachers watching each quiz in this process.
+
+    A quiz's leaderboard is loaded once, when its first viewer connects,
+    and from then on kept current by publish(), so viewers cost no queries.
+    It is dropped when the last viewer leaves. Events published while the
+    leaderboard loads are applied once it is in.
+
+    Each open stream holds a server thread, so at most max_subscribers are
+    open at once; subscribe() raises TooManySubscribers beyond that.
+    """
+
+    def __init__(self, loader, queue_size=100, max_subscribers=None):
+        self.loader = loader  # quiz_id -> leaderboard rows
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscriber_count = 0
+        self.lock = threading.Lock()
+        self.boards = {}       # quiz_id -> Leaderboard
+        self.subscribers = {}  # quiz_id -> set of Subscriber
+        self.loading = {}      # quiz_id -> (threading.Event, [(student_id, row)])
+
+    def subscribe(self, quiz_id):
+        """Returns (subscriber, the current rows and summary)"""
+        subscriber = Subscriber(self.queue_size)
+        with self.lock:
+            if self.max_subscribers is not None and self.subscriber_count >= self.max_subscribers:
+                raise TooManySubscribers()
+            self.subscribers.setdefault(quiz_id, set()).add(subscriber)
+            self.subscriber_count += 1
+            board = self.boards.get(quiz_id)
+            loading = self.loading.get(quiz_id)
+            if board is None and loading is None:
+                loading = self.loading[quiz_id] = (threading.Event(), [])
+                is_loader = True
+            else:
+                is_loader = False
+
+        if board is None:
+            if is_loader:
+                try:
+                    rows = self.loader(quiz_id)
+                except Exception:
+                    with self.lock:
+                        del self.loading[quiz_id]
+                    loading[0].set()
+                    self.unsubscribe(quiz_id, subscriber)
+                    raise
+                with self.lock:
+                    board = Leaderboard(rows)
+                    for student_id, row in self.loading.pop(quiz_id)[1]:
+                        board.update(student_id, row)
+                    self.boards[quiz_id] = board
+                loading[0].set()
+            else:
+                loading[0].wait(30)
+
+        with self.lock:
+            board = self.boards.get(quiz_id)
+            if board is None:
+                self._unsubscribe(quiz_id, subscriber)
+                raise RuntimeError(f'Could not load the results of quiz {quiz_id}')
+            return subscriber, {'results': board.rows(), 'summary': board.summary()}
+
+    def unsubscribe(self, quiz_id, subscriber):
+        with self.lock:
+            self._unsubscribe(quiz_id, subscriber)
+
+    def _unsubscribe(self, quiz_id, subscriber):
+        subscribers = self.subscribers.get(quiz_id)
+        if subscribers is None or subscriber not in subscribers:
+            return
+        subscribers.discard(subscriber)
+        self.subscriber_count -= 1
+        if not subscribers:
+            # Nobody is watching, stop keeping the leaderboard current
+            del self.subscribers[quiz_id]
+            self.boards.pop(quiz_id, None)
+
+    def publish(self, quiz_id, student_id, row=None):
+        """A student's new result, or row=None when their attempt was deleted"""
+        with self.lock:
+            loading = self.loading.get(quiz_id)
+            if loading is not None:
+                loading[1].append((student_id, row))
+                return
+            board = self.boards.get(quiz_id)
+            if board is None:
+                return
+            board.update(student_id, row)
+            event = {'student_id': student_id, 'result': row, 'summary': board.summary()}
+            if row is not None:
+                event['result'] = dict(row, rank=board.rank(row['marks_obtained']))
+            for subscriber in list(self.subscribers.get(quiz_id, ())):
+                try:
+                    subscriber.events.put_nowait(event)
+                except queue.Full:
+                    subscriber.dropped = True
+                    self._unsubscribe(quiz_id, subscriber)
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Attempt statuses
+IN_PROGRESS = 'in_progress'
+SUBMITTED = 'submitted'
+TIMED_OUT = 'timed_out'
+
+class Attempt:
+    __slots__ = ('quiz_id', 'student_id', 'student_name', 'started_at', 'deadline',
+                 'last_seen', 'answered', 'status')
+
+    def __init__(self, quiz_id, student_id, student_name, started_at, deadline):
+        self.quiz_id = quiz_id
+        self.student_id = student_id
+        self.student_name = student_name
+        self.started_at = started_at
+        self.deadline = deadline
+        self.last_seen = time.time()
+        self.answered = 0
+        self.status = IN_PROGRESS
+
+    def to_tuple(self):
+        return (self.student_name, self.started_at, self.deadline, self.last_seen, self.answered, self.status)
+
+class AttemptRegistry:
+    """The quiz attempts going on in this process, kept current by heartbeats.
+
+    Active attempts sit in an OrderedDict in the order they were last heard
+    from, so a heartbeat is a dict update plus move_to_end and expiry pops
+    from the front until it reaches one heard from recently. Finished
+    attempts (submitted, or silent for `timeout` seconds) stay in a second
+    OrderedDict for `keep_finished` seconds so teachers see how the quiz went.
+    Together they hold at most `max_attempts`, dropping the oldest first.
+    """
+
+    def __init__(self, timeout=60, keep_finished=3600, max_attempts=100000, sweep_interval=1):
+        self.timeout = timeout
+        self.keep_finished = keep_finished
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        self.lock = threading.Lock()
+        self.active = OrderedDict()    # (quiz_id, student_id) -> Attempt, by last_seen
+        self.finished = OrderedDict()  # (quiz_id, student_id) -> Attempt, by time finished
+        self.by_quiz = {}              # quiz_id -> {student_id: Attempt}
+        self.last_sweep = 0
+
+    def __len__(self):
+        return len(self.active) + len(self.finished)
+
+    def start(self, quiz_id, student_id, student_name, started_at, deadline):
+        """take_quiz was served. A reload keeps the attempt but counts as a heartbeat."""
+        key = (quiz_id, student_id)
+        with self.lock:
+            attempt = self.active.get(key)
+            if attempt is None:
+                attempt = self.finished.pop(key, None)
+                if attempt is None or attempt.status == SUBMITTED:
+                    attempt = Attempt(quiz_id, student_id, student_name, started_at, deadline)
+                    self.by_quiz.setdefault(quiz_id, {})[student_id] = attempt
+                attempt.status = IN_PROGRESS
+                self.active[key] = attempt
+            self._touch(key, attempt)
+            self._sweep()
+
+    def heartbeat(self, quiz_id, student_id, answered=None):
+        """Returns False for an attempt this process doesn't know (started in
+        another worker, or expired), so the caller can start() it"""
+        key = (quiz_id, student_id)
+        with self.lock:
+            attempt = self.active.get(key)
+            if attempt is not None:
+                self._touch(key, attempt)
+                if answered is not None:
+                    attempt.answered = answered
+            self._sweep()
+        return attempt is not None
+
+    def submit(self, quiz_id, student_id, student_name, started_at, deadline):
+        """Record a submission, also of attempts started in another worker"""
+        key = (quiz_id, student_id)
+        with self.lock:
+            attempt = self.active.pop(key, None) or self.finished.pop(key, None)
+            if attempt is None:
+                attempt = Attempt(quiz_id, student_id, student_name, started_at, deadline)
+                self.by_quiz.setdefault(quiz_id, {})[student_id] = attempt
+            attempt.status = SUBMITTED
+            attempt.last_seen = time.time()
+            self.finished[key] = attempt
+            self._sweep()
+
+    def _touch(self, key, attempt):
+        attempt.last_seen = time.time()
+        self.active.move_to_end(key)
+
+    def _sweep(self):
+        """Expire in batches, at most once every sweep_interval seconds"""
+        now = time.time()
+        if now - self.last_sweep < self.sweep_interval and len(self) <= self.max_attempts:
+            return
+        self.last_sweep = now
+
+        silent_since = now - self.timeout
+        while self.active:
+            key, attempt = next(iter(self.active.items()))
+            if attempt.last_seen >= silent_since:
+                break
+            del self.active[key]
+            attempt.status = TIMED_OUT
+            self.finished[key] = attempt
+
+        finished_before = now - self.keep_finished
+        while self.finished:
+            key, attempt = next(iter(self.finished.items()))
+            if attempt.last_seen >= finished_before and len(self) <= self.max_attempts:
+                break
+            del self.finished[key]
+            self._forget(attempt)
+
+        # Still too many with only active attempts left, drop the longest silent
+        while len(self) > self.max_attempts:
+            _, attempt = self.active.popitem(last=False)
+            self._forget(attempt)
+
+    def _forget(self, attempt):
+        students = self.by_quiz[attempt.quiz_id]
+        if students.get(attempt.student_id) is attempt:
+            del students[attempt.student_id]
+            if not students:
+                del self.by_quiz[attempt.quiz_id]
+
+    def snapshot(self, quiz_id):
+        """{student_id: (name, started_at, deadline, last_seen, answered, status)}"""
+        with self.lock:
+            self._sweep()
+            return {student_id: attempt.to_tuple()
+                    for student_id, attempt in self.by_quiz.get(quiz_id, {}).items()}
+
+    def quiz_ids(self):
+        with self.lock:
+            return list(self.by_quiz)
+
+def merge_snapshots(snapshots, timeout, now=None):
+    """Combine the snapshots of one quiz from every worker into per-quiz counts
+    and a list of attempts. A student's heartbeats can land on different
+    workers, so they are merged per student: the latest heartbeat counts and
+    a submission anywhere wins."""
+    now = now or time.time()
+    merged = {}
+    for snapshot in snapshots:
+        for student_id, record in snapshot.items():
+            current = merged.get(student_id)
+            if current is None:
+                merged[student_id] = list(record)
+                continue
+            # name, started_at, deadline, last_seen, answered, status
+            current[1] = min(current[1], record[1])
+            if record[3] > current[3]:
+                current[3], current[4] = record[3], record[4]
+            if record[5] == SUBMITTED:
+                current[5] = SUBMITTED
+
+    counts = {'started': len(merged), IN_PROGRESS: 0, SUBMITTED: 0, TIMED_OUT: 0}
+    attempts = []
+    for student_id, (name, started_at, deadline, last_seen, answered, status) in merged.items():
+        if status != SUBMITTED:
+            # Silent on every worker, or past the deadline without submitting
+            status = TIMED_OUT if now - last_seen > timeout or now > deadline + timeout else IN_PROGRESS
+        counts[status] += 1
+        attempts.append({'student_id': student_id, 'student_name': name, 'status': status,
+                         'started_at': started_at, 'last_seen': last_seen, 'answered': answered,
+                         'remaining': max(0, int(deadline - now))})
+    attempts.sort(key=lambda attempt: (attempt['status'] != IN_PROGRESS, attempt['student_name'] or ''))
+    return counts, attempts
@@ -0,0 +1,234 @@
+import csv
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from .db import get_db_connection
+
+# Creates accounts in bulk from a CSV or XLSX file with fullname, email,
+# password and optionally role columns. Rows are read a batch at a time;
+# each batch has its emails checked with one IN lookup, is inserted with one
+# multi-row INSERT and committed. Passwords are hashed in a pool a few
+# batches ahead, so hashing overlaps the database round trips.
+#
+# After every commit the position in the file is saved to a checkpoint
+# named after the file's content hash, so running it again on the same file
+# after a failure carries on after the last committed batch. The checkpoint
+# is removed once the whole file is through.
+
+BATCH_SIZE = 1000
+ROLES = ('student', 'teacher')
+MAX_REPORTED_ERRORS = 100
+
+def hash_password(password):
+    # Same hashing as signup and login
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def hash_batch(passwords):
+    return [hash_password(password) for password in passwords]
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_rows(path):
+    """Yield (line number, {column: value}) from a CSV or XLSX file, one row
+    at a time. The first row names the columns."""
+    if path.lower().endswith('.xlsx'):
+        import openpyxl
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [str(cell or '').strip().lower() for cell in next(rows, ())]
+            for line, row in enumerate(rows, start=2):
+                yield line, {name: str(value) if value is not None else '' for name, value in zip(header, row)}
+        finally:
+            wb.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = [cell.strip().lower() for cell in next(reader, [])]
+            for line, row in enumerate(reader, start=2):
+                yield line, dict(zip(header, row))
+
+def read_batches(path, start_after=0, batch_size=BATCH_SIZE):
+    """Yield (last line, valid rows, counts) for every batch_size valid rows
+    after line start_after. Rows are (line, fullname, email, password, role);
+    counts are the rows read, invalid and repeated since the last batch, so
+    they can be added to the report once the batch is committed."""
+    seen = set()
+    batch = []
+    counts = {'read': 0, 'invalid': 0, 'duplicates': 0, 'errors': []}
+    line = start_after
+    for line, row in read_rows(path):
+        if line <= start_after:
+            continue
+        counts['read'] += 1
+        fullname = (row.get('fullname') or '').strip()
+        email = (row.get('email') or '').strip().lower()
+        password = row.get('password') or ''
+        role = (row.get('role') or 'student').strip().lower()
+        if not fullname or '@' not in email or not password or role not in ROLES:
+            counts['invalid'] += 1
+            if len(counts['errors']) < MAX_REPORTED_ERRORS:
+                counts['errors'].append(f'line {line}: needs a fullname, email, password and a student or teacher role')
+            continue
+        if email in seen:
+            counts['duplicates'] += 1
+            continue
+        seen.add(email)
+        batch.append((line, fullname, email, password, role))
+        if len(batch) >= batch_size:
+            yield line, batch, counts
+            batch = []
+            counts = {'read': 0, 'invalid': 0, 'duplicates': 0, 'errors': []}
+    if batch or counts['read']:
+        yield line, batch, counts
+
+def insert_batch(cur, batch, hashes):
+    """Insert the rows of a batch whose email isn't taken. Returns (created, existing)."""
+    emails = [row[2] for row in batch]
+    placeholders = ', '.join(['%s'] * len(emails))
+    cur.execute(f"SELECT email FROM users WHERE email IN ({placeholders})", tuple(emails))
+    taken = {row[0].lower() for row in cur.fetchall()}
+
+    rows = [(fullname, email, hashed, role)
+            for (_, fullname, email, _, role), hashed in zip(batch, hashes) if email not in taken]
+    created = 0
+    if rows:
+        # IGNORE: someone may sign up with one of these emails meanwhile
+        cur.execute(f"""
+            INSERT IGNORE INTO users (fullname, email, password, role)
+            VALUES {', '.join(['(%s, %s, %s, %s)'] * len(rows))}
+        """, tuple(value for row in rows for value in row))
+        created = cur.rowcount
+    return created, len(batch) - created
+
+def save_checkpoint(path, state):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+def provision_users(path, checkpoint_dir, executor=None, ahead=1, batch_size=BATCH_SIZE, restart=False,
+                    progress=None, report=None):
+    """Create the users in a CSV / XLSX file, resuming from a checkpoint.
+
+    executor hashes passwords `ahead` batches ahead of the inserts (any
+    concurrent.futures executor), None hashes inline. progress(report) is
+    called after each committed batch. Returns the report: counts of rows
+    read, created, already existing, invalid and repeated, plus timing.
+    It is filled in as batches commit, pass a dict as report to still have
+    it if this raises part way.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    checkpoint = os.path.join(checkpoint_dir, file_digest(path) + '.json')
+    report = {} if report is None else report
+    report.update({'read': 0, 'created': 0, 'existing': 0, 'invalid': 0, 'duplicates': 0,
+                   'errors': [], 'line': 0})
+    if not restart and os.path.exists(checkpoint):
+        with open(checkpoint, encoding='utf-8') as f:
+            report.update(json.load(f))
+    report['resumed_from'] = report['line']
+    started = time.perf_counter()
+    created_before = report['created']
+
+    batches = read_batches(path, start_after=report['line'], batch_size=batch_size)
+    pending = deque()
+
+    def queue_next():
+        item = next(batches, None)
+        if item is not None:
+            passwords = [row[3] for row in item[1]]
+            pending.append((item, executor.submit(hash_batch, passwords) if executor else passwords))
+
+    # Keep batches hashing while the current one is inserted
+    for _ in range(ahead + 1 if executor else 1):
+        queue_next()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        while pending:
+            (line, batch, counts), hashing = pending.popleft()
+            hashes = hashing.result() if executor else hash_batch(hashing)
+            queue_next()
+
+            if batch:
+                created, existing = insert_batch(cur, batch, hashes)
+                conn.commit()
+                report['created'] += created
+                report['existing'] += existing
+            for key in ('read', 'invalid', 'duplicates'):
+                report[key] += counts[key]
+            report['errors'] = (report['errors'] + counts['errors'])[:MAX_REPORTED_ERRORS]
+            report['line'] = line
+            save_checkpoint(checkpoint, {key: value for key, value in report.items() if key != 'resumed_from'})
+
+            elapsed = time.perf_counter() - started
+            report['seconds'] = round(elapsed, 2)
+            report['users_per_second'] = round((report['created'] - created_before) / elapsed) if elapsed else 0
+            if progress:
+                progress(report)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    # Done, a new run of the same file starts from the top again
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    elapsed = time.perf_counter() - started
+    report['seconds'] = round(elapsed, 2)
+    report['users_per_second'] = round((report['created'] - created_before) / elapsed) if elapsed else 0
+    return report
+
+def finish_provisioning(report):
+    """Let the other caches know about the new accounts, also after a failure
+    part way (report as filled in so far)"""
+    from .caches import reload_search
+
+    if report.get('created'):
+        reload_search()
+
+@click.command('provision-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', default=max((os.cpu_count() or 1) - 1, 0), show_default=True,
+              help='Processes hashing passwords, 0 to hash inline.')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the top of the file.')
+@with_appcontext
+def provision_users_command(path, workers, batch_size, restart):
+    """Create the accounts listed in a CSV or XLSX file (fullname, email, password, role)."""
+    def progress(report):
+        click.echo(f"line {report['line']}: {report['created']} created, {report['existing']} existing, "
+                   f"{report['users_per_second']} users/s")
+
+    executor = ProcessPoolExecutor(workers) if workers > 0 else None
+    report = {}
+    try:
+        provision_users(path, os.path.join(current_app.instance_path, 'provisioning'),
+                        executor=executor, ahead=workers, batch_size=batch_size, restart=restart,
+                        progress=progress, report=report)
+    finally:
+        if executor:
+            executor.shutdown()
+        # Accounts from batches committed before a failure are real too
+        finish_provisioning(report)
+
+    if report['resumed_from']:
+        click.echo(f"Resumed after line {report['resumed_from']}")
+    click.echo(f"Created {report['created']} users, {report['existing']} already existed, "
+               f"{report['invalid']} invalid rows, {report['duplicates']} repeated emails "
+               f"in {report['seconds']}s ({report['users_per_second']} users/s)")
+    for error in report['errors']:
+        click.echo(f'  {error}')
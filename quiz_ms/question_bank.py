@@ -0,0 +1,241 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import click
+from .db import get_db_connection
+
+# Questions are stored once in bank_questions / bank_options, keyed by a hash
+# of their text, options and correct answer, and quizzes link to them through
+# quiz_questions. Re-creating a quiz every term adds link rows only.
+#
+# Bank rows never change once written (different content means a different
+# hash and a new row), so cached bank questions never need invalidating.
+
+def question_hash(text, options, correct):
+    content = json.dumps([text, options, correct], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(content.encode('utf-8')).digest()
+
+class BankCache:
+    """Bank questions by id as (question_text, ((option_id, text, is_correct), ...))"""
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, cur, question_ids):
+        found = {}
+        with self.lock:
+            for question_id in question_ids:
+                entry = self.entries.get(question_id)
+                if entry is not None:
+                    self.entries.move_to_end(question_id)
+                    found[question_id] = entry
+        missing = [question_id for question_id in question_ids if question_id not in found]
+        if missing:
+            loaded = fetch_bank_questions(cur, missing)
+            found.update(loaded)
+            with self.lock:
+                self.entries.update(loaded)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return found
+
+bank_cache = BankCache()
+
+def fetch_bank_questions(cur, question_ids):
+    placeholders = ', '.join(['%s'] * len(question_ids))
+    cur.execute(f"""
+        SELECT id, question_text FROM bank_questions
+        WHERE id IN ({placeholders})
+    """, tuple(question_ids))
+    texts = {row['id']: row['question_text'] for row in cur.fetchall()}
+    options = {question_id: [] for question_id in texts}
+    cur.execute(f"""
+        SELECT id, question_id, text, is_correct FROM bank_options
+        WHERE question_id IN ({placeholders})
+        ORDER BY question_id, position
+    """, tuple(question_ids))
+    for row in cur.fetchall():
+        options[row['question_id']].append((row['id'], row['text'], bool(row['is_correct'])))
+    return {question_id: (text, tuple(options[question_id])) for question_id, text in texts.items()}
+
+class DuplicateQuestionError(ValueError):
+    """Two questions of one quiz have the same text, options and answer.
+    They would share a bank question, and the question id names the form
+    field, so the quiz can't hold both."""
+
+    def __init__(self, first, second):
+        super().__init__(f'Question {second} is the same as question {first}')
+        self.first = first    # 1-based positions in the quiz
+        self.second = second
+
+def link_questions(cur, quiz_id, questions):
+    """Store questions for a quiz through the bank.
+
+    questions are (text, marks, [option texts], index of the correct option).
+    Questions already in the bank are reused, new ones are added with one
+    multi-row INSERT for the questions and one for their options. Runs on
+    the caller's cursor (a dictionary cursor) and transaction. Raises
+    DuplicateQuestionError if two questions are the same. Returns how many
+    were new.
+    """
+    hashes = [question_hash(text, options, correct) for text, _, options, correct in questions]
+    positions = {}
+    for position, content_hash in enumerate(hashes, start=1):
+        if content_hash in positions:
+            raise DuplicateQuestionError(positions[content_hash], position)
+        positions[content_hash] = position
+
+    bank_ids = {}
+    if hashes:
+        placeholders = ', '.join(['%s'] * len(hashes))
+        cur.execute(f"""
+            SELECT id, content_hash FROM bank_questions
+            WHERE content_hash IN ({placeholders})
+        """, tuple(hashes))
+        bank_ids = {bytes(row['content_hash']): row['id'] for row in cur.fetchall()}
+
+    created = 0
+    missing = [(content_hash, question) for content_hash, question in zip(hashes, questions)
+               if content_hash not in bank_ids]
+    if missing:
+        # IGNORE: another teacher may be adding the same question right now,
+        # their insert makes ours wait until they commit or roll back
+        cur.execute(f"""
+            INSERT IGNORE INTO bank_questions (content_hash, question_text)
+            VALUES {', '.join(['(%s, %s)'] * len(missing))}
+        """, tuple(value for content_hash, question in missing for value in (content_hash, question[0])))
+
+        # Locking reads see rows committed since this transaction's snapshot,
+        # and hold the questions so nobody else adds their options meanwhile
+        placeholders = ', '.join(['%s'] * len(missing))
+        cur.execute(f"""
+            SELECT id, content_hash FROM bank_questions
+            WHERE content_hash IN ({placeholders})
+            FOR UPDATE
+        """, tuple(content_hash for content_hash, _ in missing))
+        new_ids = {bytes(row['content_hash']): row['id'] for row in cur.fetchall()}
+        cur.execute(f"""
+            SELECT DISTINCT question_id FROM bank_options
+            WHERE question_id IN ({placeholders})
+            FOR UPDATE
+        """, tuple(new_ids.values()))
+        complete = {row['question_id'] for row in cur.fetchall()}
+
+        # Options for the questions inserted above
+        rows = []
+        for content_hash, (_, _, options, correct) in missing:
+            question_id = new_ids[content_hash]
+            if question_id not in complete:
+                rows += [(question_id, position, option, position == correct)
+                         for position, option in enumerate(options)]
+                created += 1
+        if rows:
+            cur.execute(f"""
+                INSERT INTO bank_options (question_id, position, text, is_correct)
+                VALUES {', '.join(['(%s, %s, %s, %s)'] * len(rows))}
+            """, tuple(value for row in rows for value in row))
+        bank_ids.update(new_ids)
+
+    links = [(quiz_id, position, bank_ids[content_hash], marks)
+             for position, (content_hash, (_, marks, _, _)) in enumerate(zip(hashes, questions))]
+    if links:
+        cur.execute(f"""
+            INSERT INTO quiz_questions (quiz_id, position, question_id, marks)
+            VALUES {', '.join(['(%s, %s, %s, %s)'] * len(links))}
+        """, tuple(value for link in links for value in link))
+    return created
+
+def fetch_questions(cur, quiz_id):
+    """A quiz's questions in order, each with its options including is_correct.
+
+    Reads the bank for quizzes created through it and the per-quiz
+    questions / options tables for older ones. Takes a dictionary cursor.
+    """
+    cur.execute("""
+        SELECT question_id, marks FROM quiz_questions
+        WHERE quiz_id = %s
+        ORDER BY position
+    """, (quiz_id,))
+    links = cur.fetchall()
+    if links:
+        bank = bank_cache.get_many(cur, [link['question_id'] for link in links])
+        questions = []
+        for link in links:
+            text, options = bank[link['question_id']]
+            questions.append({
+                'id': link['question_id'],
+                'quiz_id': quiz_id,
+                'question_text': text,
+                'marks': link['marks'],
+                'options': [{'id': option_id, 'text': option_text, 'is_correct': is_correct}
+                            for option_id, option_text, is_correct in options],
+            })
+        return questions
+
+    cur.execute("SELECT * FROM questions WHERE quiz_id = %s ORDER BY id", (quiz_id,))
+    questions = cur.fetchall()
+
+    # Fetch the options of all questions in one query
+    options_by_question = {question['id']: [] for question in questions}
+    if questions:
+        placeholders = ', '.join(['%s'] * len(questions))
+        cur.execute(f"""
+            SELECT * FROM options
+            WHERE question_id IN ({placeholders})
+            ORDER BY id
+        """, tuple(options_by_question))
+        for option in cur.fetchall():
+            options_by_question[option['question_id']].append(option)
+    for question in questions:
+        question['options'] = options_by_question[question['id']]
+    return questions
+
+def migrate_quiz(cur, quiz_id):
+    """Move one quiz from the per-quiz tables into the bank"""
+    cur.execute("SELECT id FROM quiz_questions WHERE quiz_id = %s LIMIT 1", (quiz_id,))
+    if cur.fetchone():
+        return 0
+    questions = fetch_questions(cur, quiz_id)
+    link_questions(cur, quiz_id, [
+        (question['question_text'], question['marks'],
+         [option['text'] for option in question['options']],
+         next((i for i, option in enumerate(question['options']) if option['is_correct']), None))
+        for question in questions])
+    cur.execute("DELETE FROM options WHERE question_id IN (SELECT id FROM questions WHERE quiz_id = %s)", (quiz_id,))
+    cur.execute("DELETE FROM questions WHERE quiz_id = %s", (quiz_id,))
+    return len(questions)
+
+@click.command('migrate-question-bank')
+def migrate_question_bank_command():
+    """Move quizzes stored in questions / options into the question bank."""
+    from .caches import invalidate_quiz
+
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+
+    try:
+        cur.execute("SELECT DISTINCT quiz_id FROM questions")
+        quiz_ids = [row['quiz_id'] for row in cur.fetchall()]
+        moved = 0
+        # One transaction per quiz so a failure part way keeps earlier quizzes
+        for quiz_id in quiz_ids:
+            try:
+                moved += migrate_quiz(cur, quiz_id)
+            except DuplicateQuestionError as e:
+                # Still works from the old tables, which allow repeats
+                conn.rollback()
+                click.echo(f'Left quiz {quiz_id} in the old tables: {e}')
+                continue
+            conn.commit()
+            invalidate_quiz(quiz_id)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    click.echo(f'Moved {moved} questions from {len(quiz_ids)} quizzes into the question bank')
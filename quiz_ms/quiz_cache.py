@@ -0,0 +1,148 @@
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+
+
+class QuizCodeCache:
+    """Maps quiz codes to (quiz_id, is_active).
+
+    Codes that match no quiz are cached as negative entries with a short TTL
+    so repeated typos and guesses don't reach the database either.
+    """
+
+    def __init__(self, ttl=600, negative_ttl=30, max_entries=50000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # code -> (expires_at, quiz_id or None, is_active)
+        self.codes_by_quiz = {}       # quiz_id -> code, for invalidation by id
+        self.lock = threading.Lock()
+
+    def get(self, code):
+        """Returns (hit, quiz_id, is_active). quiz_id is None for unknown codes."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(code)
+            if entry is None:
+                return False, None, False
+            if entry[0] <= now:
+                self._drop(code)
+                return False, None, False
+            self.entries.move_to_end(code)
+            return True, entry[1], entry[2]
+
+    def put(self, code, quiz_id, is_active):
+        now = time.monotonic()
+        ttl = self.ttl if quiz_id is not None else self.negative_ttl
+        with self.lock:
+            self._drop(code)
+            self.entries[code] = (now + ttl, quiz_id, bool(is_active))
+            if quiz_id is not None:
+                self.codes_by_quiz[quiz_id] = code
+            while len(self.entries) > self.max_entries:
+                oldest = next(iter(self.entries))
+                self._drop(oldest)
+
+    def invalidate_code(self, code):
+        with self.lock:
+            self._drop(code)
+
+    def invalidate_quiz(self, quiz_id):
+        with self.lock:
+            code = self.codes_by_quiz.get(quiz_id)
+            if code is not None:
+                self._drop(code)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.codes_by_quiz.clear()
+
+    def _drop(self, code):
+        entry = self.entries.pop(code, None)
+        # The quiz may have a newer code by now, leave that one mapped
+        if entry is not None and entry[1] is not None and self.codes_by_quiz.get(entry[1]) == code:
+            del self.codes_by_quiz[entry[1]]
+
+
+class QuizContent:
+    """Everything about a quiz that is the same for every student"""
+
+    # Questions drawn per attempt, None for all. A class attribute so
+    # instances pickled in the shared cache before it existed still load.
+    draw_count = None
+
+    def __init__(self, quiz, questions, questions_html, answer_key, draw_count=None):
+        self.quiz = quiz
+        self.questions = questions
+        self.questions_html = questions_html  # one pre-rendered card per question
+        self.answer_key = answer_key          # question_id -> (correct option_id, marks)
+        self.total_marks = sum(marks for _, marks in answer_key.values())
+        if draw_count and draw_count < len(questions):
+            self.draw_count = draw_count
+        # Changes whenever anything take_quiz renders from the quiz does, so
+        # it can be used as that page's ETag together with the attempt
+        shown = [str(quiz.get(field)) for field in ('title', 'description', 'duration')]
+        shown.append(str(self.draw_count))
+        self.version = hashlib.sha256('\0'.join(shown + questions_html).encode()).hexdigest()[:16]
+
+    def draw(self, seed):
+        """Positions of the questions an attempt gets, derived from its seed alone.
+
+        The same seed always gives the same questions, so nothing about the
+        selection is stored: grading draws again from the seed.
+        """
+        if self.draw_count is None:
+            return list(range(len(self.questions)))
+        return random.Random(seed).sample(range(len(self.questions)), self.draw_count)
+
+    def marks_for(self, positions):
+        return sum(self.answer_key[self.questions[i]['id']][1] for i in positions)
+
+
+class QuizContentCache:
+    """Caches QuizContent per quiz, loading each quiz at most once at a time.
+
+    `loader(quiz_id)` returns a QuizContent or None if the quiz doesn't exist.
+    """
+
+    def __init__(self, loader, max_entries=1000):
+        self.loader = loader
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # quiz_id -> QuizContent
+        self.loading = {}             # quiz_id -> lock held while loading
+        self.lock = threading.Lock()
+
+    def get(self, quiz_id):
+        with self.lock:
+            content = self.entries.get(quiz_id)
+            if content is not None:
+                self.entries.move_to_end(quiz_id)
+                return content
+            load_lock = self.loading.setdefault(quiz_id, threading.Lock())
+
+        # When a whole class opens the quiz at once only one request loads it,
+        # the rest wait here and then read the cached copy
+        with load_lock:
+            with self.lock:
+                content = self.entries.get(quiz_id)
+            if content is None:
+                content = self.loader(quiz_id)
+                if content is not None:
+                    with self.lock:
+                        self.entries[quiz_id] = content
+                        while len(self.entries) > self.max_entries:
+                            self.entries.popitem(last=False)
+            with self.lock:
+                self.loading.pop(quiz_id, None)
+        return content
+
+    def invalidate(self, quiz_id):
+        with self.lock:
+            self.entries.pop(quiz_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets kept in a bounded LRU map"""
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = float(rate)      # tokens added per second
+        self.burst = float(burst)    # bucket capacity
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key -> [tokens, last_refill]
+        self.lock = threading.Lock()
+
+    def allow(self, key, cost=1):
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = [self.burst, now]
+                self.buckets[key] = bucket
+                if len(self.buckets) > self.max_keys:
+                    # Evict the least recently used key
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True
+            return False
+
+
+class SlidingWindowCounter:
+    """Counts events per key over the last `window` seconds.
+
+    The window is split into a fixed number of slots so recording and reading
+    a key is O(1) regardless of how many events it has seen.
+    """
+
+    def __init__(self, window, limit, slots=10, max_keys=100000):
+        self.window = float(window)
+        self.limit = limit
+        self.slots = slots
+        self.slot_width = self.window / slots
+        self.max_keys = max_keys
+        self.counters = OrderedDict()  # key -> [counts per slot, slot epochs]
+        self.lock = threading.Lock()
+
+    def _current(self, key, now):
+        epoch = int(now / self.slot_width)
+        entry = self.counters.get(key)
+        if entry is None:
+            entry = [[0] * self.slots, [epoch] * self.slots]
+            self.counters[key] = entry
+            if len(self.counters) > self.max_keys:
+                self.counters.popitem(last=False)
+        else:
+            self.counters.move_to_end(key)
+        return entry, epoch
+
+    def _total(self, entry, epoch):
+        counts, epochs = entry
+        return sum(c for c, e in zip(counts, epochs) if epoch - e < self.slots)
+
+    def record(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry, epoch = self._current(key, now)
+            counts, epochs = entry
+            i = epoch % self.slots
+            if epochs[i] != epoch:
+                # Slot belongs to an expired epoch, start it over
+                counts[i] = 0
+                epochs[i] = epoch
+            counts[i] += 1
+            return self._total(entry, epoch)
+
+    def blocked(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.counters.get(key)
+            if entry is None:
+                return False
+            return self._total(entry, int(now / self.slot_width)) >= self.limit
+
+    def reset(self, key):
+        with self.lock:
+            self.counters.pop(key, None)
+
+
+class IdempotencyStore:
+    """Remembers recently seen request keys so repeated posts are ignored"""
+
+    def __init__(self, ttl, max_keys=100000):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.entries = OrderedDict()  # key -> (expires_at, result)
+        self.lock = threading.Lock()
+
+    def begin(self, key):
+        """Claim `key`. Returns (True, None) for a new key, otherwise
+        (False, result) where result is whatever `finish` stored (None while
+        the first request is still in flight)."""
+        now = time.monotonic()
+        with self.lock:
+            # Entries are kept in insertion order, so expired ones sit at the front
+            while self.entries:
+                oldest_key, (expires_at, _) = next(iter(self.entries.items()))
+                if expires_at > now:
+                    break
+                del self.entries[oldest_key]
+
+            entry = self.entries.get(key)
+            if entry is not None:
+                return False, entry[1]
+
+            self.entries[key] = (now + self.ttl, None)
+            if len(self.entries) > self.max_keys:
+                self.entries.popitem(last=False)
+            return True, None
+
+    def finish(self, key, result):
+        with self.lock:
+            if key in self.entries:
+                expires_at, _ = self.entries[key]
+                self.entries[key] = (expires_at, result)
+
+    def discard(self, key):
+        """Forget `key`, e.g. when the request failed and may be retried"""
+        with self.lock:
+            self.entries.pop(key, None)
@@ -0,0 +1,260 @@
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+import click
+from .db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Score statistics kept per quiz, per teacher and per day, so dashboards read
+# one row instead of scanning marks. Scores are percentages of the quiz's
+# total marks so quizzes of different lengths can be combined. Each row holds
+# attempts, sum, sum of squares, min and max: enough for the mean and standard
+# deviation, and each can be updated one attempt at a time.
+#
+# table -> (key column, the key as an expression over marks m / quizzes q)
+ROLLUPS = {
+    'quiz_stats': ('quiz_id', 'm.quiz_id'),
+    'teacher_stats': ('teacher_id', 'q.teacher_id'),
+    'daily_stats': ('day', 'DATE(m.attempt_date)'),
+}
+
+SCORE = "IF(m.total_marks > 0, m.marks_obtained / m.total_marks * 100, 0)"
+
+def score_of(marks_obtained, total_marks):
+    return marks_obtained / total_marks * 100 if total_marks else 0
+
+def _add_scores(cur, table, key_sql, key_params, delta):
+    """Add a Delta of attempts to one rollup row"""
+    key_column = ROLLUPS[table][0]
+    cur.execute(f"""
+        INSERT INTO {table} ({key_column}, attempts, score_sum, score_sumsq, score_min, score_max)
+        VALUES ({key_sql}, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            attempts = attempts + VALUES(attempts),
+            score_sum = score_sum + VALUES(score_sum),
+            score_sumsq = score_sumsq + VALUES(score_sumsq),
+            score_min = LEAST(score_min, VALUES(score_min)),
+            score_max = GREATEST(score_max, VALUES(score_max))
+    """, key_params + (delta.attempts, delta.score_sum, delta.score_sumsq, delta.score_min, delta.score_max))
+
+class Delta:
+    """Attempts not yet added to a rollup row, combined"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.score_sum = self.score_sumsq = 0.0
+        self.score_min = self.score_max = None
+
+    def add(self, score):
+        self.attempts += 1
+        self.score_sum += score
+        self.score_sumsq += score * score
+        self.score_min = score if self.score_min is None else min(self.score_min, score)
+        self.score_max = score if self.score_max is None else max(self.score_max, score)
+
+    def merge(self, other):
+        if not other.attempts:
+            return
+        self.attempts += other.attempts
+        self.score_sum += other.score_sum
+        self.score_sumsq += other.score_sumsq
+        self.score_min = other.score_min if self.score_min is None else min(self.score_min, other.score_min)
+        self.score_max = other.score_max if self.score_max is None else max(self.score_max, other.score_max)
+
+def record_attempt(cur, quiz_id, student_id, marks_obtained, total_marks):
+    """Add one attempt to the quiz's rollup, on the caller's cursor (a
+    dictionary cursor) and transaction, so it always matches marks. Returns
+    the attempt's day, for queue_totals."""
+    delta = Delta()
+    delta.add(score_of(marks_obtained, total_marks))
+    _add_scores(cur, 'quiz_stats', '%s', (quiz_id,), delta)
+    # The day rebuild() files the attempt under
+    cur.execute("""
+        SELECT DATE(attempt_date) AS day FROM marks
+        WHERE student_id = %s AND quiz_id = %s
+    """, (student_id, quiz_id))
+    return cur.fetchone()['day']
+
+class TotalsQueue:
+    """Attempts waiting to be added to the teacher and daily rollups.
+
+    Every submission would otherwise update the same few rows. Each worker
+    collects the attempts here instead and a background thread adds them
+    every `interval` seconds, all rows in one transaction, so the totals
+    move together and the row locks are held once per interval rather than
+    once per submission. A flush that fails is put back and retried with
+    the next one. What is still queued when a worker dies is lost until
+    `rebuild-stats`; a worker that exits normally flushes first.
+    """
+
+    def __init__(self, interval=2):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.teachers = {}  # teacher_id -> Delta
+        self.days = {}      # day -> Delta
+        self.active = {}    # day -> set of student ids
+        self.flusher = None  # (pid, thread)
+
+    def add(self, teacher_id, student_id, day, marks_obtained, total_marks):
+        score = score_of(marks_obtained, total_marks)
+        with self.lock:
+            self.teachers.setdefault(teacher_id, Delta()).add(score)
+            self.days.setdefault(day, Delta()).add(score)
+            self.active.setdefault(day, set()).add(student_id)
+        self.start()
+
+    def start(self):
+        # Threads don't survive a fork, start one per process
+        if self.flusher is not None and self.flusher[0] == os.getpid():
+            return
+        with self.lock:
+            if self.flusher is None or self.flusher[0] != os.getpid():
+                thread = threading.Thread(target=self.flush_forever, name='flush-totals', daemon=True)
+                thread.start()
+                self.flusher = (os.getpid(), thread)
+                atexit.register(self.flush)
+
+    def flush_forever(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Error updating the score totals, retrying')
+
+    def flush(self):
+        """Add everything queued in one transaction. Returns how many attempts."""
+        with self.flush_lock:
+            with self.lock:
+                teachers, self.teachers = self.teachers, {}
+                days, self.days = self.days, {}
+                active, self.active = self.active, {}
+            if not teachers and not days:
+                return 0
+            try:
+                self._write(teachers, days, active)
+            except BaseException:
+                self._put_back(teachers, days, active)
+                raise
+            return sum(delta.attempts for delta in teachers.values())
+
+    def _write(self, teachers, days, active):
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        try:
+            # Rows in key order, so two workers flushing can't deadlock
+            for teacher_id in sorted(teachers):
+                _add_scores(cur, 'teacher_stats', '%s', (teacher_id,), teachers[teacher_id])
+            for day in sorted(days):
+                _add_scores(cur, 'daily_stats', '%s', (day,), days[day])
+                # Count each student once per day
+                students = sorted(active.get(day, ()))
+                cur.execute(f"""
+                    INSERT IGNORE INTO daily_active (day, student_id)
+                    VALUES {', '.join(['(%s, %s)'] * len(students))}
+                """, tuple(value for student_id in students for value in (day, student_id)))
+                if cur.rowcount > 0:
+                    cur.execute("""
+                        UPDATE daily_stats SET active_students = active_students + %s
+                        WHERE day = %s
+                    """, (cur.rowcount, day))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+    def _put_back(self, teachers, days, active):
+        with self.lock:
+            for pending, failed in ((self.teachers, teachers), (self.days, days)):
+                for key, delta in failed.items():
+                    pending.setdefault(key, Delta()).merge(delta)
+            for day, students in active.items():
+                self.active.setdefault(day, set()).update(students)
+
+totals = TotalsQueue()
+
+def queue_totals(teacher_id, student_id, day, marks_obtained, total_marks):
+    """Add one attempt to the teacher's and the day's rollups soon, see TotalsQueue"""
+    totals.add(teacher_id, student_id, day, marks_obtained, total_marks)
+
+def _recompute(cur, table, ids=None):
+    key_column, key = ROLLUPS[table]
+    where, params = '', ()
+    if ids is not None:
+        placeholders = ', '.join(['%s'] * len(ids))
+        where, params = f"WHERE {key} IN ({placeholders})", tuple(ids)
+        cur.execute(f"DELETE FROM {table} WHERE {key_column} IN ({placeholders})", params)
+    else:
+        cur.execute(f"DELETE FROM {table}")
+    cur.execute(f"""
+        INSERT INTO {table} ({key_column}, attempts, score_sum, score_sumsq, score_min, score_max)
+        SELECT {key}, COUNT(*), SUM({SCORE}), SUM({SCORE} * {SCORE}), MIN({SCORE}), MAX({SCORE})
+        FROM marks m
+        JOIN quizzes q ON m.quiz_id = q.id
+        {where}
+        GROUP BY {key}
+    """, params)
+
+def refresh(cur, quiz_ids=(), teacher_ids=()):
+    """Recompute the quiz and teacher rows for the given ids from marks.
+
+    Needed after marks are deleted, since a min or max can't be taken back
+    incrementally. Daily rows record what happened on the day and are only
+    recomputed by a full rebuild.
+    """
+    if quiz_ids:
+        _recompute(cur, 'quiz_stats', quiz_ids)
+    if teacher_ids:
+        _recompute(cur, 'teacher_stats', teacher_ids)
+
+def rebuild():
+    """Recompute every rollup from marks in one transaction"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        for table in ROLLUPS:
+            _recompute(cur, table)
+        cur.execute("DELETE FROM daily_active")
+        cur.execute("""
+            INSERT INTO daily_active (day, student_id)
+            SELECT DISTINCT DATE(attempt_date), student_id FROM marks
+        """)
+        cur.execute("""
+            UPDATE daily_stats d
+            JOIN (SELECT day, COUNT(*) AS students FROM daily_active GROUP BY day) a ON a.day = d.day
+            SET d.active_students = a.students
+        """)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+def summarize(row):
+    """Add mean and std to a rollup row fetched with a dictionary cursor"""
+    attempts = row.get('attempts') or 0
+    if attempts:
+        mean = row['score_sum'] / attempts
+        row['mean'] = mean
+        row['std'] = math.sqrt(max(row['score_sumsq'] / attempts - mean * mean, 0))
+    else:
+        row['mean'] = row['std'] = None
+    return row
+
+@click.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the quiz, teacher and daily statistics from marks."""
+    rebuild()
+    click.echo('Rebuilt quiz, teacher and daily statistics')
@@ -0,0 +1,161 @@
+import csv
+import io
+import click
+from .db import get_db_connection
+
+# Ids or emails per IN (...) / VALUES list
+BATCH_SIZE = 1000
+
+def chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class EmptyRosterError(ValueError):
+    """remove_missing with a roster that has no emails, which would
+    unenroll everyone. Usually a wrong file, column or encoding."""
+
+    def __init__(self):
+        super().__init__('The roster has no valid emails, refusing to unenroll every student')
+
+def read_roster(stream, filename):
+    """Student emails from an uploaded CSV or XLSX file, lower-cased, in file
+    order without repeats. Uses the column headed "email" if there is one,
+    otherwise every cell that looks like an email."""
+    if filename.lower().endswith('.xlsx'):
+        import openpyxl
+        wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = [[str(cell) if cell is not None else '' for cell in row]
+                    for row in wb.active.iter_rows(values_only=True)]
+        finally:
+            wb.close()
+    else:
+        data = stream.read()
+        text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+        rows = list(csv.reader(io.StringIO(text)))
+
+    column = None
+    if rows:
+        header = [cell.strip().lower() for cell in rows[0]]
+        if 'email' in header:
+            column = header.index('email')
+            rows = rows[1:]
+
+    emails = {}
+    for row in rows:
+        cells = [row[column]] if column is not None and column < len(row) else row
+        for cell in cells:
+            cell = cell.strip().lower()
+            if '@' in cell:
+                emails[cell] = None
+    return list(emails)
+
+def sync_roster(cur, teacher_id, emails, remove_missing=False):
+    """Make a teacher's enrollments match a list of student emails.
+
+    Emails are resolved in batched IN lookups and diffed against the
+    current enrollments, then the difference is applied with multi-row
+    INSERT and DELETE statements. Students missing from the list are only
+    unenrolled with remove_missing, which raises EmptyRosterError for an
+    empty list. Runs on the caller's cursor (a dictionary cursor) and
+    transaction. Returns a report dict with the emails added, removed and
+    unknown.
+    """
+    if remove_missing and not emails:
+        raise EmptyRosterError()
+    students = {}
+    for batch in chunks(emails):
+        placeholders = ', '.join(['%s'] * len(batch))
+        cur.execute(f"""
+            SELECT id, email FROM users
+            WHERE role = 'student' AND email IN ({placeholders})
+        """, tuple(batch))
+        for row in cur.fetchall():
+            students[row['email'].lower()] = row['id']
+    unknown = [email for email in emails if email not in students]
+
+    cur.execute("SELECT student_id FROM enrollments WHERE teacher_id = %s", (teacher_id,))
+    enrolled = {row['student_id'] for row in cur.fetchall()}
+    wanted = set(students.values())
+    to_add = [students[email] for email in emails if email in students and students[email] not in enrolled]
+    to_remove = sorted(enrolled - wanted) if remove_missing else []
+
+    # IGNORE: the student may have enrolled themselves since the diff
+    for batch in chunks(to_add):
+        cur.execute(f"""
+            INSERT IGNORE INTO enrollments (student_id, teacher_id)
+            VALUES {', '.join(['(%s, %s)'] * len(batch))}
+        """, tuple(value for student_id in batch for value in (student_id, teacher_id)))
+
+    removed = []
+    for batch in chunks(to_remove):
+        placeholders = ', '.join(['%s'] * len(batch))
+        cur.execute(f"SELECT email FROM users WHERE id IN ({placeholders})", tuple(batch))
+        removed += [row['email'] for row in cur.fetchall()]
+        cur.execute(f"""
+            DELETE FROM enrollments
+            WHERE teacher_id = %s AND student_id IN ({placeholders})
+        """, (teacher_id,) + tuple(batch))
+
+    added = set(to_add)
+    return {
+        'added': [email for email in emails if students.get(email) in added],
+        'removed': removed,
+        'unknown': unknown,
+        'unchanged': len(wanted & enrolled),
+    }
+
+def apply_roster(teacher_id, emails, remove_missing=False, dry_run=False):
+    """sync_roster in its own transaction, rolled back for a dry run"""
+    from .caches import invalidate_gradebook
+
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+
+    try:
+        report = sync_roster(cur, teacher_id, emails, remove_missing)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+    if not dry_run and (report['added'] or report['removed']):
+        invalidate_gradebook(teacher_id)
+    return report
+
+@click.command('sync-roster')
+@click.argument('teacher_email')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--remove-missing', is_flag=True, help='Also unenroll students missing from the file.')
+@click.option('--dry-run', is_flag=True, help='Report the changes without making them.')
+def sync_roster_command(teacher_email, path, remove_missing, dry_run):
+    """Enroll the students listed in a CSV or XLSX file with a teacher."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id FROM users WHERE email = %s AND role = 'teacher'", (teacher_email,))
+        teacher = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    if not teacher:
+        raise click.ClickException(f'No teacher with email {teacher_email}')
+
+    with open(path, 'rb') as f:
+        emails = read_roster(f, path)
+    try:
+        report = apply_roster(teacher[0], emails, remove_missing=remove_missing, dry_run=dry_run)
+    except EmptyRosterError as e:
+        raise click.ClickException(str(e))
+
+    verb = 'Would have added' if dry_run else 'Added'
+    click.echo(f"{verb} {len(report['added'])}, removed {len(report['removed'])}, "
+               f"{report['unchanged']} already enrolled, {len(report['unknown'])} unknown emails")
+    for email in report['unknown']:
+        click.echo(f'  unknown: {email}')
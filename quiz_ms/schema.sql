@@ -0,0 +1,93 @@
+-- Tables added on top of the original quiz_management schema.
+-- Every statement is safe to run again, apply with `flask --app app init-db`.
+
+-- The options each student chose, one byte per question in question order:
+-- the chosen option's position within the question, 255 if left blank
+CREATE TABLE IF NOT EXISTS attempt_answers (
+    quiz_id INT NOT NULL,
+    student_id INT NOT NULL,
+    answers VARBINARY(1024) NOT NULL,
+    marks_obtained INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (quiz_id, student_id)
+);
+
+-- Quizzes that give each attempt draw_count questions drawn from the whole
+-- quiz. Quizzes without a row give every question. The draw is derived from
+-- the attempt seed, so nothing per attempt is stored.
+CREATE TABLE IF NOT EXISTS quiz_settings (
+    quiz_id INT PRIMARY KEY,
+    draw_count INT NOT NULL
+);
+
+-- Score rollups kept up to date by submit_quiz, see quiz_ms/rollups.py.
+-- Rebuild them from marks with `flask --app app rebuild-stats`.
+CREATE TABLE IF NOT EXISTS quiz_stats (
+    quiz_id INT PRIMARY KEY,
+    attempts INT NOT NULL DEFAULT 0,
+    score_sum DOUBLE NOT NULL DEFAULT 0,
+    score_sumsq DOUBLE NOT NULL DEFAULT 0,
+    score_min DOUBLE,
+    score_max DOUBLE
+);
+
+CREATE TABLE IF NOT EXISTS teacher_stats (
+    teacher_id INT PRIMARY KEY,
+    attempts INT NOT NULL DEFAULT 0,
+    score_sum DOUBLE NOT NULL DEFAULT 0,
+    score_sumsq DOUBLE NOT NULL DEFAULT 0,
+    score_min DOUBLE,
+    score_max DOUBLE
+);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day DATE PRIMARY KEY,
+    attempts INT NOT NULL DEFAULT 0,
+    score_sum DOUBLE NOT NULL DEFAULT 0,
+    score_sumsq DOUBLE NOT NULL DEFAULT 0,
+    score_min DOUBLE,
+    score_max DOUBLE,
+    active_students INT NOT NULL DEFAULT 0
+);
+
+-- Students who attempted a quiz each day, for daily_stats.active_students
+CREATE TABLE IF NOT EXISTS daily_active (
+    day DATE NOT NULL,
+    student_id INT NOT NULL,
+    PRIMARY KEY (day, student_id)
+);
+
+-- Question bank, see quiz_ms/question_bank.py. Each distinct question (text,
+-- options and correct answer) is stored once and quizzes link to it.
+-- Move existing quizzes in with `flask --app app migrate-question-bank`.
+CREATE TABLE IF NOT EXISTS bank_questions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    content_hash BINARY(32) NOT NULL UNIQUE,
+    question_text TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bank_options (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    question_id INT NOT NULL,
+    position TINYINT NOT NULL,
+    text TEXT NOT NULL,
+    is_correct BOOLEAN NOT NULL DEFAULT FALSE,
+    UNIQUE KEY (question_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS quiz_questions (
+    quiz_id INT NOT NULL,
+    position SMALLINT NOT NULL,
+    question_id INT NOT NULL,
+    marks INT NOT NULL,
+    PRIMARY KEY (quiz_id, position),
+    INDEX (question_id)
+);
+
+-- One attempt per student and quiz. submit_quiz relies on it to turn a
+-- concurrent second submission into a duplicate key error. Last, so that
+-- duplicate marks rows only stop this statement; find them with
+--   SELECT student_id, quiz_id, COUNT(*) FROM marks
+--   GROUP BY student_id, quiz_id HAVING COUNT(*) > 1
+-- and remove all but one of each, then run init-db again.
+ALTER TABLE marks ADD UNIQUE KEY marks_student_quiz (student_id, quiz_id);
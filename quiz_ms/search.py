@@ -0,0 +1,163 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+
+# Words are runs of letters and digits, so an email is indexed as its parts:
+# "ana.lopez@school.org" matches "ana", "lopez" and "school"
+WORD = re.compile(r'\w+')
+
+# How much a word counts depending on where it appears
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'fullname': 3.0,
+    'subject': 2.0,
+    'email': 2.0,
+    'description': 1.0,
+    'questions': 0.5,
+}
+
+# The last word of a query also matches words it is a prefix of, up to this many
+PREFIX_EXPANSIONS = 50
+
+def tokenize(text):
+    return WORD.findall(str(text or '').lower())
+
+class SearchIndex:
+    """Inverted index over quizzes and users, updated one document at a time.
+
+    A document is (kind, id, fields, info): fields are the texts to index
+    by field name (see FIELD_WEIGHTS) and info is what a result shows.
+    Results are ranked BM25 style, each query word scoring
+    idf * weight / (weight + 1.2) with weight the sum of the field weights
+    of the places it appears, and every word has to match.
+
+    The index starts empty and is filled by load(). Changes made while it
+    loads are queued and replayed over the loaded documents, so a document
+    created or deleted during the load doesn't go missing or come back.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = {}   # term -> {(kind, id): weight}
+        self.terms = []      # sorted terms, for prefix matches
+        self.documents = {}  # (kind, id) -> (info, terms)
+        self.loaded = False
+        self.pending = None  # changes seen during load()
+        self.generation = 0  # bumped by reset()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def load(self, documents):
+        """Index an iterable of documents, replacing whatever was indexed"""
+        with self.lock:
+            self.pending = []
+            generation = self.generation
+        documents = list(documents)
+        with self.lock:
+            self.postings, self.documents = {}, {}
+            for kind, doc_id, fields, info in documents:
+                self._add((kind, doc_id), fields, info, keep_sorted=False)
+            self.terms = sorted(self.postings)
+            for key, document in self.pending:
+                self._apply(key, document)
+            self.pending = None
+            # A reset() during the load means these documents may be stale
+            self.loaded = generation == self.generation
+
+    def reset(self):
+        """Reload from the database on the next search, after bulk changes"""
+        with self.lock:
+            self.generation += 1
+            self.loaded = False
+
+    def apply(self, kind, doc_id, document=None):
+        """Add or replace a document, or remove it when document is None.
+        document is (fields, info)."""
+        with self.lock:
+            if self.loaded:
+                self._apply((kind, doc_id), document)
+            elif self.pending is not None:
+                self.pending.append(((kind, doc_id), document))
+
+    def _apply(self, key, document):
+        self._remove(key)
+        if document is not None:
+            self._add(key, *document)
+
+    def _add(self, key, fields, info, keep_sorted=True):
+        weights = {}
+        for field, text in fields.items():
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0) + FIELD_WEIGHTS[field]
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if keep_sorted:
+                    insort(self.terms, term)
+            posting[key] = weight
+        self.documents[key] = (info, tuple(weights))
+
+    def _remove(self, key):
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        for term in document[1]:
+            posting = self.postings[term]
+            del posting[key]
+            if not posting:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+
+    def _expand(self, term):
+        """The indexed terms a query term stands for, itself and longer words it starts"""
+        start = bisect_left(self.terms, term)
+        matches = []
+        for candidate in self.terms[start:start + PREFIX_EXPANSIONS]:
+            if not candidate.startswith(term):
+                break
+            matches.append(candidate)
+        return matches
+
+    def search(self, query, kinds=None, accept=None, page=1, per_page=20):
+        """One page of results for a query, best first.
+
+        kinds limits the result kinds ('quiz', 'user'), accept is an optional
+        predicate on result info for per-user scoping. Returns
+        (results, total) with results the info dicts plus a score.
+        """
+        words = tokenize(query)
+        if not words:
+            return [], 0
+        with self.lock:
+            n_documents = len(self.documents)
+            scores = None
+            for n, word in enumerate(words):
+                terms = self._expand(word) if n == len(words) - 1 else [word] if word in self.postings else []
+                word_scores = {}
+                for term in terms:
+                    posting = self.postings[term]
+                    idf = math.log(1 + (n_documents - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for key, weight in posting.items():
+                        score = idf * weight / (weight + 1.2)
+                        if score > word_scores.get(key, 0):
+                            word_scores[key] = score
+                # Every word has to match
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {key: score + word_scores[key] for key, score in scores.items() if key in word_scores}
+                if not scores:
+                    return [], 0
+
+            matches = [(score, key) for key, score in scores.items()
+                       if (kinds is None or key[0] in kinds)
+                       and (accept is None or accept(self.documents[key][0]))]
+            # Ties go to the older document
+            best = heapq.nlargest(page * per_page, matches, key=lambda match: (match[0], -match[1][1]))
+            results = [dict(self.documents[key][0], score=round(score, 3))
+                       for score, key in best[(page - 1) * per_page:]]
+        return results, len(matches)
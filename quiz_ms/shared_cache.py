@@ -0,0 +1,243 @@
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache:
+    """A cache shared by all worker processes on one machine.
+
+    Values live in a SQLite file (WAL mode, so readers never block the
+    writer). Every change is also appended to an event log that each process
+    polls, so in-process caches in front of this one can be invalidated
+    across workers. Each publish also bumps a per-key version, so a value
+    loaded before an invalidation can't be stored after it (see set()).
+    Expired entries and old events are purged every `purge_interval`
+    seconds from poll(). A process that didn't poll for longer than
+    event_ttl has missed events; poll() notices and runs the on_missed
+    handlers instead, which should drop everything cached in the process.
+    """
+
+    def __init__(self, path=None, poll_interval=0.5, event_ttl=3600, purge_interval=60):
+        self.path = path  # may be set later; nothing is opened until first use
+        self.poll_interval = poll_interval
+        self.event_ttl = event_ttl
+        self.purge_interval = purge_interval
+        self.last_purge = time.monotonic()
+        self.local = threading.local()
+        self.handlers = {}  # namespace -> callback(key, payload)
+        self.missed_handlers = []
+        self.last_event_id = None
+        self.last_poll = 0
+        self.poll_lock = threading.Lock()
+        self.schema_ready = False
+
+    def _create_schema(self, conn):
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                ns TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (ns, key)
+            );
+            CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ns TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload BLOB,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_created_at ON events (created_at);
+            CREATE TABLE IF NOT EXISTS versions (
+                ns TEXT NOT NULL,
+                key TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                updated_at REAL,
+                PRIMARY KEY (ns, key)
+            );
+        """)
+        try:
+            # Files created before versions were purged
+            conn.execute("ALTER TABLE versions ADD COLUMN updated_at REAL")
+        except sqlite3.OperationalError:
+            pass
+        conn.execute("CREATE INDEX IF NOT EXISTS versions_updated_at ON versions (updated_at)")
+
+    def _connect(self):
+        # SQLite connections must not be shared across a fork or between
+        # threads, so keep one per thread and reopen in a new process
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            if not self.schema_ready:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self.schema_ready:
+                self._create_schema(conn)
+                self.schema_ready = True
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, ns, key):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM entries WHERE ns = ? AND key = ?",
+            (ns, str(key))).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return pickle.loads(row[0])
+
+    def version(self, ns, key):
+        """How many times (ns, key) has been published, read it before loading
+        a value to set()"""
+        row = self._connect().execute(
+            "SELECT version FROM versions WHERE ns = ? AND key = ?", (ns, str(key))).fetchone()
+        return row[0] if row else 0
+
+    def set(self, ns, key, value, ttl=None, version=None):
+        """Store a value. With version (from version() before the value was
+        loaded) it is only stored if (ns, key) wasn't published since, so a
+        slow loader can't put back what another worker just invalidated."""
+        expires_at = time.time() + ttl if ttl else None
+        params = (ns, str(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at)
+        if version is None:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO entries (ns, key, value, expires_at) VALUES (?, ?, ?, ?)", params)
+        else:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO entries (ns, key, value, expires_at) SELECT ?, ?, ?, ? "
+                "WHERE COALESCE((SELECT version FROM versions WHERE ns = ? AND key = ?), 0) = ?",
+                params + (ns, str(key), version))
+
+    def set_many(self, ns, items, ttl=None):
+        """set() every (key, value) in one transaction"""
+        expires_at = time.time() + ttl if ttl else None
+        rows = [(ns, str(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at) for key, value in items]
+        if not rows:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (ns, key, value, expires_at) VALUES (?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def items(self, ns, prefix=''):
+        """(key, value) of every live entry in ns whose key starts with prefix"""
+        rows = self._connect().execute(
+            "SELECT key, value FROM entries WHERE ns = ? AND key >= ? AND key < ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (ns, prefix, prefix + '\U0010ffff', time.time())).fetchall()
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def delete(self, ns, key):
+        self._connect().execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, str(key)))
+
+    def subscribe(self, ns, handler):
+        self.handlers[ns] = handler
+
+    def on_missed(self, handler):
+        """handler() runs when events were purged before this process read them"""
+        self.missed_handlers.append(handler)
+
+    def publish(self, ns, key, payload=None):
+        """Drop the shared entry for (ns, key) and tell every process about it"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, str(key)))
+            conn.execute(
+                "INSERT INTO versions (ns, key, version, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (ns, key) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at",
+                (ns, str(key), now))
+            conn.execute(
+                "INSERT INTO events (ns, key, payload, created_at) VALUES (?, ?, ?, ?)",
+                (ns, str(key), pickle.dumps(payload) if payload is not None else None, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def purge(self):
+        """Delete expired entries, and events and versions older than event_ttl.
+
+        A version is only compared by a loader that read it moments before,
+        so once it is that old nobody is still holding it.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM events WHERE created_at < ?", (now - self.event_ttl,))
+        conn.execute("DELETE FROM versions WHERE updated_at < ?", (now - self.event_ttl,))
+
+    def _last_issued_event(self, conn):
+        # AUTOINCREMENT never reuses ids, so this is the newest event ever
+        # published, even once purged
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'").fetchone()
+        return row[0] if row else 0
+
+    def poll(self, force=False):
+        """Run subscribed handlers for events published since the last poll.
+
+        Cheap to call on every request: it hits SQLite at most once every
+        `poll_interval` seconds per process.
+        """
+        now = time.monotonic()
+        if not force and now - self.last_poll < self.poll_interval:
+            return
+        if not self.poll_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_poll = now
+            conn = self._connect()
+            if now - self.last_purge >= self.purge_interval:
+                self.last_purge = now
+                try:
+                    self.purge()
+                except sqlite3.OperationalError as e:
+                    # Busy, another worker will get to it
+                    logger.warning("Could not purge the shared cache: %s", e)
+            if self.last_event_id is None or self.local.pid != getattr(self, 'poll_pid', None):
+                # A fresh process only cares about events from now on
+                self.last_event_id = self._last_issued_event(conn)
+                self.poll_pid = self.local.pid
+                return
+            # Read before the events, so an event published in between
+            # can't look like a purged one
+            last_issued = self._last_issued_event(conn)
+            rows = conn.execute(
+                "SELECT id, ns, key, payload FROM events WHERE id > ? ORDER BY id",
+                (self.last_event_id,)).fetchall()
+            # Ids are consecutive, a hole after the last one read means
+            # events were purged before this process got to them
+            missed = rows[0][0] > self.last_event_id + 1 if rows else last_issued > self.last_event_id
+            if missed:
+                logger.warning("Missed shared cache events after %s, dropping local caches",
+                               self.last_event_id)
+                self.last_event_id = rows[0][0] - 1 if rows else last_issued
+                for handler in self.missed_handlers:
+                    try:
+                        handler()
+                    except Exception:
+                        logger.exception("Error dropping local caches")
+            for event_id, ns, key, payload in rows:
+                self.last_event_id = event_id
+                handler = self.handlers.get(ns)
+                if handler is not None:
+                    try:
+                        handler(key, pickle.loads(payload) if payload is not None else None)
+                    except Exception:
+                        logger.exception("Error handling shared cache event %s:%s", ns, key)
+        finally:
+            self.poll_lock.release()
@@ -0,0 +1,397 @@
+from flask import (Blueprint, current_app, render_template, request, redirect, url_for, flash, session, jsonify,
+                   make_response)
+from markupsafe import Markup
+import hashlib
+import hmac
+import time
+from datetime import datetime
+from .analytics import encode_answers
+from .auth import login_required, role_required
+from .caches import (ATTEMPT_DATE, attempts, invalidate_gradebook, invalidate_quiz_stats, publish_result,
+                     quiz_contents, resolve_quiz_code, share_attempts, update_search, user_document)
+from .db import get_db_connection
+from .rollups import queue_totals, record_attempt
+from .ratelimit import TokenBucketLimiter, SlidingWindowCounter, IdempotencyStore
+
+bp = Blueprint('student', __name__)
+
+# Admission control for the student quiz endpoints. All of these live in
+# process memory, are bounded in size and evict least recently used keys.
+# A whole classroom often shares one public IP, so the per-IP limits are
+# much looser than the per-user ones.
+join_user_limiter = TokenBucketLimiter(rate=0.5, burst=5)     # code entries per user
+join_ip_limiter = TokenBucketLimiter(rate=20, burst=300)      # code entries per IP
+join_user_failures = SlidingWindowCounter(window=600, limit=10)   # wrong codes per 10 minutes
+join_ip_failures = SlidingWindowCounter(window=600, limit=200)
+submit_limiter = TokenBucketLimiter(rate=0.2, burst=3)        # quiz submissions per user
+submissions = IdempotencyStore(ttl=3600)
+
+def client_ip():
+    return request.remote_addr or 'unknown'
+
+def attempt_seed(quiz_id):
+    """Stable per-student, per-quiz seed used to shuffle questions and options"""
+    message = f"{session['user_id']}:{quiz_id}".encode()
+    return hmac.new(current_app.config['SECRET_KEY'].encode(), message, hashlib.sha256).hexdigest()
+
+@bp.route('/student/dashboard')
+@login_required
+@role_required(['student'])
+def student_dashboard():
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    # Get available quizzes from enrolled teachers
+    cur.execute("""
+        SELECT q.*, u.fullname as teacher_name, 
+               CASE WHEN m.id IS NOT NULL THEN TRUE ELSE FALSE END as attempted
+        FROM quizzes q
+        JOIN users u ON q.teacher_id = u.id
+        JOIN enrollments e ON q.teacher_id = e.teacher_id
+        LEFT JOIN marks m ON q.id = m.quiz_id AND m.student_id = %s
+        WHERE e.student_id = %s AND q.is_active = TRUE
+        ORDER BY q.created_at DESC
+    """, (session['user_id'], session['user_id']))
+    available_quizzes = cur.fetchall()
+    
+    # Get student's marks with rankings
+    cur.execute("""
+        SELECT m.*, q.title as quiz_title,
+               RANK() OVER (PARTITION BY m.quiz_id ORDER BY m.marks_obtained DESC) as rank
+        FROM marks m
+        JOIN quizzes q ON m.quiz_id = q.id
+        WHERE m.student_id = %s
+        ORDER BY m.attempt_date DESC
+    """, (session['user_id'],))
+    marks = cur.fetchall()
+    
+    # Get available teachers
+    cur.execute("""
+        SELECT u.*, 
+               CASE WHEN e.id IS NOT NULL THEN TRUE ELSE FALSE END as is_enrolled
+        FROM users u
+        LEFT JOIN enrollments e ON u.id = e.teacher_id AND e.student_id = %s
+        WHERE u.role = 'teacher'
+    """, (session['user_id'],))
+    available_teachers = cur.fetchall()
+    
+    # Get enrolled teachers
+    cur.execute("""
+        SELECT u.*, e.created_at as enrollment_date
+        FROM users u
+        JOIN enrollments e ON u.id = e.teacher_id
+        WHERE e.student_id = %s
+    """, (session['user_id'],))
+    enrolled_teachers = cur.fetchall()
+    
+    cur.close()
+    conn.close()
+    
+    return render_template('student_dashboard.html',
+                         available_quizzes=available_quizzes,
+                         marks=marks,
+                         available_teachers=available_teachers,
+                         enrolled_teachers=enrolled_teachers)
+
+@bp.route('/enroll_teacher', methods=['POST'])
+@login_required
+@role_required(['student'])
+def enroll_teacher():
+    teacher_id = request.form.get('teacher_id')
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+            INSERT INTO enrollments (student_id, teacher_id)
+            VALUES (%s, %s)
+        """, (session['user_id'], teacher_id))
+        conn.commit()
+        invalidate_gradebook(teacher_id)
+        flash('Successfully enrolled with teacher', 'success')
+    except Exception as e:
+        print(e)
+        conn.rollback()
+        from mysql.connector import errorcode
+        if getattr(e, 'errno', None) == errorcode.ER_DUP_ENTRY:
+            flash('You are already enrolled with this teacher', 'error')
+        else:
+            flash('Error enrolling with teacher', 'error')
+    finally:
+        cur.close()
+        conn.close()
+    
+    return redirect(url_for('student.student_dashboard'))
+
+@bp.route('/join_quiz', methods=['POST'])
+@login_required
+@role_required(['student'])
+def join_quiz():
+    quiz_code = request.form.get('quiz_code')
+    user_key = f"user:{session['user_id']}"
+    ip_key = f"ip:{client_ip()}"
+    
+    # Reject code guessing before it reaches the database
+    if join_user_failures.blocked(user_key) or join_ip_failures.blocked(ip_key):
+        flash('Too many invalid quiz codes. Please try again later.', 'error')
+        return redirect(url_for('student.student_dashboard'))
+    if not (join_user_limiter.allow(user_key) and join_ip_limiter.allow(ip_key)):
+        flash('Too many attempts. Please slow down.', 'error')
+        return redirect(url_for('student.student_dashboard'))
+    
+    quiz_id, is_active = resolve_quiz_code(quiz_code)
+    
+    if quiz_id is not None and is_active:
+        return redirect(url_for('student.take_quiz', quiz_id=quiz_id))
+    else:
+        join_user_failures.record(user_key)
+        join_ip_failures.record(ip_key)
+        flash('Invalid or expired quiz code', 'error')
+        return redirect(url_for('student.student_dashboard'))
+
+@bp.route('/take_quiz/<int:quiz_id>')
+@login_required
+@role_required(['student'])
+def take_quiz(quiz_id):
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    try:
+        # Check if student has already attempted this quiz
+        cur.execute("""
+            SELECT id FROM marks 
+            WHERE student_id = %s AND quiz_id = %s
+        """, (session['user_id'], quiz_id))
+        attempted = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    
+    if attempted:
+        flash('You have already attempted this quiz', 'error')
+        return redirect(url_for('student.student_dashboard'))
+    
+    content = quiz_contents.get(quiz_id)
+    if not content or not content.quiz['is_active']:
+        flash('Quiz not found or inactive', 'error')
+        return redirect(url_for('student.student_dashboard'))
+    
+    quiz = content.quiz
+    
+    # Keep the original start time so reloading the page doesn't reset the timer
+    started = session.get('quiz_started', {})
+    if str(quiz_id) not in started:
+        started[str(quiz_id)] = int(time.time())
+        session['quiz_started'] = started
+    deadline = started[str(quiz_id)] + quiz['duration'] * 60
+    
+    attempts.start(quiz_id, session['user_id'], session.get('fullname'), started[str(quiz_id)], deadline)
+    share_attempts()
+    
+    seed = attempt_seed(quiz_id)
+    # Quizzes with a pool show only this attempt's draw from it
+    drawn = content.draw(int(seed, 16))
+    
+    # The page only depends on the quiz, this student's seed and the
+    # deadline, so a reload while nothing changed is answered with a 304
+    etag = f'{content.version}-{seed[:16]}-{deadline}'
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render_template('take_quiz.html',
+                                                 quiz=quiz,
+                                                 questions_html=Markup(''.join(content.questions_html[i] for i in drawn)),
+                                                 question_count=len(drawn),
+                                                 total_marks=content.marks_for(drawn),
+                                                 deadline=deadline,
+                                                 shuffle_seed=int(seed[:8], 16),
+                                                 attempt_key=seed[:32]))
+    response.set_etag(etag)
+    # Per student, and always checked with the server
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@bp.route('/quiz_heartbeat/<int:quiz_id>', methods=['POST'])
+@login_required
+@role_required(['student'])
+def quiz_heartbeat(quiz_id):
+    """Sent by take_quiz every few seconds while the quiz is open"""
+    started = session.get('quiz_started', {}).get(str(quiz_id))
+    content = quiz_contents.get(quiz_id)
+    if started is None or not content:
+        return jsonify({'success': False}), 404
+    
+    answered = request.form.get('answered', type=int)
+    if not attempts.heartbeat(quiz_id, session['user_id'], answered):
+        # Started in another worker, or this one forgot it
+        deadline = started + content.quiz['duration'] * 60
+        attempts.start(quiz_id, session['user_id'], session.get('fullname'), started, deadline)
+        attempts.heartbeat(quiz_id, session['user_id'], answered)
+    share_attempts()
+    return jsonify({'success': True})
+
+@bp.route('/submit_quiz/<int:quiz_id>', methods=['POST'])
+@login_required
+@role_required(['student'])
+def submit_quiz(quiz_id):
+    # Double posts (resubmits, impatient clicks) share the same key and are
+    # dropped here instead of creating duplicate marks
+    submission_key = request.form.get('idempotency_key') or f"{session['user_id']}:{quiz_id}"
+    submission_key = f"{session['user_id']}:{quiz_id}:{submission_key}"
+    is_new, previous = submissions.begin(submission_key)
+    if not is_new:
+        # (message, category) of the first post
+        message, category = previous or ('Your submission is already being processed', 'success')
+        flash(message, category)
+        return redirect(url_for('student.student_dashboard'))
+    
+    if not submit_limiter.allow(f"user:{session['user_id']}"):
+        submissions.discard(submission_key)
+        flash('Too many submissions. Please wait a moment and try again.', 'error')
+        return redirect(url_for('student.student_dashboard'))
+    
+    content = quiz_contents.get(quiz_id)
+    if not content:
+        submissions.discard(submission_key)
+        flash('Quiz not found', 'error')
+        return redirect(url_for('student.student_dashboard'))
+    
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    recorded = False
+    
+    try:
+        # Another worker may already have recorded this attempt
+        cur.execute("""
+            SELECT id FROM marks 
+            WHERE student_id = %s AND quiz_id = %s
+        """, (session['user_id'], quiz_id))
+        if cur.fetchone():
+            message = 'You have already attempted this quiz'
+            submissions.finish(submission_key, (message, 'error'))
+            flash(message, 'error')
+            return redirect(url_for('student.student_dashboard'))
+        
+        # Draw the same questions the page showed and grade them from the
+        # cached answer key, answers to anything else are ignored
+        drawn = content.draw(int(attempt_seed(quiz_id), 16))
+        marks_obtained = 0
+        for i in drawn:
+            question_id = content.questions[i]['id']
+            correct_option_id, marks = content.answer_key[question_id]
+            selected_option_id = request.form.get(f"question_{question_id}")
+            if selected_option_id and selected_option_id == str(correct_option_id):
+                marks_obtained += marks
+        total_marks = content.marks_for(drawn)
+        
+        # Save marks
+        cur.execute("""
+            INSERT INTO marks (student_id, quiz_id, marks_obtained, total_marks)
+            VALUES (%s, %s, %s, %s)
+        """, (session['user_id'], quiz_id, marks_obtained, total_marks))
+        
+        # Keep the chosen options for the question statistics
+        cur.execute("""
+            INSERT INTO attempt_answers (quiz_id, student_id, answers, marks_obtained)
+            VALUES (%s, %s, %s, %s)
+        """, (quiz_id, session['user_id'], encode_answers(content.questions, request.form, drawn), marks_obtained))
+        
+        day = record_attempt(cur, quiz_id, session['user_id'], marks_obtained, total_marks)
+        
+        conn.commit()
+        recorded = True
+        message = f'Quiz submitted successfully! You scored {marks_obtained}/{total_marks}'
+        submissions.finish(submission_key, (message, 'success'))
+        flash(message, 'success')
+        
+    except Exception as e:
+        print(e)
+        conn.rollback()
+        from mysql.connector import errorcode
+        if getattr(e, 'errno', None) == errorcode.ER_DUP_ENTRY:
+            # Another tab or worker recorded this attempt after our check
+            message = 'You have already attempted this quiz'
+            submissions.finish(submission_key, (message, 'error'))
+            flash(message, 'error')
+        else:
+            submissions.discard(submission_key)
+            flash('Error submitting quiz', 'error')
+        
+    finally:
+        cur.close()
+        conn.close()
+    
+    if recorded:
+        started = session.get('quiz_started', {}).pop(str(quiz_id), None) or int(time.time())
+        session.modified = True
+        # The attempt is saved, a cache or broadcast failing only leaves
+        # a view stale for a while
+        try:
+            queue_totals(content.quiz['teacher_id'], session['user_id'], day, marks_obtained, total_marks)
+            invalidate_quiz_stats(quiz_id)
+            invalidate_gradebook(content.quiz['teacher_id'])
+            publish_result(quiz_id, session['user_id'], {
+                'student_id': session['user_id'],
+                'student_name': session.get('fullname'),
+                'marks_obtained': marks_obtained,
+                'total_marks': total_marks,
+                'attempt_date': datetime.now().strftime(ATTEMPT_DATE),
+            })
+            attempts.submit(quiz_id, session['user_id'], session.get('fullname'),
+                            started, started + content.quiz['duration'] * 60)
+            share_attempts()
+        except Exception:
+            current_app.logger.exception('Error updating caches after quiz %s was submitted', quiz_id)
+    
+    return redirect(url_for('student.student_dashboard'))
+
+@bp.route('/update_profile', methods=['POST'])
+@login_required
+def update_profile():
+    fullname = request.form.get('fullname')
+    email = request.form.get('email')
+    new_password = request.form.get('new_password')
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        if new_password:
+            hashed_password = hashlib.sha256(new_password.encode()).hexdigest()
+            cur.execute("""
+                UPDATE users 
+                SET fullname = %s, email = %s, password = %s 
+                WHERE id = %s
+            """, (fullname, email, hashed_password, session['user_id']))
+        else:
+            cur.execute("""
+                UPDATE users 
+                SET fullname = %s, email = %s 
+                WHERE id = %s
+            """, (fullname, email, session['user_id']))
+        
+        # Gradebooks that show this student's name
+        cur.execute("SELECT teacher_id FROM enrollments WHERE student_id = %s", (session['user_id'],))
+        teacher_ids = [row[0] for row in cur.fetchall()]
+        
+        conn.commit()
+        for teacher_id in teacher_ids:
+            invalidate_gradebook(teacher_id)
+        update_search('user', session['user_id'], user_document(
+            {'id': session['user_id'], 'fullname': fullname, 'email': email, 'role': session['role']}))
+        session['fullname'] = fullname
+        session['email'] = email
+        flash('Profile updated successfully', 'success')
+        
+    except Exception as e:
+        print(e)
+        conn.rollback()
+        flash('Error updating profile', 'error')
+        
+    finally:
+        cur.close()
+        conn.close()
+    
+    return redirect(url_for('student.student_dashboard'))
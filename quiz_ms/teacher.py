@@ -0,0 +1,370 @@
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, session, jsonify
+import random
+import string
+import time
+from .auth import login_required, role_required
+from .caches import (attempt_report, get_search_index, gradebooks, invalidate_gradebook, invalidate_quiz_code,
+                     live_results, quiz_contents, quiz_document, quiz_stats, shared_cache, update_search)
+from .db import get_db_connection
+from .live import TooManySubscribers, sse
+from .question_bank import DuplicateQuestionError, link_questions
+from .roster import EmptyRosterError, apply_roster, read_roster
+
+bp = Blueprint('teacher', __name__)
+
+def generate_quiz_code():
+    """Generate a random 6-character quiz code"""
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+
+@bp.route('/teacher/dashboard')
+@login_required
+@role_required(['teacher'])
+def teacher_dashboard():
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    # Get teacher's quizzes
+    cur.execute("""
+        SELECT * FROM quizzes 
+        WHERE teacher_id = %s 
+        ORDER BY created_at DESC
+    """, (session['user_id'],))
+    quizzes = cur.fetchall()
+    
+    # Get enrolled students
+    cur.execute("""
+        SELECT u.*, e.created_at as enrollment_date
+        FROM users u
+        JOIN enrollments e ON u.id = e.student_id
+        WHERE e.teacher_id = %s
+        ORDER BY e.created_at DESC
+    """, (session['user_id'],))
+    enrolled_students = cur.fetchall()
+    
+    cur.close()
+    conn.close()
+    
+    return render_template('teacher_dashboard.html',
+                         quizzes=quizzes,
+                         enrolled_students=enrolled_students)
+
+@bp.route('/create_quiz', methods=['POST'])
+@login_required
+@role_required(['teacher'])
+def create_quiz():
+    if request.method == 'POST':
+        title = request.form['title']
+        subject = request.form['subject']
+        duration = request.form['duration']
+        description = request.form['description']
+        draw_count = request.form.get('draw_count', type=int)
+        
+        conn = get_db_connection()
+        cur = conn.cursor(dictionary=True)
+        
+        try:
+            # Generate unique quiz code
+            while True:
+                quiz_code = generate_quiz_code()
+                cur.execute("SELECT id FROM quizzes WHERE code = %s", (quiz_code,))
+                if not cur.fetchone():
+                    break
+            
+            # Create quiz
+            cur.execute("""
+                INSERT INTO quizzes (title, subject, description, duration, code, teacher_id)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (title, subject, description, duration, quiz_code, session['user_id']))
+            
+            quiz_id = cur.lastrowid
+            
+            # Process questions
+            questions = []
+            i = 0
+            while f'questions[{i}][text]' in request.form:
+                question_text = request.form[f'questions[{i}][text]']
+                marks = request.form[f'questions[{i}][marks]']
+                correct_option = int(request.form[f'questions[{i}][correct]'])
+                options = [request.form[f'questions[{i}][options][{j}][text]'] for j in range(4)]
+                questions.append((question_text, marks, options, correct_option))
+                i += 1
+            
+            # Questions already in the bank are linked, not copied
+            link_questions(cur, quiz_id, questions)
+            
+            # Only a real subset makes a pool, otherwise everyone gets every question
+            if draw_count and 0 < draw_count < len(questions):
+                cur.execute("""
+                    INSERT INTO quiz_settings (quiz_id, draw_count)
+                    VALUES (%s, %s)
+                """, (quiz_id, draw_count))
+            
+            conn.commit()
+            # Drop any cached "invalid code" entry for the new code
+            invalidate_quiz_code(quiz_code)
+            invalidate_gradebook(session['user_id'])
+            update_search('quiz', quiz_id, quiz_document(
+                {'id': quiz_id, 'title': title, 'subject': subject, 'description': description,
+                 'code': quiz_code, 'teacher_id': session['user_id'], 'teacher_name': session.get('fullname')},
+                [question[0] for question in questions]))
+            flash('Quiz created successfully', 'success')
+            
+        except DuplicateQuestionError as e:
+            conn.rollback()
+            flash(f'{e}, remove one of them and create the quiz again', 'error')
+            
+        except Exception as e:
+            print(e)
+            conn.rollback()
+            flash('Error creating quiz', 'error')
+            
+        finally:
+            cur.close()
+            conn.close()
+        
+        return redirect(url_for('teacher.teacher_dashboard'))
+
+@bp.route('/view_quiz_results/<int:quiz_id>')
+@login_required
+@role_required(['teacher'])
+def view_quiz_results(quiz_id):
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    # Verify quiz belongs to teacher
+    cur.execute("""
+        SELECT * FROM quizzes 
+        WHERE id = %s AND teacher_id = %s
+    """, (quiz_id, session['user_id']))
+    quiz = cur.fetchone()
+    
+    if not quiz:
+        flash('Quiz not found', 'error')
+        return redirect(url_for('teacher.teacher_dashboard'))
+    
+    # Get quiz results
+    cur.execute("""
+        SELECT m.*, u.fullname as student_name,
+               RANK() OVER (ORDER BY m.marks_obtained DESC) as rank
+        FROM marks m
+        JOIN users u ON m.student_id = u.id
+        WHERE m.quiz_id = %s
+        ORDER BY m.marks_obtained DESC
+    """, (quiz_id,))
+    results = cur.fetchall()
+    
+    cur.close()
+    conn.close()
+    
+    return render_template('quiz_results.html', quiz=quiz, results=results,
+                         stats=quiz_stats.get(quiz_id))
+
+# An open stream holds a worker thread, so each one ends after a while and
+# the browser reconnects (to the in-memory leaderboard, not the database)
+LIVE_STREAM_SECONDS = 300
+LIVE_KEEPALIVE_SECONDS = 15
+
+@bp.route('/live_results/<int:quiz_id>')
+@login_required
+@role_required(['teacher'])
+def live_quiz_results(quiz_id):
+    """Server-sent events: the leaderboard, then every new result as it comes in"""
+    content = quiz_contents.get(quiz_id)
+    if not content or content.quiz['teacher_id'] != session['user_id']:
+        return jsonify({'success': False, 'message': 'Quiz not found'}), 404
+    
+    try:
+        subscriber, leaderboard = live_results.subscribe(quiz_id)
+    except TooManySubscribers:
+        # The page tries again later, other requests need the threads
+        return Response('Too many live results streams', status=503, headers={'Retry-After': '30'})
+    
+    def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            yield sse('leaderboard', leaderboard)
+            ends = time.monotonic() + LIVE_STREAM_SECONDS
+            quiet = 0
+            while time.monotonic() < ends and not subscriber.dropped:
+                # Results from other workers arrive through the shared cache
+                shared_cache.poll()
+                event = subscriber.get(timeout=1)
+                if event is not None:
+                    quiet = 0
+                    yield sse('result', event)
+                else:
+                    quiet += 1
+                    if quiet >= LIVE_KEEPALIVE_SECONDS:
+                        quiet = 0
+                        yield ': keepalive\n\n'
+        finally:
+            live_results.unsubscribe(quiz_id, subscriber)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/proctoring/<int:quiz_id>')
+@login_required
+@role_required(['teacher'])
+def proctoring(quiz_id):
+    """Who is taking a quiz right now, from memory: no database queries"""
+    content = quiz_contents.get(quiz_id)
+    if not content or content.quiz['teacher_id'] != session['user_id']:
+        return jsonify({'success': False, 'message': 'Quiz not found'}), 404
+    
+    counts, attempts = attempt_report(quiz_id)
+    return jsonify({'success': True, 'counts': counts, 'attempts': attempts})
+
+@bp.route('/quiz_analytics/<int:quiz_id>')
+@login_required
+@role_required(['teacher'])
+def quiz_analytics(quiz_id):
+    """Per-question difficulty, discrimination and option counts as JSON"""
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    cur.execute("""
+        SELECT id FROM quizzes 
+        WHERE id = %s AND teacher_id = %s
+    """, (quiz_id, session['user_id']))
+    quiz = cur.fetchone()
+    
+    cur.close()
+    conn.close()
+    
+    stats = quiz_stats.get(quiz_id) if quiz else None
+    if not stats:
+        return jsonify({'success': False, 'message': 'Quiz not found'}), 404
+    return jsonify({'success': True, 'stats': stats.to_dict()})
+
+@bp.route('/teacher/gradebook')
+@login_required
+@role_required(['teacher'])
+def gradebook():
+    per_page = 50
+    book = gradebooks.get(session['user_id'])
+    page = min(max(request.args.get('page', 1, type=int), 1), book.pages(per_page))
+    
+    return render_template('gradebook.html',
+                         quizzes=book.quiz_summary(),
+                         rows=book.page(page, per_page),
+                         page=page,
+                         pages=book.pages(per_page),
+                         student_count=len(book))
+
+@bp.route('/teacher/search')
+@login_required
+@role_required(['teacher'])
+def search():
+    """Search the teacher's own quizzes and enrolled students, as JSON"""
+    per_page = 20
+    page = max(request.args.get('page', 1, type=int), 1)
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    cur.execute("SELECT student_id FROM enrollments WHERE teacher_id = %s", (session['user_id'],))
+    students = {row[0] for row in cur.fetchall()}
+    
+    cur.close()
+    conn.close()
+    
+    def accept(info):
+        if info['kind'] == 'quiz':
+            return info['teacher_id'] == session['user_id']
+        return info['id'] in students
+    
+    results, total = get_search_index().search(request.args.get('q', ''), accept=accept,
+                                               page=page, per_page=per_page)
+    return jsonify({'success': True, 'results': results, 'total': total,
+                    'page': page, 'pages': max(1, -(-total // per_page))})
+
+@bp.route('/teacher/roster', methods=['POST'])
+@login_required
+@role_required(['teacher'])
+def sync_roster():
+    """Enroll the students in an uploaded CSV / XLSX of emails, as JSON.
+    With remove_missing, students not on the list are unenrolled."""
+    roster = request.files.get('roster')
+    if not roster or not roster.filename:
+        return jsonify({'success': False, 'message': 'Choose a CSV or XLSX file of student emails'}), 400
+    
+    try:
+        emails = read_roster(roster.stream, roster.filename)
+    except Exception as e:
+        print(e)
+        return jsonify({'success': False, 'message': 'Could not read the file'}), 400
+    
+    try:
+        report = apply_roster(session['user_id'], emails,
+                              remove_missing=request.form.get('remove_missing') == 'on')
+    except EmptyRosterError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(e)
+        return jsonify({'success': False, 'message': 'Error updating enrollments'}), 500
+    
+    return jsonify({'success': True, **report})
+
+@bp.route('/remove_student/<int:student_id>')
+@login_required
+@role_required(['teacher'])
+def remove_student(student_id):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    
+    try:
+        cur.execute("""
+            DELETE FROM enrollments 
+            WHERE student_id = %s AND teacher_id = %s
+        """, (student_id, session['user_id']))
+        conn.commit()
+        invalidate_gradebook(session['user_id'])
+        flash('Student removed successfully', 'success')
+    except Exception as e:
+        print(e)
+        conn.rollback()
+        flash('Error removing student', 'error')
+    finally:
+        cur.close()
+        conn.close()
+    
+    return redirect(url_for('teacher.teacher_dashboard'))
+
+@bp.route('/view_student_performance/<int:student_id>')
+@login_required
+@role_required(['teacher'])
+def view_student_performance(student_id):
+    conn = get_db_connection()
+    cur = conn.cursor(dictionary=True)
+    
+    # Verify student is enrolled with teacher
+    cur.execute("""
+        SELECT * FROM enrollments 
+        WHERE student_id = %s AND teacher_id = %s
+    """, (student_id, session['user_id']))
+    if not cur.fetchone():
+        flash('Student not found', 'error')
+        return redirect(url_for('teacher.teacher_dashboard'))
+    
+    # Get student details
+    cur.execute("SELECT * FROM users WHERE id = %s", (student_id,))
+    student = cur.fetchone()
+    
+    # Get student's performance in teacher's quizzes
+    cur.execute("""
+        SELECT m.*, q.title as quiz_title,
+               RANK() OVER (PARTITION BY m.quiz_id ORDER BY m.marks_obtained DESC) as rank
+        FROM marks m
+        JOIN quizzes q ON m.quiz_id = q.id
+        WHERE m.student_id = %s AND q.teacher_id = %s
+        ORDER BY m.attempt_date DESC
+    """, (student_id, session['user_id']))
+    performance = cur.fetchall()
+    
+    cur.close()
+    conn.close()
+    
+    return render_template('student_performance.html', 
+                         student=student, 
+                         performance=performance)
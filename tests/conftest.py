@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Run from the repository root without installing anything, like the benchmarks
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from quiz_ms.analytics import NOT_DRAWN, UNANSWERED, QuizStats, encode_answers, question_stats
+from quiz_ms.quiz_cache import QuizContent
+
+QUESTIONS = [
+    {'id': 11, 'question_text': 'One', 'options': [{'id': 101, 'text': 'a'}, {'id': 102, 'text': 'b'}]},
+    {'id': 12, 'question_text': 'Two', 'options': [{'id': 103, 'text': 'a'}, {'id': 104, 'text': 'b'},
+                                                   {'id': 105, 'text': 'c'}]},
+    {'id': 13, 'question_text': 'Three', 'options': [{'id': 106, 'text': 'a'}, {'id': 107, 'text': 'b'}]},
+]
+
+
+def test_encode_answers_positions_and_blanks():
+    form = {'question_11': '102', 'question_12': '999', 'question_13': '106'}
+    assert encode_answers(QUESTIONS, form) == bytes([1, UNANSWERED, 0])
+    assert encode_answers(QUESTIONS, {}) == bytes([UNANSWERED] * 3)
+
+
+def test_encode_answers_marks_questions_not_drawn():
+    form = {'question_11': '102', 'question_12': '104', 'question_13': '106'}
+    assert encode_answers(QUESTIONS, form, drawn=[2, 0]) == bytes([1, NOT_DRAWN, 0])
+
+
+def test_p_values_and_point_biserial():
+    answers = np.array([[0, 1], [0, 0], [1, 1], [0, 2], [1, UNANSWERED]], dtype=np.uint8)
+    scores = [2, 1, 1, 1, 0]
+    stats = question_stats(answers, scores, key=[0, 1], total_marks=2, n_options=3)
+
+    assert stats['attempts'] == 5
+    assert stats['mean'] == pytest.approx(1.0)
+    assert list(stats['drawn']) == [5, 5]
+    assert stats['p_values'] == pytest.approx([0.6, 0.4])
+    # Point-biserial is the Pearson correlation of right / wrong with the score
+    for question in range(2):
+        right = (answers[:, question] == [0, 1][question]).astype(float)
+        expected = np.corrcoef(right, scores)[0, 1]
+        assert stats['discrimination'][question] == pytest.approx(expected)
+    assert stats['option_counts'].tolist() == [[3, 2, 0, 0], [1, 2, 1, 1]]
+    assert stats['histogram'].tolist() == [1, 4]
+
+
+def test_question_everyone_gets_right():
+    answers = np.array([[0, 0], [0, 1]], dtype=np.uint8)
+    stats = question_stats(answers, [2, 1], key=[0, 0], total_marks=2, n_options=2)
+    assert stats['p_values'].tolist() == [1.0, 0.5]
+    # No spread between right and wrong, reported as 0 rather than NaN
+    assert stats['discrimination'][0] == 0.0
+    assert stats['discrimination'][1] == pytest.approx(1.0)
+
+
+def test_nobody_drew_question():
+    answers = np.array([[0, NOT_DRAWN], [0, NOT_DRAWN]], dtype=np.uint8)
+    stats = question_stats(answers, [1, 1], key=[0, 0], total_marks=1, n_options=2)
+    assert stats['drawn'].tolist() == [2, 0]
+    assert stats['p_values'].tolist() == [1.0, 0.0]
+    assert stats['discrimination'].tolist() == [0.0, 0.0]
+
+
+def test_pool_questions_measured_over_attempts_that_drew_them():
+    answers = np.array([[0, NOT_DRAWN], [1, NOT_DRAWN], [NOT_DRAWN, 0], [NOT_DRAWN, 0]], dtype=np.uint8)
+    stats = question_stats(answers, [1, 0, 1, 1], key=[0, 0], total_marks=1, n_options=2)
+    assert stats['drawn'].tolist() == [2, 2]
+    assert stats['p_values'].tolist() == [0.5, 1.0]
+    assert stats['option_counts'].tolist() == [[1, 1, 0], [2, 0, 0]]
+
+
+def test_quiz_stats_lines_up_attempts_with_questions():
+    content = QuizContent({'id': 1}, QUESTIONS, ['', '', ''], {11: (101, 1), 12: (104, 2), 13: (107, 1)})
+    rows = [
+        (encode_answers(QUESTIONS, {'question_11': '101', 'question_12': '104', 'question_13': '107'}), 4),
+        (encode_answers(QUESTIONS, {'question_11': '102', 'question_12': '104'}), 2),
+        (b'\x00\x00', 1),  # recorded before a question was added, left out
+    ]
+    stats = QuizStats(content, rows).to_dict()
+    assert stats['attempts'] == 2
+    assert stats['mean'] == 3
+    first, second, third = stats['questions']
+    assert [first['p_value'], second['p_value'], third['p_value']] == [0.5, 1.0, 0.5]
+    assert [option['correct'] for option in second['options']] == [False, True, False]
+    assert third['unanswered'] == 1
+    assert sum(bucket['count'] for bucket in stats['histogram']) == 2
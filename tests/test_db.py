@@ -0,0 +1,49 @@
+import click
+import pytest
+from mysql.connector import errorcode, errors
+
+from quiz_ms import db
+
+
+class SchemaDb:
+    def __init__(self, fail_with=None):
+        self.statements = []
+        self.fail_with = fail_with
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        if statement.startswith('ALTER TABLE marks') and self.fail_with:
+            raise errors.IntegrityError(msg='Duplicate entry', errno=self.fail_with)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+
+def test_init_db_applies_every_statement(monkeypatch):
+    conn = SchemaDb()
+    monkeypatch.setattr(db, 'get_db_connection', lambda: conn)
+    assert db.init_db() == len(conn.statements)
+    assert conn.statements[-1].startswith('ALTER TABLE marks ADD UNIQUE KEY')
+    assert all(statement.startswith('CREATE') for statement in conn.statements[:-1])
+
+
+def test_init_db_again_with_the_key_in_place(monkeypatch):
+    conn = SchemaDb(fail_with=errorcode.ER_DUP_KEYNAME)
+    monkeypatch.setattr(db, 'get_db_connection', lambda: conn)
+    db.init_db()
+    assert conn.commits == 1
+
+
+def test_init_db_with_duplicate_marks_creates_the_tables_first(monkeypatch):
+    conn = SchemaDb(fail_with=errorcode.ER_DUP_ENTRY)
+    monkeypatch.setattr(db, 'get_db_connection', lambda: conn)
+    with pytest.raises(click.ClickException, match='duplicate marks'):
+        db.init_db()
+    assert sum(statement.startswith('CREATE TABLE') for statement in conn.statements) > 5
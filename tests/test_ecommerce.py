@@ -0,0 +1,312 @@
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+import pytest
+
+from ecommerce import batch, pricing
+from ecommerce.analytics import OrderBook
+from ecommerce.batch import run_batch
+from ecommerce.pricing import DEFAULT_RULES, PricingEngine, Rule, load_rules, save_rules
+from project import Customer, ECommerceSystem, Order, OrderError, Product
+
+
+@pytest.fixture
+def system(tmp_path):
+    system = ECommerceSystem(*(str(tmp_path / name) for name in
+                               ('products.xlsx', 'customers.xlsx', 'orders.xlsx', 'journal')),
+                             pricing_file=str(tmp_path / 'pricing.json'))
+    system.add_product(Product('P1', 'Kettle', 20, 5))
+    system.add_product(Product('P2', 'Lamp', 15, 1))
+    system.add_customer(Customer('C1', 'Ada', 'ada@example.com'))
+    return system
+
+
+def reopen(system):
+    system.journal.close()
+    return ECommerceSystem(system.products_file, system.customers_file, system.orders_file,
+                           system.journal.path, pricing_file=system.pricing_file)
+
+
+def test_saved_changes_are_replayed(system):
+    system.save_data()
+    assert system.dirty == set()
+    loaded = reopen(system)
+    assert {p.product_id: p.stock for p in loaded.products.values()} == {'P1': 5, 'P2': 1}
+    assert loaded.customers['C1'].email == 'ada@example.com'
+
+
+def test_failed_save_keeps_changes(system, monkeypatch):
+    def fail(records):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(system.journal, 'append', fail)
+    system.save_data()
+    assert system.dirty == {('product', 'P1'), ('product', 'P2'), ('customer', 'C1')}
+    monkeypatch.undo()
+    system.save_data()
+    assert system.dirty == set()
+    assert os.path.getsize(system.journal.path) > 0
+
+
+def stock(system):
+    return {p.product_id: p.stock for p in system.products.values()}
+
+
+def test_place_order_takes_stock(system):
+    order = system.place_order('C1', [('P1', 2), ('P2', 1), ('P1', 1)])
+    assert stock(system) == {'P1': 2, 'P2': 0}
+    assert order.quantities == [3, 1]
+    assert order.total_amount == 75
+    assert system.orders[order.order_id] is order
+    assert ('order', order.order_id) in system.dirty
+
+
+@pytest.mark.parametrize('lines', [
+    [('P1', 2), ('P2', 2)],       # not enough of P2
+    [('P1', 2), ('P9', 1)],       # unknown product
+    [('P1', 2), ('P2', 0)],       # bad quantity
+    [],
+])
+def test_place_order_takes_nothing_when_a_line_fails(system, lines):
+    with pytest.raises(OrderError):
+        system.place_order('C1', lines)
+    assert stock(system) == {'P1': 5, 'P2': 1}
+    assert system.orders == {}
+
+
+def test_place_order_unknown_customer(system):
+    with pytest.raises(OrderError):
+        system.place_order('C9', [('P1', 1)])
+    assert stock(system) == {'P1': 5, 'P2': 1}
+
+
+def test_place_order_returns_stock_when_recording_fails(system, monkeypatch):
+    def fail(order):
+        raise RuntimeError('could not record the order')
+
+    monkeypatch.setattr(system, 'add_order', fail)
+    with pytest.raises(RuntimeError):
+        system.place_order('C1', [('P1', 2), ('P2', 1)])
+    assert stock(system) == {'P1': 5, 'P2': 1}
+    monkeypatch.undo()
+    system.place_order('C1', [('P1', 2), ('P2', 1)])
+    assert stock(system) == {'P1': 3, 'P2': 0}
+
+
+def test_place_order_takes_nothing_when_pricing_fails(system, monkeypatch):
+    def fail(tier, product_ids):
+        raise KeyError('P1')
+
+    monkeypatch.setattr(system.pricing, 'prices', fail)
+    with pytest.raises(KeyError):
+        system.place_order('C1', [('P1', 2)])
+    assert stock(system) == {'P1': 5, 'P2': 1}
+
+
+def test_concurrent_orders_never_oversell(system):
+    placed, refused = [], []
+
+    def buy():
+        try:
+            placed.append(system.place_order('C1', [('P1', 1), ('P2', 1)]))
+        except OrderError:
+            refused.append(1)
+
+    threads = [threading.Thread(target=buy) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(placed) == 1 and len(refused) == 9
+    assert stock(system) == {'P1': 4, 'P2': 0}
+
+
+def test_update_stock_goes_through_the_stripe_lock(system):
+    system.save_data()
+    assert system.search_products('kettle', in_stock=True)
+    assert system.update_stock('P1', 5)
+    assert not system.update_stock('P1', 1)
+    assert stock(system) == {'P1': 0, 'P2': 1}
+    assert system.dirty == {('product', 'P1')}
+    # The search index follows the change
+    assert system.search_products('kettle', in_stock=True) == []
+    assert system.update_stock('P1', -3)
+    assert [p.product_id for p in system.search_products('kettle', in_stock=True)] == ['P1']
+    assert Product('P3', 'Mug', 5, 2).update_stock(3) is False
+
+
+def run_commands(system, text, **kwargs):
+    out = io.StringIO()
+    counts = run_batch(system, io.StringIO(text), out=out, **kwargs)
+    return counts, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_batch_applies_commands_and_reports_failures(system):
+    (processed, failed), results = run_commands(system, '\n'.join([
+        '{"op": "add_product", "product_id": "P3", "name": "Mug", "price": 4, "stock": 3}',
+        '{"op": "order", "customer_id": "C1", "lines": [["P3", 2]]}',
+        '{"op": "order", "customer_id": "C1", "lines": [["P3", 2]]}',
+        '# a comment',
+        '{"op": "order", "customer_id": "C1"}',
+        '{"op": "order", "customer_id": "C1", "lines": [["P3", 1]',
+        '[1, 2]',
+        '"order"',
+        '{"op": "refund"}',
+    ]))
+    assert (processed, failed) == (8, 6)
+    assert results[0] == {'ok': True, 'line': 1}
+    assert results[1]['ok'] and results[1]['total_amount'] == 8
+    assert results[2] == {'ok': False, 'error': 'Insufficient stock for P3!', 'line': 3}
+    assert results[3]['error'].startswith('Bad command') and results[3]['line'] == 5
+    assert results[4]['error'].startswith('Invalid JSON')
+    assert results[5]['error'] == 'Expected a JSON object, got list'
+    assert results[6]['error'] == 'Expected a JSON object, got str'
+    assert results[7]['error'] == 'Unknown op: refund'
+    assert stock(system)['P3'] == 1
+    assert system.dirty == set()
+
+
+def test_batch_csv_orders(system):
+    (processed, failed), results = run_commands(
+        system, 'customer_id,product_id,quantity,order_ref\nC1,P1,1,a\nC1,P2,1,a\nC1,P1,1,\n', fmt='csv')
+    assert (processed, failed) == (2, 0)
+    assert [r['line'] for r in results] == [2, 4]
+    assert stock(system) == {'P1': 3, 'P2': 0}
+
+
+def test_batch_saves_applied_commands_when_interrupted(system, monkeypatch):
+    def interrupt(system, command):
+        if command['op'] == 'report':
+            raise KeyboardInterrupt
+        return apply_command(system, command)
+
+    apply_command = batch.apply_command
+    monkeypatch.setattr(batch, 'apply_command', interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        run_commands(system, '{"op": "order", "customer_id": "C1", "lines": [["P1", 1]]}\n{"op": "report"}\n')
+    assert system.dirty == set()
+    assert stock(reopen(system))['P1'] == 4
+
+
+def sample_orders():
+    kettle, lamp, mug = Product('P1', 'Kettle', 20, 9), Product('P2', 'Lamp', 15, 9), Product('P3', 'Mug', 5, 9)
+    ada, bob = Customer('C1', 'Ada', 'ada@example.com'), Customer('C2', 'Bob', 'bob@example.com')
+    old = Order('O001', ada, [kettle, mug], [1, 4])             # 20 + 20
+    old.discount = 0.5                                          # 20
+    old.total_amount = old.calculate_total()
+    return [old,
+            Order('O002', bob, [lamp], [2]),                    # 30
+            Order('O003', ada, [lamp, mug], [1, 1], [12, 5])]   # 17
+
+
+def test_order_book_totals_and_top_n():
+    book = OrderBook.from_orders(sample_orders())
+    assert book.order_totals().tolist() == [20, 30, 17]
+    report = book.summary(top=2)
+    assert (report['orders'], report['lines'], report['units']) == (3, 5, 9)
+    assert report['revenue'] == 67 and report['average_order'] == pytest.approx(67 / 3)
+    assert report['top_products_by_units'] == [('P3', 5), ('P2', 3)]
+    assert report['top_products_by_revenue'] == [('P2', 42), ('P3', 15)]
+    assert report['top_customers'] == [('C1', 37), ('C2', 30)]
+    assert OrderBook.from_orders([]).summary()['top_customers'] == []
+
+
+def test_order_book_kept_current_matches_a_rebuild():
+    orders = sample_orders()
+    book = OrderBook.from_orders(orders[:1])
+    for order in orders[1:]:
+        book.add(order)
+    rebuilt = OrderBook.from_orders(orders)
+    assert book.summary() == rebuilt.summary()
+    assert book.order_index.tolist() == [0, 0, 1, 2, 2]
+
+
+def test_sales_summary_follows_new_orders(system):
+    assert system.sales_summary()['orders'] == 0
+    system.place_order('C1', [('P1', 2)])
+    system.place_order('C1', [('P2', 1)])
+    report = system.sales_summary()
+    assert (report['orders'], report['revenue']) == (2, 55)
+    assert report['top_products_by_revenue'] == [('P1', 40), ('P2', 15)]
+
+
+def test_files_default_to_the_products_directory(tmp_path, monkeypatch):
+    # A journal in the working directory must not be picked up
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'ecommerce.journal').write_text('{"kind": "product", "data": {}}\n')
+    data = tmp_path / 'data'
+    data.mkdir()
+    system = ECommerceSystem(str(data / 'products.xlsx'))
+    assert system.products == {}
+    assert [system.customers_file, system.orders_file, system.journal.path, system.pricing_file,
+            system.snapshot_file] == [str(data / name) for name in ('customers.xlsx', 'orders.xlsx',
+                                                                    'ecommerce.journal', 'pricing.json',
+                                                                    'ecommerce.snapshot')]
+
+
+class Clock(datetime):
+    current = datetime(2026, 1, 1, 12)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(pricing, 'datetime', Clock)
+    products = {'P1': Product('P1', 'Kettle', 20.0, 5), 'P2': Product('P2', 'Lamp', 10.0, 1)}
+    return PricingEngine(products, [])
+
+
+def test_price_table_has_a_row_per_tier_and_a_column_per_product(engine):
+    engine.set_rules([Rule(0.1, tier='Premium'), Rule(0.5, tier='Staff', product_id='P2')])
+    engine.compile()
+    assert engine.tiers == ['Regular', 'Premium', 'Staff']
+    assert engine.table.shape == (3, 2)
+    assert engine.prices('Regular', ['P2', 'P1']) == [10.0, 20.0]
+    assert engine.prices('Premium', ['P1', 'P2']) == pytest.approx([18.0, 9.0])
+    assert engine.prices('Staff', ['P1', 'P2']) == pytest.approx([20.0, 5.0])
+
+
+def test_best_matching_discount_wins(engine):
+    engine.set_rules([Rule(0.2, product_id='P1'), Rule(0.1, tier='Premium'), Rule(0.05)])
+    # Discounts don't stack, the largest one that matches applies
+    assert engine.price('Premium', 'P1') == pytest.approx(16.0)
+    assert engine.price('Premium', 'P2') == pytest.approx(9.0)
+    assert engine.price('Regular', 'P2') == pytest.approx(9.5)
+    engine.products['P1'].price = 30.0
+    engine.product_changed(engine.products['P1'])
+    assert engine.price('Regular', 'P1') == pytest.approx(24.0)
+    with pytest.raises(ValueError):
+        Rule(1.5)
+
+
+def test_time_windows_start_inclusive_and_end_exclusive(engine, monkeypatch):
+    engine.set_rules([Rule(0.5, starts='2026-01-01T13:00:00', ends='2026-01-01T14:00:00')])
+    assert engine.price('Regular', 'P1') == 20.0
+    assert engine.valid_until == datetime(2026, 1, 1, 13)
+    monkeypatch.setattr(Clock, 'current', datetime(2026, 1, 1, 13))
+    assert engine.price('Regular', 'P1') == 10.0
+    monkeypatch.setattr(Clock, 'current', datetime(2026, 1, 1, 14))
+    assert engine.price('Regular', 'P1') == 20.0
+    assert engine.valid_until is None
+
+
+def test_reprice_totals_each_cart(engine):
+    engine.set_rules([Rule(0.1, tier='Premium')])
+    totals = engine.reprice([('Regular', [('P1', 2), ('P2', 1)]), ('Premium', [('P2', 3)]), ('Regular', [])])
+    assert totals.tolist() == pytest.approx([50.0, 27.0, 0.0])
+    engine.set_rules([])
+    assert engine.reprice([('Premium', [('P2', 3)])]).tolist() == [30.0]
+
+
+def test_rules_round_trip(tmp_path):
+    path = str(tmp_path / 'pricing.json')
+    assert [rule.to_dict() for rule in load_rules(path)] == [rule.to_dict() for rule in DEFAULT_RULES]
+    rules = [Rule(0.25, tier='Premium', product_id='P1', starts='2026-01-01T00:00:00')]
+    save_rules(path, rules)
+    assert [rule.to_dict() for rule in load_rules(path)] == [rule.to_dict() for rule in rules]
@@ -0,0 +1,50 @@
+import math
+
+from quiz_ms.gradebook import Gradebook
+
+STUDENTS = [{'id': 3, 'fullname': 'Ana'}, {'id': 1, 'fullname': 'Ben'}, {'id': 2, 'fullname': 'Cy'}]
+QUIZZES = [{'id': 20, 'title': 'First'}, {'id': 10, 'title': 'Second'}]
+
+
+def book():
+    return Gradebook(STUDENTS, QUIZZES, [
+        (1, 10, 8, 10),
+        (1, 20, 5, 10),
+        (3, 20, 3, 4),
+        (2, 10, 0, 0),
+        (99, 10, 10, 10),  # no longer enrolled
+        (3, 30, 10, 10),   # quiz since deleted
+    ])
+
+
+def test_scores_land_in_the_student_row_and_quiz_column():
+    scores = book().scores.tolist()
+    # Rows follow the student order given, columns the quiz order
+    assert scores[0][0] == 75 and math.isnan(scores[0][1])
+    assert scores[1] == [50, 80]
+    assert math.isnan(scores[2][0]) and scores[2][1] == 0
+
+
+def test_marks_of_other_students_and_quizzes_are_dropped():
+    grades = book()
+    assert grades.attempts_per_student.tolist() == [1, 2, 1]
+    assert grades.attempts_per_quiz.tolist() == [2, 2]
+    assert Gradebook([], [], [(1, 10, 5, 10)]).scores.shape == (0, 0)
+
+
+def test_pages_keep_the_student_order():
+    grades = book()
+    assert grades.pages(2) == 2 and Gradebook([], [], []).pages(2) == 1
+    first, second = grades.page(1, 2), grades.page(2, 2)
+    assert [row['student']['fullname'] for row in first + second] == ['Ana', 'Ben', 'Cy']
+    assert first[0] == {'student': STUDENTS[0], 'scores': [75, None], 'average': 75, 'attempts': 1}
+    assert first[1]['average'] == 65
+    assert second[0]['scores'] == [None, 0]
+    assert grades.page(3, 2) == []
+
+
+def test_quiz_summary():
+    summary = Gradebook(STUDENTS, QUIZZES + [{'id': 40, 'title': 'Third'}], [(1, 10, 8, 10), (2, 10, 4, 10)]) \
+        .quiz_summary()
+    assert [(row['quiz']['title'], row['average'], row['attempts']) for row in summary] == \
+           [('First', None, 0), ('Second', 60, 2), ('Third', None, 0)]
@@ -0,0 +1,60 @@
+from ecommerce.index import CatalogIndex
+from project import Product
+
+
+def catalog():
+    return [Product('P1', 'Laptop Stand', 30.0, 5), Product('P2', 'Gaming Laptop', 900.0, 0),
+            Product('P3', 'Apple', 1.5, 40), Product('P4', 'Desk Lamp', 25.0, 2),
+            Product('P5', 'Paper', 4.0, 0)]
+
+
+def ids(products):
+    return [p.product_id for p in products]
+
+
+def test_substring_search_through_trigrams():
+    index = CatalogIndex.build(catalog())
+    assert ids(index.search('LAPTOP')) == ['P2', 'P1']
+    assert ids(index.search('top sta')) == ['P1']
+    assert index.search('laptops') == []
+
+
+def test_short_queries_match_anywhere_in_the_name():
+    index = CatalogIndex.build(catalog())
+    assert ids(index.search('ap')) == ['P3', 'P2', 'P1', 'P5']
+    assert ids(index.search('ap', limit=2)) == ['P3', 'P2']
+    assert ids(index.search('ap', in_stock=True)) == ['P3', 'P1']
+    assert ids(index.search('ap', max_price=10)) == ['P3', 'P5']
+    assert ids(index.search('z')) == []
+
+
+def test_price_range_is_inclusive():
+    index = CatalogIndex.build(catalog())
+    assert ids(index.search(min_price=4.0, max_price=30.0)) == ['P4', 'P1', 'P5']
+    assert ids(index.search(min_price=100)) == ['P2']
+    assert ids(index.search('lamp', max_price=20)) == []
+
+
+def test_updates_match_a_fresh_build():
+    products = catalog()
+    index = CatalogIndex()
+    for product in products:
+        index.update(product)
+    products[0].name, products[0].price = 'Monitor Stand', 45.0
+    index.update(products[0])
+    products.append(Product('P6', 'Laptop Bag', 60.0, 1))
+    index.update(products[-1])
+    fresh = CatalogIndex.build(products)
+    for query in ({'text': 'laptop'}, {'text': 'st'}, {'min_price': 40}, {'in_stock': True}):
+        assert ids(index.search(**query)) == ids(fresh.search(**query)), query
+
+
+def test_update_stock_flips_only_the_stock_bit():
+    products = catalog()
+    index = CatalogIndex.build(products)
+    products[1].stock = 3
+    products[2].stock = 0
+    index.update_stock(products[1])
+    index.update_stock(products[2])
+    assert ids(index.search(in_stock=True)) == ['P4', 'P2', 'P1']
+    assert ids(index.search('laptop', in_stock=True)) == ['P2', 'P1']
@@ -0,0 +1,89 @@
+import json
+import os
+import stat
+
+import pytest
+
+from ecommerce import journal
+from ecommerce.journal import Journal, export_workbook
+
+
+def test_replay_returns_appended_records(tmp_path):
+    path = str(tmp_path / 'journal')
+    journal = Journal(path)
+    journal.append([{'kind': 'product', 'data': {'product_id': 'P1', 'stock': 5}}])
+    journal.append([{'kind': 'product', 'data': {'product_id': 'P1', 'stock': 4}},
+                    {'kind': 'order', 'data': {'order_id': 'O001'}}])
+    journal.append([])
+    journal.close()
+    assert journal.entries == 3
+
+    replayed = Journal(path)
+    records = list(replayed.replay())
+    assert [r['data'] for r in records] == [{'product_id': 'P1', 'stock': 5},
+                                            {'product_id': 'P1', 'stock': 4},
+                                            {'order_id': 'O001'}]
+    assert replayed.entries == 3
+
+
+def test_replay_without_file(tmp_path):
+    assert list(Journal(str(tmp_path / 'missing')).replay()) == []
+
+
+@pytest.mark.parametrize('tail', [b'{"kind": "product", "da', b'not json\n'])
+def test_replay_drops_torn_last_line(tmp_path, tail):
+    path = tmp_path / 'journal'
+    good = json.dumps({'kind': 'customer', 'data': {'customer_id': 'C1'}}).encode() + b'\n'
+    path.write_bytes(good + tail)
+
+    journal = Journal(str(path))
+    assert [r['data']['customer_id'] for r in journal.replay()] == ['C1']
+    assert path.read_bytes() == good
+    # Appends carry on after the last good line
+    journal.append([{'kind': 'customer', 'data': {'customer_id': 'C2'}}])
+    journal.close()
+    assert [r['data']['customer_id'] for r in Journal(str(path)).replay()] == ['C1', 'C2']
+
+
+def test_failed_append_is_cut_back(tmp_path, monkeypatch):
+    path = tmp_path / 'journal'
+    journal = Journal(str(path))
+    journal.append([{'kind': 'product', 'data': {'product_id': 'P1'}}])
+    before = path.read_bytes()
+
+    def fail(fd):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr('ecommerce.journal.os.fsync', fail)
+    with pytest.raises(OSError):
+        journal.append([{'kind': 'product', 'data': {'product_id': 'P2'}}])
+    monkeypatch.undo()
+    assert path.read_bytes() == before
+    assert journal.entries == 1
+
+    journal.append([{'kind': 'product', 'data': {'product_id': 'P3'}}])
+    journal.close()
+    assert [r['data']['product_id'] for r in Journal(str(path)).replay()] == ['P1', 'P3']
+
+
+def test_reset_empties_the_journal(tmp_path):
+    path = tmp_path / 'journal'
+    journal = Journal(str(path))
+    journal.append([{'kind': 'product', 'data': {'product_id': 'P1'}}])
+    journal.reset()
+    assert path.read_bytes() == b''
+    assert journal.entries == 0
+
+
+def test_replacing_keeps_the_file_mode(tmp_path):
+    path = tmp_path / 'products.xlsx'
+    export_workbook(str(path), ['Product ID'], [['P1']])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~journal.UMASK
+    os.chmod(path, 0o640)
+    export_workbook(str(path), ['Product ID'], [['P2']])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    journal_path = tmp_path / 'journal'
+    journal_path.write_text('')
+    os.chmod(journal_path, 0o644)
+    Journal(str(journal_path)).reset()
+    assert stat.S_IMODE(os.stat(journal_path).st_mode) == 0o644
@@ -0,0 +1,61 @@
+import pytest
+
+from quiz_ms.live import Leaderboard, LiveResults, TooManySubscribers
+
+
+def row(student_id, marks, total=10):
+    return {'student_id': student_id, 'student_name': f'Student {student_id}',
+            'marks_obtained': marks, 'total_marks': total, 'attempt_date': '2026-10-19 10:00'}
+
+
+def test_leaderboard_ranks_ties_like_sql_rank():
+    board = Leaderboard([row(1, 8), row(2, 9), row(3, 8)])
+    assert [(r['student_id'], r['rank']) for r in board.rows()] == [(2, 1), (1, 2), (3, 2)]
+    board.update(2)
+    board.update(4, row(4, 5))
+    assert [(r['student_id'], r['rank']) for r in board.rows()] == [(1, 1), (3, 1), (4, 3)]
+    assert board.summary() == {'attempts': 3, 'average': 70.0, 'highest': 80.0}
+
+
+def test_subscribers_get_published_results():
+    loads = []
+    live = LiveResults(lambda quiz_id: loads.append(quiz_id) or [row(1, 8)])
+    first, snapshot = live.subscribe(5)
+    second, _ = live.subscribe(5)
+    assert loads == [5]
+    assert snapshot['summary']['attempts'] == 1
+
+    live.publish(5, 2, row(2, 9))
+    live.publish(6, 2, row(2, 9))  # nobody watching quiz 6
+    for subscriber in (first, second):
+        event = subscriber.get(timeout=1)
+        assert event['result']['rank'] == 1 and event['summary']['attempts'] == 2
+        assert subscriber.get(timeout=0) is None
+
+    live.unsubscribe(5, first)
+    live.unsubscribe(5, second)
+    assert live.boards == {} and live.subscriber_count == 0
+
+
+def test_stream_cap():
+    live = LiveResults(lambda quiz_id: [], max_subscribers=2)
+    first, _ = live.subscribe(1)
+    live.subscribe(2)
+    with pytest.raises(TooManySubscribers):
+        live.subscribe(1)
+    live.unsubscribe(1, first)
+    live.unsubscribe(1, first)  # a second unsubscribe frees nothing more
+    assert live.subscriber_count == 1
+    live.subscribe(1)
+    with pytest.raises(TooManySubscribers):
+        live.subscribe(3)
+
+
+def test_slow_subscriber_is_dropped():
+    live = LiveResults(lambda quiz_id: [], queue_size=2, max_subscribers=1)
+    subscriber, _ = live.subscribe(1)
+    for student_id in range(3):
+        live.publish(1, student_id, row(student_id, 5))
+    assert subscriber.dropped
+    assert live.subscriber_count == 0
+    live.subscribe(1)
@@ -0,0 +1,43 @@
+import time
+
+from quiz_ms.proctoring import IN_PROGRESS, SUBMITTED, TIMED_OUT, AttemptRegistry, merge_snapshots
+
+
+def test_attempts_time_out_and_submit():
+    registry = AttemptRegistry(timeout=60, sweep_interval=0)
+    now = time.time()
+    registry.start(1, 10, 'Ada', now, now + 600)
+    registry.start(1, 11, 'Bob', now, now + 600)
+    assert registry.heartbeat(1, 10, answered=3)
+    assert not registry.heartbeat(1, 12)
+
+    registry.active[(1, 11)].last_seen -= 61
+    registry.submit(1, 10, 'Ada', now, now + 600)
+    snapshot = registry.snapshot(1)
+    assert snapshot[10][4:] == (3, SUBMITTED)
+    assert snapshot[11][5] == TIMED_OUT
+    # Coming back after timing out carries on with the same attempt
+    registry.start(1, 11, 'Bob', now, now + 600)
+    assert registry.snapshot(1)[11][5] == IN_PROGRESS
+
+
+def test_registry_is_bounded():
+    registry = AttemptRegistry(max_attempts=2)
+    now = time.time()
+    for student_id in range(3):
+        registry.start(1, student_id, f'Student {student_id}', now, now + 600)
+    assert len(registry) == 2
+    assert set(registry.snapshot(1)) == {1, 2}
+
+
+def test_merge_keeps_latest_heartbeat_and_any_submission():
+    now = 10000.0
+    worker_a = {10: ('Ada', now - 100, now + 500, now - 5, 4, IN_PROGRESS),
+                11: ('Bob', now - 100, now + 500, now - 90, 1, IN_PROGRESS)}
+    worker_b = {10: ('Ada', now - 120, now + 500, now - 50, 2, IN_PROGRESS),
+                12: ('Cy', now - 100, now + 500, now - 80, 5, SUBMITTED)}
+    counts, attempts = merge_snapshots([worker_a, worker_b], timeout=60, now=now)
+    assert counts == {'started': 3, IN_PROGRESS: 1, SUBMITTED: 1, TIMED_OUT: 1}
+    ada = attempts[0]
+    assert (ada['student_name'], ada['answered'], ada['started_at']) == ('Ada', 4, now - 120)
+    assert [a['status'] for a in attempts] == [IN_PROGRESS, TIMED_OUT, SUBMITTED]
@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from quiz_ms import provisioning
+from quiz_ms.provisioning import hash_password, provision_users
+
+
+class UsersDb:
+    """Connection and cursor for the statements provision_users runs.
+    fail_at makes that INSERT (counting from 1) raise, like a dropped
+    connection."""
+
+    def __init__(self, taken=()):
+        self.users = {email: None for email in taken}
+        self.inserts = 0
+        self.fail_at = None
+        self.rows = []
+        self.rowcount = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        if sql.startswith('SELECT email FROM users'):
+            self.rows = [(email,) for email in params if email in self.users]
+        elif sql.startswith('INSERT IGNORE INTO users'):
+            self.inserts += 1
+            if self.inserts == self.fail_at:
+                raise ConnectionError('Lost connection to MySQL server')
+            rows = [params[i:i + 4] for i in range(0, len(params), 4)]
+            self.rowcount = 0
+            for fullname, email, password, role in rows:
+                if email not in self.users:
+                    self.users[email] = (fullname, password, role)
+                    self.rowcount += 1
+        else:
+            raise AssertionError(sql)
+
+    def fetchall(self):
+        return self.rows
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = UsersDb(taken={'taken@example.com'})
+    monkeypatch.setattr(provisioning, 'get_db_connection', lambda: db)
+    return db
+
+
+@pytest.fixture
+def users_csv(tmp_path):
+    path = tmp_path / 'users.csv'
+    lines = ['FullName,Email,Password,Role']
+    lines += [f'User {i},user{i}@example.com,pw{i},{"teacher" if i % 10 == 0 else ""}' for i in range(25)]
+    lines += ['No email,,pw,', 'Repeated,USER1@example.com,pw,', 'Taken,taken@example.com,pw,student',
+              'Admin,admin@example.com,pw,admin']
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_creates_users_in_batches(db, users_csv, tmp_path):
+    report = provision_users(users_csv, str(tmp_path / 'checkpoints'), batch_size=10)
+    assert (report['read'], report['created'], report['existing'], report['invalid'], report['duplicates']) \
+        == (29, 25, 1, 2, 1)
+    assert db.inserts == 3
+    assert db.users['user0@example.com'] == ('User 0', hash_password('pw0'), 'teacher')
+    assert db.users['user1@example.com'][2] == 'student'
+    assert len(report['errors']) == 2
+    assert os.listdir(tmp_path / 'checkpoints') == []
+
+
+def test_resumes_after_last_committed_batch(db, users_csv, tmp_path):
+    checkpoints = str(tmp_path / 'checkpoints')
+    db.fail_at = 2
+    partial = {}
+    with pytest.raises(ConnectionError):
+        provision_users(users_csv, checkpoints, batch_size=10, report=partial)
+    assert partial['created'] == 10 and partial['line'] == 11
+    assert len(os.listdir(checkpoints)) == 1
+
+    db.fail_at = None
+    report = provision_users(users_csv, checkpoints, batch_size=10)
+    assert report['resumed_from'] == 11
+    assert report['created'] == 25 and report['read'] == 29
+    # Only the rows after the checkpoint were sent again
+    assert db.inserts == 4
+    assert os.listdir(checkpoints) == []
+
+
+def test_restart_ignores_the_checkpoint(db, users_csv, tmp_path):
+    checkpoints = str(tmp_path / 'checkpoints')
+    db.fail_at = 2
+    with pytest.raises(ConnectionError):
+        provision_users(users_csv, checkpoints, batch_size=10)
+    db.fail_at = None
+    report = provision_users(users_csv, checkpoints, batch_size=10, restart=True)
+    assert report['resumed_from'] == 0
+    assert (report['created'], report['existing']) == (15, 11)
+
+
+def test_hashing_in_an_executor(db, users_csv, tmp_path):
+    with ThreadPoolExecutor(2) as executor:
+        report = provision_users(users_csv, str(tmp_path / 'checkpoints'), executor=executor, ahead=2,
+                                 batch_size=4)
+    assert report['created'] == 25
+    assert db.users['user24@example.com'][1] == hash_password('pw24')
@@ -0,0 +1,94 @@
+import pytest
+
+from quiz_ms.question_bank import DuplicateQuestionError, link_questions, question_hash
+
+
+class BankCursor:
+    """Dictionary cursor over in-memory bank tables, for the statements
+    link_questions runs. `hidden` ids are rows committed by another
+    transaction after this one's snapshot: plain reads don't see them,
+    locking reads do."""
+
+    def __init__(self):
+        self.questions = {}  # id -> (content_hash, text)
+        self.options = []    # (question_id, position, text, is_correct)
+        self.links = []
+        self.hidden = set()
+        self.rows = []
+
+    def add_question(self, text, options, correct, hidden=False):
+        question_id = len(self.questions) + 1
+        self.questions[question_id] = (question_hash(text, options, correct), text)
+        self.options += [(question_id, i, option, i == correct) for i, option in enumerate(options)]
+        if hidden:
+            self.hidden.add(question_id)
+        return question_id
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        if sql.startswith('SELECT id, content_hash FROM bank_questions'):
+            locking = sql.endswith('FOR UPDATE')
+            self.rows = [{'id': question_id, 'content_hash': content_hash}
+                         for question_id, (content_hash, _) in self.questions.items()
+                         if content_hash in params and (locking or question_id not in self.hidden)]
+        elif sql.startswith('INSERT IGNORE INTO bank_questions'):
+            taken = {content_hash for content_hash, _ in self.questions.values()}
+            for content_hash, text in zip(params[::2], params[1::2]):
+                if content_hash not in taken:
+                    self.questions[len(self.questions) + 1] = (content_hash, text)
+        elif sql.startswith('SELECT DISTINCT question_id FROM bank_options'):
+            self.rows = [{'question_id': question_id} for question_id in {o[0] for o in self.options}
+                         if question_id in params]
+        elif sql.startswith('INSERT INTO bank_options'):
+            self.options += [tuple(params[i:i + 4]) for i in range(0, len(params), 4)]
+        elif sql.startswith('INSERT INTO quiz_questions'):
+            self.links += [tuple(params[i:i + 4]) for i in range(0, len(params), 4)]
+        else:
+            raise AssertionError(sql)
+
+    def fetchall(self):
+        return self.rows
+
+
+def options_of(cur, question_id):
+    return [option[2] for option in cur.options if option[0] == question_id]
+
+
+QUESTIONS = [
+    ('2 + 2?', 1, ['3', '4'], 1),
+    ('Capital of France?', 2, ['Paris', 'Rome', 'Oslo'], 0),
+]
+
+
+def test_new_questions_are_added_once_and_reused():
+    cur = BankCursor()
+    assert link_questions(cur, 1, QUESTIONS) == 2
+    assert link_questions(cur, 2, QUESTIONS + [('3 + 3?', 1, ['6', '7'], 0)]) == 1
+    assert len(cur.questions) == 3
+    assert options_of(cur, 1) == ['3', '4'] and options_of(cur, 2) == ['Paris', 'Rome', 'Oslo']
+    assert cur.links == [(1, 0, 1, 1), (1, 1, 2, 2), (2, 0, 1, 1), (2, 1, 2, 2), (2, 2, 3, 1)]
+
+
+def test_changed_answer_is_a_different_question():
+    cur = BankCursor()
+    link_questions(cur, 1, [('2 + 2?', 1, ['3', '4'], 1)])
+    link_questions(cur, 2, [('2 + 2?', 1, ['3', '4'], 0)])
+    assert len(cur.questions) == 2
+
+
+def test_repeated_question_is_rejected():
+    cur = BankCursor()
+    with pytest.raises(DuplicateQuestionError) as info:
+        link_questions(cur, 1, QUESTIONS + [('2 + 2?', 3, ['3', '4'], 1)])
+    assert (info.value.first, info.value.second) == (1, 3)
+    assert str(info.value) == 'Question 3 is the same as question 1'
+    assert cur.questions == {} and cur.links == []
+
+
+def test_question_added_concurrently_gets_no_second_set_of_options():
+    cur = BankCursor()
+    # Another teacher committed this question after our snapshot was taken
+    raced = cur.add_question('2 + 2?', ['3', '4'], 1, hidden=True)
+    assert link_questions(cur, 1, QUESTIONS) == 1
+    assert options_of(cur, raced) == ['3', '4']
+    assert cur.links[0] == (1, 0, raced, 1)
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from quiz_ms import quiz_cache
+from quiz_ms.quiz_cache import QuizCodeCache, QuizContent, QuizContentCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(quiz_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_code_cache_hit_until_ttl(clock):
+    cache = QuizCodeCache(ttl=600, negative_ttl=30)
+    assert cache.get('ABC123') == (False, None, False)
+    cache.put('ABC123', 7, 1)
+    assert cache.get('ABC123') == (True, 7, True)
+    clock.now += 599
+    assert cache.get('ABC123') == (True, 7, True)
+    clock.now += 1
+    assert cache.get('ABC123') == (False, None, False)
+    assert 7 not in cache.codes_by_quiz
+
+
+def test_code_cache_unknown_codes_expire_sooner(clock):
+    cache = QuizCodeCache(ttl=600, negative_ttl=30)
+    cache.put('NOPE', None, False)
+    assert cache.get('NOPE') == (True, None, False)
+    clock.now += 30
+    assert cache.get('NOPE') == (False, None, False)
+
+
+def test_code_cache_invalidate_by_quiz(clock):
+    cache = QuizCodeCache()
+    cache.put('ABC123', 7, True)
+    cache.put('XYZ789', 8, False)
+    cache.invalidate_quiz(7)
+    assert cache.get('ABC123')[0] is False
+    assert cache.get('XYZ789') == (True, 8, False)
+    # A new code for the same quiz replaces the old mapping
+    cache.put('NEW000', 8, True)
+    cache.invalidate_code('XYZ789')
+    cache.invalidate_quiz(8)
+    assert cache.get('NEW000')[0] is False
+
+
+def test_code_cache_evicts_least_recently_used(clock):
+    cache = QuizCodeCache(max_entries=2)
+    cache.put('A', 1, True)
+    cache.put('B', 2, True)
+    cache.get('A')
+    cache.put('C', 3, True)
+    assert cache.get('B')[0] is False
+    assert cache.get('A')[0] and cache.get('C')[0]
+    assert set(cache.codes_by_quiz) == {1, 3}
+
+
+def make_content(quiz_id, n_questions=4, draw_count=None):
+    questions = [{'id': quiz_id * 100 + i, 'options': []} for i in range(n_questions)]
+    return QuizContent({'id': quiz_id}, questions, [f'<p>{q["id"]}</p>' for q in questions],
+                       {q['id']: (None, 1 + i) for i, q in enumerate(questions)}, draw_count)
+
+
+def test_content_cache_loads_once_for_concurrent_requests():
+    calls = []
+    release = threading.Event()
+
+    def loader(quiz_id):
+        calls.append(quiz_id)
+        release.wait(5)
+        return make_content(quiz_id)
+
+    cache = QuizContentCache(loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(1))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert len(results) == 8 and all(content is results[0] for content in results)
+    assert cache.loading == {}
+
+
+def test_content_cache_missing_quiz_not_cached():
+    calls = []
+    cache = QuizContentCache(lambda quiz_id: calls.append(quiz_id))
+    assert cache.get(5) is None
+    assert cache.get(5) is None
+    assert calls == [5, 5]
+
+
+def test_content_cache_invalidate_and_evict():
+    calls = []
+
+    def loader(quiz_id):
+        calls.append(quiz_id)
+        return make_content(quiz_id)
+
+    cache = QuizContentCache(loader, max_entries=2)
+    first = cache.get(1)
+    assert cache.get(1) is first
+    cache.invalidate(1)
+    assert cache.get(1) is not first
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)  # evicts 2, the least recently used
+    cache.get(1)
+    cache.get(2)
+    assert calls == [1, 1, 2, 3, 2]
+
+
+def test_content_draw_is_fixed_by_seed():
+    content = make_content(1, n_questions=10, draw_count=4)
+    drawn = content.draw('seed')
+    assert drawn == content.draw('seed')
+    assert len(set(drawn)) == 4 and all(0 <= i < 10 for i in drawn)
+    assert content.marks_for(drawn) == sum(1 + i for i in drawn)
+    assert make_content(1, n_questions=3, draw_count=5).draw('seed') == [0, 1, 2]
+
+
+def test_content_version_follows_what_take_quiz_shows():
+    questions = [{'id': 1, 'options': []}, {'id': 2, 'options': []}]
+    html = ['<p>1</p>', '<p>2</p>']
+    quiz = {'id': 1, 'title': 'Quiz', 'description': '', 'duration': 10}
+    version = QuizContent(quiz, questions, html, {}).version
+    assert QuizContent(dict(quiz), questions, list(html), {}).version == version
+    assert QuizContent(quiz, questions, ['<p>1</p>', '<p>two</p>'], {}).version != version
+    assert QuizContent(dict(quiz, duration=20), questions, html, {}).version != version
+    assert QuizContent(quiz, questions, html, {}, draw_count=1).version != version
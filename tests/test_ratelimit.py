@@ -0,0 +1,67 @@
+import pytest
+
+from quiz_ms import ratelimit
+from quiz_ms.ratelimit import IdempotencyStore, SlidingWindowCounter, TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, 'monotonic', clock)
+    return clock
+
+
+def test_repeated_submission_gets_first_result(clock):
+    store = IdempotencyStore(ttl=3600)
+    assert store.begin('student-1:quiz-2:token') == (True, None)
+    # Still in flight
+    assert store.begin('student-1:quiz-2:token') == (False, None)
+    store.finish('student-1:quiz-2:token', ('Quiz submitted successfully!', 'success'))
+    assert store.begin('student-1:quiz-2:token') == (False, ('Quiz submitted successfully!', 'success'))
+    assert store.begin('student-1:quiz-3:token') == (True, None)
+
+
+def test_discarded_submission_can_be_retried(clock):
+    store = IdempotencyStore(ttl=3600)
+    store.begin('key')
+    store.discard('key')
+    assert store.begin('key') == (True, None)
+
+
+def test_submission_keys_expire(clock):
+    store = IdempotencyStore(ttl=60)
+    store.begin('key')
+    store.finish('key', ('done', 'success'))
+    clock.now += 60
+    assert store.begin('key') == (True, None)
+    assert list(store.entries) == ['key']
+
+
+def test_token_bucket_refills(clock):
+    limiter = TokenBucketLimiter(rate=0.2, burst=3)
+    assert [limiter.allow('user') for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow('other')
+    clock.now += 5
+    assert limiter.allow('user')
+    assert not limiter.allow('user')
+
+
+def test_sliding_window_blocks_until_window_passes(clock):
+    counter = SlidingWindowCounter(window=60, limit=3)
+    for _ in range(3):
+        counter.record('10.0.0.1')
+    assert counter.blocked('10.0.0.1')
+    assert not counter.blocked('10.0.0.2')
+    clock.now += 61
+    assert not counter.blocked('10.0.0.1')
+    counter.record('10.0.0.1')
+    counter.reset('10.0.0.1')
+    assert not counter.blocked('10.0.0.1')
@@ -0,0 +1,162 @@
+import math
+from datetime import date
+
+import pytest
+
+from quiz_ms import rollups
+from quiz_ms.rollups import Delta, TotalsQueue, record_attempt, refresh, score_of, summarize
+
+
+class RollupDb:
+    """Connection and cursor that keep rollup rows in dicts, enough for
+    the statements in rollups.py"""
+
+    def __init__(self):
+        self.rows = {}  # (table, key) -> [attempts, sum, sumsq, min, max]
+        self.active = set()
+        self.active_students = {}
+        self.statements = []
+        self.commits = self.rollbacks = 0
+        self.fail = False
+        self.result = []
+        self.rowcount = 0
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.statements.append((sql, params))
+        if self.fail:
+            raise ConnectionError('Lost connection to MySQL server')
+        if sql.startswith('INSERT INTO') and 'ON DUPLICATE KEY UPDATE' in sql:
+            table = sql.split()[2]
+            key, attempts, total, total_sq, low, high = params
+            row = self.rows.get((table, key))
+            if row is None:
+                self.rows[(table, key)] = [attempts, total, total_sq, low, high]
+            else:
+                row[:] = [row[0] + attempts, row[1] + total, row[2] + total_sq, min(row[3], low), max(row[4], high)]
+        elif sql.startswith('INSERT IGNORE INTO daily_active'):
+            pairs = set(zip(params[::2], params[1::2]))
+            self.rowcount = len(pairs - self.active)
+            self.active |= pairs
+        elif sql.startswith('UPDATE daily_stats SET active_students'):
+            count, day = params
+            self.active_students[day] = self.active_students.get(day, 0) + count
+        elif sql.startswith('SELECT DATE(attempt_date)'):
+            self.result = [{'day': date(2026, 10, 19)}]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+def test_score_of():
+    assert score_of(3, 4) == 75
+    assert score_of(0, 0) == 0
+
+
+def test_record_attempt_updates_the_quiz_row_and_returns_the_day():
+    db = RollupDb()
+    assert record_attempt(db, 7, 1, 3, 4) == date(2026, 10, 19)
+    record_attempt(db, 7, 2, 1, 4)
+    assert db.rows[('quiz_stats', 7)] == [2, 100, 75 ** 2 + 25 ** 2, 25, 75]
+    row = summarize({'attempts': 2, 'score_sum': 100, 'score_sumsq': 75 ** 2 + 25 ** 2})
+    assert (row['mean'], row['std']) == (50, 25)
+    assert summarize({'attempts': 0})['mean'] is None
+
+
+def test_delta_merge():
+    first, second = Delta(), Delta()
+    for score in (50, 100):
+        first.add(score)
+    second.add(20)
+    first.merge(second)
+    first.merge(Delta())
+    assert (first.attempts, first.score_sum, first.score_sumsq, first.score_min, first.score_max) \
+        == (3, 170, 50 ** 2 + 100 ** 2 + 20 ** 2, 20, 100)
+
+
+def test_refresh_recomputes_only_the_given_rows():
+    db = RollupDb()
+    refresh(db, quiz_ids=[1, 2])
+    assert [sql.split()[0] for sql, _ in db.statements] == ['DELETE', 'INSERT']
+    assert db.statements[0] == ('DELETE FROM quiz_stats WHERE quiz_id IN (%s, %s)', (1, 2))
+    assert 'WHERE m.quiz_id IN (%s, %s)' in db.statements[1][0]
+    db.statements = []
+    refresh(db)
+    assert db.statements == []
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = RollupDb()
+    monkeypatch.setattr(rollups, 'get_db_connection', lambda: db)
+    return db
+
+
+def test_queued_totals_are_written_in_one_transaction(db):
+    queue = TotalsQueue()
+    today, yesterday = date(2026, 10, 19), date(2026, 10, 18)
+    queue.teachers = {}
+    for teacher_id, student_id, day, marks in ((1, 10, today, 4), (1, 11, today, 2), (2, 10, today, 3),
+                                               (2, 10, yesterday, 1)):
+        queue.teachers.setdefault(teacher_id, Delta()).add(score_of(marks, 4))
+        queue.days.setdefault(day, Delta()).add(score_of(marks, 4))
+        queue.active.setdefault(day, set()).add(student_id)
+    assert queue.flush() == 4
+    assert db.commits == 1
+    assert db.rows[('teacher_stats', 1)] == [2, 150, 100 ** 2 + 50 ** 2, 50, 100]
+    assert db.rows[('daily_stats', today)][0] == 3
+    assert db.active_students == {today: 2, yesterday: 1}
+    assert queue.flush() == 0 and db.commits == 1
+
+    # A student active again on the same day isn't counted twice
+    queue.days[today] = Delta()
+    queue.days[today].add(100)
+    queue.active[today] = {10}
+    queue.flush()
+    assert db.active_students[today] == 2
+
+
+def test_failed_flush_is_retried(db):
+    queue = TotalsQueue()
+    today = date(2026, 10, 19)
+    queue.teachers[1] = Delta()
+    queue.teachers[1].add(50)
+    queue.days[today] = Delta()
+    queue.days[today].add(50)
+    queue.active[today] = {10}
+    db.fail = True
+    with pytest.raises(ConnectionError):
+        queue.flush()
+    assert db.rollbacks == 1 and db.rows == {}
+    # Meanwhile another attempt comes in
+    queue.teachers[1].add(100)
+    db.fail = False
+    assert queue.flush() == 2
+    assert db.rows[('teacher_stats', 1)] == [2, 150, 50 ** 2 + 100 ** 2, 50, 100]
+    assert db.rows[('daily_stats', today)][0] == 1
+    assert db.active_students == {today: 1}
+
+
+def test_add_starts_one_flusher_per_process(db, monkeypatch):
+    started = []
+    monkeypatch.setattr(rollups.threading, 'Thread', lambda **kwargs: type(
+        'Thread', (), {'start': lambda self: started.append(kwargs['name'])})())
+    monkeypatch.setattr(rollups.atexit, 'register', lambda fn: None)
+    queue = TotalsQueue()
+    queue.add(1, 10, date(2026, 10, 19), 3, 4)
+    queue.add(1, 11, date(2026, 10, 19), 4, 4)
+    assert started == ['flush-totals']
+    assert queue.flush() == 2
+    assert math.isclose(db.rows[('teacher_stats', 1)][1], 175)
@@ -0,0 +1,82 @@
+import io
+
+import openpyxl
+import pytest
+
+from quiz_ms.roster import EmptyRosterError, read_roster, sync_roster
+
+
+def test_read_roster_email_column():
+    data = 'Name,Email\nAda,Ada@Example.com\nBob, bob@example.com \nAda again,ada@example.com\nNo email,\n'
+    assert read_roster(io.BytesIO(('\ufeff' + data).encode('utf-8')), 'class.csv') \
+        == ['ada@example.com', 'bob@example.com']
+
+
+def test_read_roster_without_a_header_takes_every_email():
+    data = 'Ada,ada@example.com,guardian@example.com\nnot an email\n'
+    assert read_roster(io.BytesIO(data.encode()), 'class.CSV') == ['ada@example.com', 'guardian@example.com']
+
+
+def test_read_roster_xlsx():
+    wb = openpyxl.Workbook()
+    wb.active.append(['Email', 'Name'])
+    wb.active.append(['ada@example.com', 'Ada'])
+    wb.active.append([None, 'Nobody'])
+    stream = io.BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    assert read_roster(stream, 'class.xlsx') == ['ada@example.com']
+
+
+class RosterCursor:
+    """Dictionary cursor over users and one teacher's enrollments"""
+
+    def __init__(self, students, enrolled):
+        self.students = students  # email -> id
+        self.enrolled = set(enrolled)
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        if sql.startswith("SELECT id, email FROM users"):
+            self.rows = [{'id': self.students[email], 'email': email.upper()}
+                         for email in params if email in self.students]
+        elif sql.startswith('SELECT student_id FROM enrollments'):
+            self.rows = [{'student_id': student_id} for student_id in self.enrolled]
+        elif sql.startswith('INSERT IGNORE INTO enrollments'):
+            self.enrolled.update(params[::2])
+        elif sql.startswith('SELECT email FROM users WHERE id IN'):
+            self.rows = [{'email': email} for email, student_id in self.students.items() if student_id in params]
+        elif sql.startswith('DELETE FROM enrollments'):
+            self.enrolled -= set(params[1:])
+        else:
+            raise AssertionError(sql)
+
+    def fetchall(self):
+        return self.rows
+
+
+STUDENTS = {'ada@example.com': 1, 'bob@example.com': 2, 'cy@example.com': 3}
+
+
+def test_sync_adds_and_reports_unknown_emails():
+    cur = RosterCursor(STUDENTS, enrolled=[2, 3])
+    report = sync_roster(cur, 9, ['ada@example.com', 'bob@example.com', 'who@example.com'])
+    assert report == {'added': ['ada@example.com'], 'removed': [], 'unknown': ['who@example.com'],
+                      'unchanged': 1}
+    assert cur.enrolled == {1, 2, 3}
+
+
+def test_sync_removes_missing_students():
+    cur = RosterCursor(STUDENTS, enrolled=[2, 3])
+    report = sync_roster(cur, 9, ['bob@example.com'], remove_missing=True)
+    assert report['removed'] == ['cy@example.com'] and report['added'] == []
+    assert cur.enrolled == {2}
+
+
+def test_sync_refuses_to_unenroll_everyone_for_an_empty_roster():
+    cur = RosterCursor(STUDENTS, enrolled=[2, 3])
+    with pytest.raises(EmptyRosterError):
+        sync_roster(cur, 9, [], remove_missing=True)
+    assert cur.enrolled == {2, 3}
+    assert sync_roster(cur, 9, [])['unchanged'] == 0
@@ -0,0 +1,82 @@
+from quiz_ms.search import SearchIndex, tokenize
+
+
+def quiz(quiz_id, title, subject='', description='', questions=''):
+    return ('quiz', quiz_id, {'title': title, 'subject': subject, 'description': description,
+                              'questions': questions}, {'id': quiz_id, 'title': title})
+
+
+def user(user_id, fullname, email):
+    return ('user', user_id, {'fullname': fullname, 'email': email}, {'id': user_id, 'fullname': fullname})
+
+
+def index():
+    search = SearchIndex()
+    search.load([
+        quiz(1, 'Algebra basics', 'Maths'),
+        quiz(2, 'Geometry', 'Maths', 'Angles and algebra'),
+        quiz(3, 'Cells', 'Biology', questions='What does algebra have to do with cells?'),
+        quiz(4, 'Algebra review', 'Maths'),
+        user(5, 'Ana Lopez', 'ana.lopez@school.org'),
+    ])
+    return search
+
+
+def ids(results):
+    return [(result['id'], result.get('title', result.get('fullname'))) for result in results[0]]
+
+
+def test_tokenize_splits_emails():
+    assert tokenize('Ana.Lopez@School.org') == ['ana', 'lopez', 'school', 'org']
+    assert tokenize(None) == []
+
+
+def test_results_are_ranked_by_where_words_appear():
+    results, total = index().search('algebra')
+    # Titles weigh more than descriptions, which weigh more than questions.
+    # Equal scores go to the older document.
+    assert [result['id'] for result in results] == [1, 4, 2, 3]
+    assert total == 4
+    assert results[0]['score'] == results[1]['score'] > results[2]['score'] > results[3]['score']
+
+
+def test_every_word_has_to_match_and_the_last_is_a_prefix():
+    search = index()
+    assert [r['id'] for r in search.search('maths alg')[0]] == [1, 4, 2]
+    assert [r['id'] for r in search.search('alg maths')[0]] == []
+    assert [r['id'] for r in search.search('lopez', kinds=('quiz',))[0]] == []
+    assert ids(search.search('school')) == [(5, 'Ana Lopez')]
+    results, total = search.search('algebra', page=2, per_page=3)
+    assert [r['id'] for r in results] == [3] and total == 4
+
+
+def test_removing_a_document_removes_its_terms():
+    search = index()
+    search.apply('quiz', 3, None)
+    assert [r['id'] for r in search.search('algebra')[0]] == [1, 4, 2]
+    assert search.search('cells') == ([], 0)
+    assert 'biology' not in search.postings and 'biology' not in search.terms
+    assert len(search) == 4
+    # Replacing a document drops the words it no longer has
+    search.apply('quiz', 4, quiz(4, 'Trigonometry', 'Maths')[2:])
+    assert [r['id'] for r in search.search('algebra')[0]] == [1, 2]
+    assert [r['id'] for r in search.search('trig')[0]] == [4]
+    assert search.terms == sorted(search.postings)
+
+
+def test_changes_during_a_load_are_replayed():
+    search = SearchIndex()
+    search.apply('quiz', 1, quiz(1, 'Lost')[2:])  # before any load, the load covers it
+    assert search.search('lost') == ([], 0)
+
+    def documents():
+        search.apply('quiz', 2, None)
+        search.apply('quiz', 3, quiz(3, 'Added while loading')[2:])
+        yield quiz(2, 'Deleted while loading')
+
+    search.load(documents())
+    assert search.loaded
+    assert search.search('deleted') == ([], 0)
+    assert ids(search.search('added')) == [(3, 'Added while loading')]
+    search.reset()
+    assert not search.loaded
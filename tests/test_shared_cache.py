@@ -0,0 +1,148 @@
+import time
+
+import pytest
+
+from quiz_ms.shared_cache import SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / 'shared.sqlite3'))
+
+
+def test_set_get_and_expiry(cache, monkeypatch):
+    cache.set('quiz', 1, {'title': 'Algebra'})
+    cache.set('code', 'ABC', (1, True), ttl=10)
+    assert cache.get('quiz', 1) == {'title': 'Algebra'}
+    assert cache.get('code', 'ABC') == (1, True)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 11)
+    assert cache.get('code', 'ABC') is None
+    assert cache.get('quiz', 1) == {'title': 'Algebra'}
+
+
+def test_value_loaded_before_publish_is_not_stored(cache):
+    version = cache.version('quiz', 1)
+    cache.set('quiz', 1, 'before', version=version)
+    assert cache.get('quiz', 1) == 'before'
+    # Another worker invalidates while this one is still loading
+    loading = cache.version('quiz', 1)
+    cache.publish('quiz', 1)
+    cache.set('quiz', 1, 'stale', version=loading)
+    assert cache.get('quiz', 1) is None
+    cache.set('quiz', 1, 'fresh', version=cache.version('quiz', 1))
+    assert cache.get('quiz', 1) == 'fresh'
+
+
+def test_publish_reaches_other_processes(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    worker, other = SharedCache(path), SharedCache(path)
+    seen = []
+    worker.subscribe('quiz', lambda key, payload: seen.append((key, payload)))
+    worker.poll(force=True)  # starts from the current end of the log
+    other.publish('quiz', 7, {'reason': 'edited'})
+    other.publish('code', 'ABC')
+    worker.poll(force=True)
+    assert seen == [('7', {'reason': 'edited'})]
+
+
+def test_handler_error_does_not_stop_polling(cache):
+    seen = []
+
+    def handler(key, payload):
+        seen.append(key)
+        if key == '1':
+            raise RuntimeError('broken handler')
+
+    cache.subscribe('quiz', handler)
+    cache.poll(force=True)
+    cache.publish('quiz', 1)
+    cache.publish('quiz', 2)
+    cache.poll(force=True)
+    assert seen == ['1', '2']
+
+
+def test_purge_removes_expired_entries_and_old_events(cache, monkeypatch):
+    cache.set('code', 'old', 1, ttl=10)
+    cache.set('code', 'kept', 2)
+    cache.publish('quiz', 1)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + cache.event_ttl + 1)
+    cache.purge()
+    conn = cache._connect()
+    assert conn.execute("SELECT key FROM entries").fetchall() == [('kept',)]
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone() == (0,)
+    assert cache.version('quiz', 1) == 0
+
+
+def test_set_many(cache):
+    cache.set_many('attempts', [('1:2', {'progress': 3}), ('1:3', {'progress': 1})], ttl=15)
+    cache.set('attempts', '2:2', {'progress': 0})
+    assert sorted(cache.items('attempts', '1:')) == [('1:2', {'progress': 3}), ('1:3', {'progress': 1})]
+
+
+def test_worker_that_missed_purged_events_drops_its_caches(tmp_path, monkeypatch):
+    path = str(tmp_path / 'shared.sqlite3')
+    idle, busy = SharedCache(path), SharedCache(path)
+    seen, missed = [], []
+    idle.subscribe('quiz', lambda key, payload: seen.append(key))
+    idle.on_missed(lambda: missed.append(True))
+    idle.poll(force=True)
+
+    busy.publish('quiz', 1)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + busy.event_ttl + 1)
+    busy.purge()
+    idle.poll(force=True)
+    assert missed == [True] and seen == []
+    # Caught up, later events are handled as usual
+    busy.publish('quiz', 2)
+    idle.poll(force=True)
+    assert missed == [True] and seen == ['2']
+
+    # Also when events were purged but newer ones remain
+    busy.publish('quiz', 3)
+    monkeypatch.setattr(time, 'time', lambda: now + 2 * busy.event_ttl + 2)
+    busy.purge()
+    busy.publish('quiz', 4)
+    idle.poll(force=True)
+    assert missed == [True, True] and seen == ['2', '4']
+
+
+def test_fresh_process_after_a_purge_misses_nothing(tmp_path, monkeypatch):
+    path = str(tmp_path / 'shared.sqlite3')
+    old = SharedCache(path)
+    old.publish('quiz', 1)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + old.event_ttl + 1)
+    old.purge()
+
+    fresh, missed = SharedCache(path), []
+    fresh.on_missed(lambda: missed.append(True))
+    fresh.poll(force=True)
+    fresh.poll(force=True)
+    assert missed == []
+
+
+def test_purge_removes_old_versions(cache, monkeypatch):
+    cache.publish('quiz', 1)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 10)
+    cache.publish('quiz', 2)
+    cache.event_ttl = 5
+    cache.purge()
+    assert cache.version('quiz', 1) == 0
+    assert cache.version('quiz', 2) == 1
+
+
+def test_missed_events_clear_the_worker_caches():
+    from quiz_ms import caches
+
+    caches.quiz_codes.put('ABC123', 1, True)
+    caches.quiz_contents.entries[1] = object()
+    caches.gradebooks.entries[2] = object()
+    caches.search_index.loaded = True
+    caches.on_events_missed()
+    assert caches.quiz_codes.get('ABC123')[0] is False
+    assert caches.quiz_contents.entries == {} and caches.gradebooks.entries == {}
+    assert not caches.search_index.loaded
@@ -0,0 +1,60 @@
+import os
+from datetime import datetime
+
+from ecommerce.journal import export_workbook
+from ecommerce.snapshot import read_snapshot, source_key, write_snapshot
+from project import ECommerceSystem
+
+PRODUCTS = [('P1', 'Kettle', 19.99, 5), ('P2', 'Lämp', 15.0, 0)]
+CUSTOMERS = [('C1', 'Ada', 'ada@example.com', True), ('C2', 'Bob', None, False)]
+ORDERS = [('O001', 'C1', 35.0, datetime(2026, 10, 19, 9, 30), [('P1', 1, 19.99), ('P2', 1, 15.01)]),
+          ('O002', 'C2', 0.0, '2026-10-19', [])]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'ecommerce.snapshot')
+    key = [[100, 1], None, [300, 3]]
+    write_snapshot(path, key, PRODUCTS, CUSTOMERS, ORDERS)
+    products, customers, orders = read_snapshot(path, key)
+    assert products == PRODUCTS
+    assert [(c[0], c[1], c[2], bool(c[3])) for c in customers] == CUSTOMERS
+    assert [(o[0], o[1], o[2], o[3], list(o[4])) for o in orders] == ORDERS
+
+
+def test_stale_or_damaged_snapshot_is_ignored(tmp_path):
+    path = tmp_path / 'ecommerce.snapshot'
+    assert read_snapshot(str(path), []) is None
+    write_snapshot(str(path), [[100, 1]], PRODUCTS, [], [])
+    assert read_snapshot(str(path), [[100, 2]]) is None
+    path.write_bytes(path.read_bytes()[:20])
+    assert read_snapshot(str(path), [[100, 1]]) is None
+    path.write_bytes(b'not a snapshot at all')
+    assert read_snapshot(str(path), [[100, 1]]) is None
+
+
+def test_source_key_changes_with_the_file(tmp_path):
+    path = tmp_path / 'products.xlsx'
+    assert source_key([str(path)]) == [None]
+    path.write_bytes(b'one')
+    before = source_key([str(path)])
+    path.write_bytes(b'three')
+    assert source_key([str(path)]) != before
+
+
+def test_system_uses_the_snapshot_until_a_workbook_changes(tmp_path, capsys):
+    products_file = str(tmp_path / 'products.xlsx')
+    export_workbook(products_file, ['Product ID', 'Name', 'Price', 'Stock'], [['P1', 'Kettle', 20, 5]])
+    assert ECommerceSystem(products_file).products['P1'].stock == 5
+    assert os.path.exists(tmp_path / 'ecommerce.snapshot')
+    capsys.readouterr()
+
+    assert ECommerceSystem(products_file).products['P1'].stock == 5
+    assert 'from snapshot' in capsys.readouterr().out
+
+    export_workbook(products_file, ['Product ID', 'Name', 'Price', 'Stock'], [['P1', 'Kettle', 20, 7]])
+    os.utime(products_file, ns=(1, 1))
+    assert ECommerceSystem(products_file).products['P1'].stock == 7
+    assert 'from XLSX' in capsys.readouterr().out
+
+    ECommerceSystem(products_file, snapshot_file=False)
+    assert 'from XLSX' in capsys.readouterr().out
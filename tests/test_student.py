@@ -0,0 +1,52 @@
+import pytest
+
+from quiz_ms import create_app, student
+from quiz_ms.quiz_cache import QuizContent
+
+
+class NoAttemptDb:
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=()):
+        pass
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    questions = [{'id': 1, 'options': []}, {'id': 2, 'options': []}]
+    quiz = {'id': 1, 'title': 'Quiz', 'description': '', 'duration': 10, 'is_active': True}
+    contents = {1: QuizContent(quiz, questions, ['<p>1</p>', '<p>2</p>'], {1: (None, 1), 2: (None, 1)})}
+    monkeypatch.setattr(student, 'get_db_connection', NoAttemptDb)
+    monkeypatch.setattr(student, 'quiz_contents', contents)
+    monkeypatch.setattr(student, 'share_attempts', lambda: None)
+    client = create_app().test_client()
+    with client.session_transaction() as sess:
+        sess.update(user_id=5, role='student', fullname='Student')
+    client.contents = contents
+    return client
+
+
+def test_take_quiz_answers_a_reload_with_not_modified(client):
+    first = client.get('/take_quiz/1')
+    assert first.status_code == 200 and b'<p>2</p>' in first.data
+    assert first.headers['Cache-Control'] in ('private, no-cache', 'no-cache, private')
+    etag = first.headers['ETag']
+
+    again = client.get('/take_quiz/1', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == etag
+
+    # Editing the quiz changes the page, so the old tag no longer matches
+    content = client.contents[1]
+    client.contents[1] = QuizContent(content.quiz, content.questions, ['<p>1</p>', '<p>two</p>'],
+                                     content.answer_key)
+    edited = client.get('/take_quiz/1', headers={'If-None-Match': etag})
+    assert edited.status_code == 200 and b'<p>two</p>' in edited.data
+    assert edited.headers['ETag'] != etag
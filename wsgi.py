@@ -0,0 +1,5 @@
+# Production entry point, e.g.:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+from quiz_ms import create_app
+
+app = create_app(preload=True)